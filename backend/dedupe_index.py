@@ -0,0 +1,165 @@
+"""
+Per-session similarity index for insight post-processing.
+
+Transcript bleed ("the insight parrots what the streamer said") is a lookup of
+the insight's hashed word n-grams in a set of transcript shingles collected
+over the whole session. Repetition uses the old word-overlap rule (share of
+the new insight's words found in a previous one) in two tiers: the client's
+recentInsights and the last RECENT_EXACT session insights are checked exactly,
+which catches containment (a short move inside a longer insight); the older
+long tail is searched through MinHash signatures banded into LSH buckets, so it
+costs a handful of dict lookups. LSH estimates Jaccard, not containment, so it
+can miss short moves contained in long ones; that is acceptable only for
+insights too old for the streamer to notice the repeat.
+"""
+import itertools
+import re
+from collections import deque
+from typing import Deque, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+SHINGLE_SIZES = (3, 4)
+# Shorter phrases ("i want to") are too common to count as bleed
+MIN_SHINGLE_CHARS = 11
+MAX_TRANSCRIPT_SHINGLES = 20000
+MAX_INSIGHTS = 500
+# Hashes of transcript segments already shingled; a repeat is skipped
+MAX_TRANSCRIPTS = 500
+
+NUM_PERM = 32
+BAND_ROWS = 2  # 16 bands: pairs with Jaccard >= ~0.3 almost always share a bucket
+REPEAT_OVERLAP = 0.6
+# Most recent session insights always checked exactly, before the LSH tail
+RECENT_EXACT = 20
+
+_MERSENNE = (1 << 31) - 1
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(1, _MERSENNE, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _MERSENNE, size=NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def words_of(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def shingles(words: List[str], size: int) -> Set[int]:
+    """Hashes of the word n-grams long enough to count as bleed."""
+    return {
+        hash(tuple(words[i:i + size]))
+        for i in range(len(words) - size + 1)
+        if sum(map(len, words[i:i + size])) + size - 1 >= MIN_SHINGLE_CHARS
+    }
+
+
+def minhash(tokens: Iterable[str]) -> np.ndarray:
+    values = np.fromiter((hash(t) % _MERSENNE for t in set(tokens)), dtype=np.uint64)
+    if values.size == 0:
+        return np.full(NUM_PERM, _MERSENNE, dtype=np.uint64)
+    return ((_PERM_A[:, None] * values[None, :] + _PERM_B[:, None]) % _MERSENNE).min(axis=1)
+
+
+def _bands(signature: np.ndarray) -> List[Tuple[int, int]]:
+    return [(start, hash(signature[start:start + BAND_ROWS].tobytes()))
+            for start in range(0, NUM_PERM, BAND_ROWS)]
+
+
+class SessionDedupeIndex:
+    """Transcript shingles and issued-insight signatures for one session."""
+
+    def __init__(self, max_shingles: int = MAX_TRANSCRIPT_SHINGLES, max_insights: int = MAX_INSIGHTS,
+                 recent_exact: int = RECENT_EXACT, max_transcripts: int = MAX_TRANSCRIPTS):
+        self.max_shingles = max_shingles
+        self.max_insights = max_insights
+        self.max_transcripts = max_transcripts
+        self.recent_exact = recent_exact
+        self._shingles: Dict[int, Set[int]] = {size: set() for size in SHINGLE_SIZES}
+        self._shingle_order: Deque[Tuple[int, int]] = deque()
+        self._transcripts: Set[int] = set()
+        self._transcript_order: Deque[int] = deque()
+        self._insights: Dict[int, Tuple[str, FrozenSet[str], List[Tuple[int, int]]]] = {}
+        self._buckets: Dict[Tuple[int, int], Set[int]] = {}
+        self._insight_order: Deque[int] = deque()
+        self._next_id = 0
+
+    def add_transcript(self, text: str) -> None:
+        key = hash(text)
+        if key in self._transcripts:
+            return  # the same segment is often sent with several viewer samples
+        self._transcripts.add(key)
+        self._transcript_order.append(key)
+        while len(self._transcript_order) > self.max_transcripts:
+            self._transcripts.discard(self._transcript_order.popleft())
+        words = words_of(text)
+        for size in SHINGLE_SIZES:
+            seen = self._shingles[size]
+            for shingle in shingles(words, size) - seen:
+                seen.add(shingle)
+                self._shingle_order.append((size, shingle))
+        while len(self._shingle_order) > self.max_shingles:
+            size, shingle = self._shingle_order.popleft()
+            self._shingles[size].discard(shingle)
+
+    def bleeds(self, text: str, size: int) -> bool:
+        """True if `text` contains any `size`-word phrase seen in the session transcript."""
+        return not shingles(words_of(text), size).isdisjoint(self._shingles[size])
+
+    def add_insight(self, text: str) -> None:
+        words = frozenset(words_of(text))
+        if not words:
+            return
+        bands = _bands(minhash(words))
+        if any(entry[1] == words for entry in self._candidates(bands)):
+            return
+        insight_id = self._next_id
+        self._next_id += 1
+        self._insights[insight_id] = (text, words, bands)
+        for band in bands:
+            self._buckets.setdefault(band, set()).add(insight_id)
+        self._insight_order.append(insight_id)
+        while len(self._insight_order) > self.max_insights:
+            self._forget(self._insight_order.popleft())
+
+    def similar(self, text: str, threshold: float = REPEAT_OVERLAP,
+                recent: Iterable[str] = ()) -> Optional[Tuple[str, float]]:
+        """
+        Most similar earlier insight whose words cover more than `threshold` of
+        `text`. `recent` (the client's recentInsights) and the last
+        `recent_exact` session insights are compared exactly; older ones via LSH.
+        """
+        words = frozenset(words_of(text))
+        if not words:
+            return None
+        exact = [(previous, frozenset(words_of(previous))) for previous in recent]
+        exact_ids = list(itertools.islice(reversed(self._insight_order), self.recent_exact))
+        exact += [self._insights[i][:2] for i in exact_ids]
+        tail_ids = self._candidate_ids(_bands(minhash(words))).difference(exact_ids)
+        best = None
+        for previous, previous_words in itertools.chain(exact, (self._insights[i][:2] for i in tail_ids)):
+            overlap = len(words & previous_words) / len(words)
+            if overlap > threshold and (best is None or overlap > best[1]):
+                best = (previous, overlap)
+        return best
+
+    def __len__(self) -> int:
+        return len(self._insights)
+
+    def _candidate_ids(self, bands: List[Tuple[int, int]]) -> Set[int]:
+        ids: Set[int] = set()
+        for band in bands:
+            ids |= self._buckets.get(band, set())
+        return ids
+
+    def _candidates(self, bands: List[Tuple[int, int]]):
+        return [self._insights[i] for i in self._candidate_ids(bands)]
+
+    def _forget(self, insight_id: int) -> None:
+        _, _, bands = self._insights.pop(insight_id)
+        for band in bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(insight_id)
+                if not bucket:
+                    del self._buckets[band]
@@ -0,0 +1,109 @@
+"""
+In-process lexicon emotion scorer, used as a hedge for the Hume upstream.
+
+Each text becomes a bag of lexicon hits; a (texts x vocabulary) count matrix
+times a (vocabulary x emotion) weight matrix scores the whole batch in one
+NumPy pass. Emotion names follow Hume's language model so callers cannot tell
+which source answered, apart from the `source` tag.
+"""
+import re
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+# Hume-style emotion -> cue words (lowercase, already tokenized). Only emotionally specific
+# words: function words like 'what', 'no' or 'go' turn up in most chat lines and would
+# pull ordinary text away from Neutral
+EMOTION_LEXICON: Dict[str, List[str]] = {
+    'Joy': ['happy', 'glad', 'love', 'loved', 'lovely', 'great', 'awesome', 'amazing', 'yay', 'nice',
+            'wonderful', 'best', 'beautiful', 'perfect', 'enjoy', 'enjoying', 'fun', 'smile'],
+    'Excitement': ['hype', 'hyped', 'pog', 'poggers', 'insane', 'crazy', 'wow', 'epic',
+                   'excited', 'exciting', 'omg', 'finally', 'clutch', 'huge', 'wild', 'fire'],
+    'Amusement': ['lol', 'lmao', 'haha', 'hahaha', 'funny', 'hilarious', 'joke', 'kek', 'lul', 'rofl',
+                  'dead', 'laughing', 'meme'],
+    'Interest': ['curious', 'interesting', 'explain', 'wonder', 'question', 'learn', 'idea'],
+    'Confusion': ['confused', 'confusing', 'huh', 'unclear', 'lost', 'weird', 'understand'],
+    'Surprise (positive)': ['whoa', 'woah', 'unexpected', 'surprise', 'surprised', 'unbelievable',
+                            'shocked'],
+    'Anger': ['angry', 'mad', 'hate', 'furious', 'stupid', 'trash', 'wtf', 'rage', 'kill', 'screw',
+              'ridiculous', 'cheater', 'unfair'],
+    'Annoyance': ['annoying', 'annoyed', 'ugh', 'boring', 'stop', 'enough', 'seriously',
+                  'whatever', 'bruh', 'cringe'],
+    'Sadness': ['sad', 'cry', 'crying', 'miss', 'sorry', 'lost', 'unfortunately', 'depressed', 'rip',
+                'hurt', 'lonely', 'tears'],
+    'Disappointment': ['disappointed', 'disappointing', 'fail', 'failed', 'worse', 'worst', 'bad',
+                       'expected', 'meh', 'nope', 'sucks'],
+    'Anxiety': ['worried', 'nervous', 'scared', 'afraid', 'anxious', 'stress', 'stressed', 'panic',
+                'careful', 'risky'],
+    'Boredom': ['bored', 'boring', 'slow', 'tired', 'sleep', 'sleepy', 'yawn', 'zzz'],
+    'Gratitude': ['thanks', 'thank', 'thx', 'appreciate', 'grateful', 'ty', 'helpful'],
+    'Admiration': ['goat', 'legend', 'respect', 'skill', 'talented', 'impressive', 'genius', 'king',
+                   'queen', 'pro'],
+}
+
+EMOTIONS = list(EMOTION_LEXICON)
+NEUTRAL = 'Neutral'
+
+# Pseudo-count for "no emotion": a single weak cue should not read as a confident label
+NEUTRAL_PRIOR = 1.0
+# Intensifiers multiply the weight of every cue in the text
+INTENSIFIERS = {'so', 'very', 'super', 'really', 'extremely', 'literally', 'absolutely'}
+INTENSIFIER_BOOST = 0.25
+
+_TOKEN_RE = re.compile(r"[a-z']+")
+
+
+class LocalEmotion(NamedTuple):
+    emotion: str
+    score: float
+    confidence: int
+
+
+class LexiconEmotionClassifier:
+    """Scores batches of texts against EMOTION_LEXICON with one matrix product."""
+
+    def __init__(self, lexicon: Dict[str, List[str]] = EMOTION_LEXICON):
+        self.emotions = list(lexicon)
+        vocabulary = sorted({word for words in lexicon.values() for word in words})
+        self.index = {word: i for i, word in enumerate(vocabulary)}
+        # A word shared by several emotions splits its weight between them
+        self.weights = np.zeros((len(vocabulary), len(self.emotions)), dtype=np.float32)
+        for column, words in enumerate(lexicon.values()):
+            for word in words:
+                self.weights[self.index[word], column] = 1.0
+        self.weights /= self.weights.sum(axis=1, keepdims=True)
+
+    def _counts(self, texts: List[str]) -> np.ndarray:
+        rows: List[int] = []
+        cols: List[int] = []
+        boost = np.ones(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_RE.findall(text.lower().replace("'", ''))
+            for token in tokens:
+                column = self.index.get(token)
+                if column is not None:
+                    rows.append(row)
+                    cols.append(column)
+                elif token in INTENSIFIERS:
+                    boost[row] += INTENSIFIER_BOOST
+            boost[row] += INTENSIFIER_BOOST * min(text.count('!'), 4)
+        counts = np.zeros((len(texts), len(self.index)), dtype=np.float32)
+        np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+        return counts * boost[:, None]
+
+    def classify(self, texts: List[str]) -> List[LocalEmotion]:
+        if not texts:
+            return []
+        scores = self._counts(texts) @ self.weights
+        totals = scores.sum(axis=1) + NEUTRAL_PRIOR
+        best = scores.argmax(axis=1)
+        probabilities = scores[np.arange(len(texts)), best] / totals
+
+        results = []
+        for column, probability, total in zip(best.tolist(), probabilities.tolist(), totals.tolist()):
+            if probability <= NEUTRAL_PRIOR / total:
+                # Same shape hume-analyze-text returns when Hume has no prediction
+                results.append(LocalEmotion(NEUTRAL, 0.5, 50))
+            else:
+                results.append(LocalEmotion(self.emotions[column], round(probability, 4), int(round(probability * 100))))
+        return results
@@ -0,0 +1,174 @@
+"""
+Table-driven deterministic fallback insights.
+
+Rules are keyed by (topic, delta category, history pattern), with '*' as a
+wildcard; a lookup tries the most specific key first and falls back to
+wildcards, so the table only spells out the cases that deserve their own
+wording. Spikes are also graded by size (SIZE_TIERS): a +25 spike looks up
+'spike_big' before 'spike', and size outranks topic, as the original
+if/elif fallback did. Each rule has a few (label, nextMove) variants: the variant is picked
+by a stable hash of the transcript, skipping any the session was just shown.
+Templates take {topic_word}. Everything is precomputed at import, so a
+fallback is a handful of dict lookups.
+"""
+import hashlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+ANY = '*'
+
+TOPIC_WORDS = {
+    'food': 'cooking', 'fitness': 'workout', 'finance': 'money',
+    'personal': 'story', 'interaction': 'chat', 'general': 'content',
+    'gaming': 'gaming', 'makeup': 'makeup', 'music': 'music',
+}
+
+Variant = Tuple[str, str]  # (emotionalLabel, nextMove)
+
+# category -> (minimum |delta|, sized category), largest first
+SIZE_TIERS: Dict[str, Sequence[Tuple[int, str]]] = {
+    'spike': ((20, 'spike_big'), (10, 'spike_solid')),
+}
+
+# (topic, category, pattern) -> variants
+RULES: Dict[Tuple[str, str, str], Sequence[Variant]] = {
+    # ---- spikes ----
+    (ANY, 'spike_big', ANY): (
+        ("{topic_word} wins big", "Double down {topic_word}. Stay hyped"),
+        ("huge {topic_word} wave", "Welcome newcomers. Recap {topic_word} fast"),
+    ),
+    (ANY, 'spike_solid', ANY): (
+        ("{topic_word} works", "Show more {topic_word}. Keep energy"),
+        ("{topic_word} pulls viewers", "Stay on {topic_word}. Go deeper"),
+    ),
+    (ANY, 'spike', ANY): (
+        ("{topic_word} gains", "Keep {topic_word} going. Stay present"),
+        ("{topic_word} ticks up", "Keep {topic_word} rolling. Stay present"),
+    ),
+    (ANY, 'spike', 'streak'): (
+        ("{topic_word} on fire", "Double down {topic_word}. Stay hyped"),
+        ("momentum building", "Keep {topic_word} rolling. Welcome newcomers"),
+    ),
+    (ANY, 'spike', 'reversal'): (
+        ("{topic_word} recovers", "Stay on {topic_word}. Don't switch now"),
+        ("comeback moment", "Recap {topic_word} fast for new viewers"),
+    ),
+    ('interaction', 'spike', ANY): (
+        ("chat loves it", "Read top comment aloud. Reply fast"),
+        ("chat fired up", "Ask chat to vote next. Count answers"),
+    ),
+    ('food', 'spike', ANY): (
+        ("cooking draws crowd", "Show close-up of the dish now"),
+        ("recipe hooks viewers", "Name the next step. Show ingredients"),
+    ),
+    ('gaming', 'spike', ANY): (
+        ("gameplay hype", "Narrate your next play out loud"),
+        ("clutch energy", "Replay that moment. Ask chat rating"),
+    ),
+    ('fitness', 'spike', ANY): (
+        ("workout pulls in", "Count reps out loud. Invite chat"),
+    ),
+    ('music', 'spike', ANY): (
+        ("music lands", "Take a song request from chat"),
+    ),
+    # ---- drops ----
+    (ANY, 'drop', ANY): (
+        ("{topic_word} dips", "Answer top chat question now"),
+        ("{topic_word} fades", "Ask chat a quick question now"),
+    ),
+    (ANY, 'drop', 'streak'): (
+        ("{topic_word} losing steam", "Switch topic. Tease what's next"),
+        ("slow bleed", "Change pace. Start a quick poll"),
+    ),
+    (ANY, 'drop', 'reversal'): (
+        ("{topic_word} cools off", "Bring back what worked. Recap it"),
+    ),
+    ('personal', 'drop', ANY): (
+        ("story drags", "Jump to the punchline now"),
+    ),
+    ('finance', 'drop', ANY): (
+        ("money talk heavy", "Give one quick tip. Then Q&A"),
+    ),
+    # ---- dumps ----
+    (ANY, 'dump', ANY): (
+        ("{topic_word} kills vibe", "Start giveaway now. Boost energy fast"),
+        ("viewers bailing", "Stop {topic_word}. Hype the next segment"),
+    ),
+    (ANY, 'dump', 'streak'): (
+        ("stream bleeding out", "Stop everything. Change topic now"),
+        ("mass exodus", "Drop {topic_word}. Call out chat now"),
+    ),
+    ('interaction', 'dump', ANY): (
+        ("chat went cold", "Stop asking. Show something new now"),
+    ),
+    # ---- flatline ----
+    (ANY, 'flatline', ANY): (
+        ("energy steady", "Ask quick question. Create buzz"),
+        ("holding steady", "Tease what's coming next. Build hype"),
+    ),
+    (ANY, 'flatline', 'streak'): (
+        ("stuck in place", "Raise energy. Start a challenge now"),
+    ),
+}
+
+
+def history_pattern(previous_deltas: Sequence[int], delta: int) -> str:
+    """
+    'fresh'    no history
+    'streak'   the last two deltas moved the same way as this one
+    'reversal' the last delta moved the other way
+    'mixed'    anything else
+    """
+    if not previous_deltas:
+        return 'fresh'
+    sign = (delta > 0) - (delta < 0)
+    last = (previous_deltas[-1] > 0) - (previous_deltas[-1] < 0)
+    if sign != 0 and last == -sign:
+        return 'reversal'
+    recent = previous_deltas[-2:]
+    if len(recent) == 2 and all(((d > 0) - (d < 0)) == sign for d in recent):
+        return 'streak'
+    return 'mixed'
+
+
+def _render(variants: Sequence[Variant]) -> Dict[str, List[Variant]]:
+    return {
+        topic: [(label.format(topic_word=word), move.format(topic_word=word)) for label, move in variants]
+        for topic, word in TOPIC_WORDS.items()
+    }
+
+
+# (topic, category, pattern) -> topic -> rendered variants
+_COMPILED = {key: _render(variants) for key, variants in RULES.items()}
+
+
+def sized_category(category: str, delta: int) -> Optional[str]:
+    """'spike_big' / 'spike_solid' for large enough deltas, else None."""
+    for minimum, sized in SIZE_TIERS.get(category, ()):
+        if abs(delta) >= minimum:
+            return sized
+    return None
+
+
+def lookup(topic: str, category: str, pattern: str, delta: int = 0) -> List[Variant]:
+    """Variants of the most specific rule for the key; a size tier beats topic."""
+    topic = topic if topic in TOPIC_WORDS else 'general'
+    sized = sized_category(category, delta)
+    for cat in ((sized, category) if sized else (category,)):
+        for key in ((topic, cat, pattern), (topic, cat, ANY), (ANY, cat, pattern), (ANY, cat, ANY)):
+            rule = _COMPILED.get(key)
+            if rule is not None:
+                return rule[topic]
+    return _COMPILED[(ANY, 'flatline', ANY)][topic]
+
+
+def choose_fallback(topic: str, category: str, pattern: str, transcript: str,
+                    avoid: Optional[Iterable[str]] = None, delta: int = 0) -> Variant:
+    """Stable pick for the transcript, skipping nextMoves in `avoid` when another variant exists."""
+    variants = lookup(topic, category, pattern, delta)
+    start = int.from_bytes(hashlib.blake2b(transcript.encode('utf-8'), digest_size=4).digest(), 'big')
+    seen = {move.lower() for move in (avoid or ())}
+    for offset in range(len(variants)):
+        variant = variants[(start + offset) % len(variants)]
+        if variant[1].lower() not in seen:
+            return variant
+    return variants[start % len(variants)]
@@ -0,0 +1,55 @@
+"""
+Fast JSON response rendering.
+
+FastAPI renders a response_model endpoint in three passes: validate the
+returned model against the response field, dump it to JSON-mode dicts, then
+json.dumps those. FastJSONResponse renders in one: a pydantic model goes
+straight to bytes through pydantic-core's serializer, and plain content (dicts,
+lists, datetimes) through orjson. Hot endpoints hand it their model directly so
+FastAPI's response_model pass is skipped; the bytes are identical.
+
+orjson is optional: without it plain content falls back to the stdlib encoder
+with FastAPI's JSONResponse settings.
+
+Non-finite floats are the one divergence. JSONResponse raises ValueError on
+NaN or +/-Infinity (a 500). pydantic-core and orjson render them as null,
+which JSON clients read as a missing value, so the request still succeeds.
+The stdlib fallback keeps allow_nan=False and raises like JSONResponse. No
+check is added on the hot path: one would walk every response only to turn
+a null into an error.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only where orjson is absent
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode='json')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, matching JSONResponse's output byte for byte (NaN/Infinity aside, see above)."""
+    if isinstance(content, BaseModel):
+        return to_json(content)
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by pydantic-core / orjson; also accepts a model as content."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
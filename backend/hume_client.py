@@ -0,0 +1,160 @@
+"""
+Micro-batching client for the Hume text-emotion upstream.
+
+Requests arriving within a few milliseconds of each other are collected and
+sent as one `{"texts": [...]}` call; identical texts (same normalized hash)
+share a single slot, including ones already in flight. A batch the upstream
+rejects (400) or answers malformed is retried as concurrent single-text calls;
+only after `max_rejections` consecutive rejections, the signature of an older
+`hume-analyze-text` deployment without the `texts` API, does the batcher stop
+batching. Empty texts are refused up front: the upstream rejects a whole batch
+for one empty entry.
+"""
+import asyncio
+import hashlib
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+HUME_UPSTREAM_CALLS = REGISTRY.counter(
+    'spikely_hume_upstream_calls_total',
+    'HTTP calls made to the Hume upstream, by kind (batch or single)',
+    ('kind',),
+)
+HUME_BATCH_SIZE = REGISTRY.counter(
+    'spikely_hume_batched_texts_total',
+    'Texts sent to the Hume upstream inside batched calls',
+)
+HUME_LATENCY = REGISTRY.histogram(
+    'spikely_hume_request_seconds',
+    'Latency of HTTP calls to the Hume upstream, by kind',
+    ('kind',),
+)
+HUME_ERRORS = REGISTRY.counter(
+    'spikely_hume_errors_total',
+    'Failed HTTP calls to the Hume upstream, by kind',
+    ('kind',),
+)
+HUME_JOINED = REGISTRY.counter(
+    'spikely_hume_joined_total',
+    'Emotion requests that joined an identical pending or in-flight text',
+)
+
+# Consecutive rejected batches before concluding the upstream has no `texts` API
+MAX_BATCH_REJECTIONS = 3
+
+
+def text_key(text: str) -> str:
+    """Hash of the normalized text, shared by the cache and the batcher."""
+    normalized = ' '.join(text.lower().split())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class HumeBatcher:
+    """Collects emotion requests for `window_s` (or `max_batch` texts) and sends them together."""
+
+    def __init__(self, url: str, client: Callable[[], httpx.AsyncClient],
+                 window_s: float = 0.005, max_batch: int = 16, max_rejections: int = MAX_BATCH_REJECTIONS):
+        self.url = url
+        self._client = client
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self.max_rejections = max_rejections
+        self.batch_supported = max_batch > 1
+        self._rejections = 0
+        self._pending: List[Tuple[str, str, asyncio.Future]] = []
+        self._by_key: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def analyze(self, text: str) -> Dict[str, Any]:
+        if not text or not text.strip():
+            raise ValueError("Text is required")
+        key = text_key(text)
+        future = self._by_key.get(key)
+        if future is not None:
+            HUME_JOINED.inc()
+        else:
+            future = asyncio.get_running_loop().create_future()
+            future.add_done_callback(lambda _f, k=key: self._by_key.pop(k, None))
+            self._by_key[key] = future
+            self._pending.append((key, text, future))
+            if len(self._pending) >= self.max_batch:
+                self._flush_now()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.window_s, self._flush_now)
+        # Shield: one caller going away must not fail everyone sharing the text
+        return await asyncio.shield(future)
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._send(batch))
+
+    async def _send(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        try:
+            if len(batch) > 1 and self.batch_supported:
+                results = await self._send_batch([text for _, text, _ in batch])
+            else:
+                results = None
+            if results is None:
+                results = await asyncio.gather(
+                    *[self._send_single(text) for _, text, _ in batch], return_exceptions=True
+                )
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, dict) and result.get("error"):
+                result = RuntimeError(f"Hume AI error: {result['error']}")
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _send_batch(self, texts: List[str]) -> Optional[List[Any]]:
+        HUME_UPSTREAM_CALLS.inc(kind='batch')
+        HUME_BATCH_SIZE.inc(len(texts))
+        response = await self._post('batch', {"texts": texts})
+        if response.status_code == 400:
+            self._rejections += 1
+            if self._rejections >= self.max_rejections:
+                logger.warning(f"⚠️ Hume upstream rejected {self._rejections} batches in a row - switching to single calls")
+                self.batch_supported = False
+            else:
+                logger.warning("⚠️ Hume upstream rejected a batch - single calls for this one")
+            return None
+        if response.status_code != 200:
+            HUME_ERRORS.inc(kind='batch')
+        response.raise_for_status()
+        self._rejections = 0
+        results = response.json().get("results")
+        if not isinstance(results, list) or len(results) != len(texts):
+            logger.warning("⚠️ Malformed Hume batch response - single calls for this one")
+            return None
+        return results
+
+    async def _send_single(self, text: str) -> Dict[str, Any]:
+        HUME_UPSTREAM_CALLS.inc(kind='single')
+        response = await self._post('single', {"text": text})
+        if response.status_code != 200:
+            HUME_ERRORS.inc(kind='single')
+            raise RuntimeError(f"Hume AI request failed ({response.status_code})")
+        return response.json()
+
+    async def _post(self, kind: str, payload: Dict[str, Any]) -> httpx.Response:
+        try:
+            with HUME_LATENCY.time(kind=kind):
+                return await self._client().post(self.url, json=payload)
+        except Exception:
+            HUME_ERRORS.inc(kind=kind)
+            raise
@@ -0,0 +1,117 @@
+"""
+Incremental parsing of streamed Claude insight JSON, plus SSE framing.
+
+Claude streams `{"emotionalLabel": "...", "nextMove": "..."}` a few characters
+at a time. IncrementalInsightParser is fed each text delta and reports every
+top-level string field as soon as its closing quote arrives, so the side panel
+can show emotionalLabel while nextMove is still being generated. The same
+parser is fed the `partial_json` deltas of the forced record_insight tool
+call, whose input has exactly that shape.
+
+Finished messages go through extract_insight_fields: the tool_use block's
+input is already a dict, so the fast path is two type checks; text answers
+(a model that ignored the tool) are scraped for a JSON object instead.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class IncrementalInsightParser:
+    """Character-level scanner that yields completed `"key": "string"` pairs."""
+
+    def __init__(self):
+        self.text = ''
+        self.fields: Dict[str, str] = {}
+        self._pos = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._depth = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consume a text delta; return (key, value) pairs completed by it."""
+        self.text += chunk
+        completed: List[Tuple[str, str]] = []
+        text = self.text
+        while self._pos < len(text):
+            ch = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    raw = text[self._string_start:self._pos + 1]
+                    try:
+                        value = json.loads(raw)
+                    except ValueError:
+                        value = raw[1:-1]
+                    if self._pending_key is not None:
+                        if self._depth == 1:
+                            self.fields[self._pending_key] = value
+                            completed.append((self._pending_key, value))
+                        self._pending_key = None
+                    else:
+                        self._last_string = value
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif ch == '{':
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+            elif ch == ':' and self._last_string is not None:
+                self._pending_key = self._last_string
+                self._last_string = None
+            elif ch == ',':
+                self._pending_key = None
+                self._last_string = None
+            self._pos += 1
+        return completed
+
+
+INSIGHT_FIELDS = ('emotionalLabel', 'nextMove')
+
+
+def scrape_insight_json(text: str) -> Any:
+    """Recover a JSON object from free-form text (markdown fences, wrapper prose)."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        match = re.search(r'\{[\s\S]*\}', text)
+        if match:
+            try:
+                return json.loads(match.group(0))
+            except ValueError:
+                pass
+    return None
+
+
+def insight_fields(candidate: Any) -> Dict[str, str]:
+    """The usable (non-empty string) insight fields of a parsed object."""
+    if not isinstance(candidate, dict):
+        return {}
+    fields = {}
+    for key in INSIGHT_FIELDS:
+        value = candidate.get(key)
+        if isinstance(value, str) and value.strip():
+            fields[key] = value.strip()
+    return fields
+
+
+def extract_insight_fields(content: List[Any], tool_name: str) -> Tuple[str, Dict[str, str]]:
+    """(path, fields) from a message's content blocks; path is 'tool' or 'text'."""
+    for block in content:
+        if block.type == 'tool_use' and block.name == tool_name:
+            return 'tool', insight_fields(block.input)
+    text = ''.join(block.text for block in content if block.type == 'text').strip()
+    return 'text', insight_fields(scrape_insight_json(text))
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Frame one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,128 @@
+"""
+Latency-tiered model routing for insight generation.
+
+Each viewer-delta category maps to a model tier (by default flatline and drops
+go to a small, fast model; spikes and dumps to the larger one). The router
+also keeps a window of recent call latencies per model: when the tier a rule
+picks has recently been slower than the request's latency budget (its
+deadline, or the SLO), the request steps down to the next faster tier that
+fits instead of waiting on a call that will likely miss.
+
+A model only gets new samples when it is called, so a step-down must not be
+permanent: samples expire after `max_age_s`, and one in every `probe_every`
+stepped-down requests still goes to the rule's tier (reason 'probe') to
+measure whether it has recovered.
+"""
+import math
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from metrics import REGISTRY
+
+ROUTES = REGISTRY.counter(
+    'spikely_insight_routes_total',
+    'Insight model routing decisions by tier and reason (rule, slo, probe)',
+    ('tier', 'reason'),
+)
+
+DEFAULT_RULES = 'flatline=fast,drop=fast,spike=large,dump=large'
+LATENCY_WINDOW = 50
+# Below this many samples a model's latency is unknown and never triggers a step-down
+MIN_SAMPLES = 10
+LATENCY_QUANTILE = 0.9
+# Samples older than this no longer count towards a model's latency
+SAMPLE_MAX_AGE_S = 120.0
+# Every Nth request that would step down probes the rule's tier instead
+PROBE_EVERY = 20
+
+
+class ModelTier(NamedTuple):
+    name: str
+    model: str
+    max_tokens: int
+
+
+class Route(NamedTuple):
+    tier: ModelTier
+    reason: str
+
+
+def parse_rules(spec: str) -> Dict[str, str]:
+    """'flatline=fast,spike=large' -> {'flatline': 'fast', 'spike': 'large'}"""
+    rules = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        category, sep, tier = item.partition('=')
+        if not sep or not category.strip() or not tier.strip():
+            raise ValueError(f"Bad model route '{item.strip()}' (expected category=tier)")
+        rules[category.strip()] = tier.strip()
+    return rules
+
+
+class ModelRouter:
+    """Picks a model tier per request from routing rules and recent latencies."""
+
+    def __init__(self, tiers: List[ModelTier], rules: Dict[str, str], default_tier: str,
+                 slo_s: Optional[float] = None, window: int = LATENCY_WINDOW, min_samples: int = MIN_SAMPLES,
+                 max_age_s: float = SAMPLE_MAX_AGE_S, probe_every: int = PROBE_EVERY,
+                 clock: Callable[[], float] = time.monotonic):
+        # `tiers` is ordered fastest first; SLO step-downs walk towards the front
+        self.tiers = list(tiers)
+        self._by_name = {tier.name: tier for tier in self.tiers}
+        for tier in list(rules.values()) + [default_tier]:
+            if tier not in self._by_name:
+                raise ValueError(f"Unknown model tier '{tier}' (have {', '.join(self._by_name)})")
+        self.rules = dict(rules)
+        self.default_tier = default_tier
+        self.slo_s = slo_s
+        self.window = window
+        self.min_samples = min_samples
+        self.max_age_s = max_age_s
+        self.probe_every = probe_every
+        self._clock = clock
+        self._latencies: Dict[str, Deque[Tuple[float, float]]] = {}  # (observed at, seconds)
+        self._step_downs = 0
+
+    def tier_for(self, category: str) -> ModelTier:
+        """The rule's tier for a delta category, ignoring latency."""
+        return self._by_name[self.rules.get(category, self.default_tier)]
+
+    def route(self, category: str, budget_s: Optional[float] = None) -> Route:
+        """Tier for a request; `budget_s` defaults to the SLO."""
+        tier = self.tier_for(category)
+        reason = 'rule'
+        budget_s = budget_s or self.slo_s
+        if budget_s:
+            index = self.tiers.index(tier)
+            while index > 0 and (self.latency(self.tiers[index].model) or 0) > budget_s:
+                index -= 1
+                reason = 'slo'
+            if reason == 'slo':
+                self._step_downs += 1
+                if self.probe_every and self._step_downs % self.probe_every == 0:
+                    reason = 'probe'
+                else:
+                    tier = self.tiers[index]
+        ROUTES.inc(tier=tier.name, reason=reason)
+        return Route(tier, reason)
+
+    def observe(self, model: str, seconds: float) -> None:
+        samples = self._latencies.get(model)
+        if samples is None:
+            samples = self._latencies[model] = deque(maxlen=self.window)
+        samples.append((self._clock(), seconds))
+
+    def latency(self, model: str) -> Optional[float]:
+        """Recent p90 call latency for a model, or None with too few unexpired samples."""
+        samples = self._latencies.get(model)
+        if not samples:
+            return None
+        cutoff = self._clock() - self.max_age_s
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        if len(samples) < self.min_samples:
+            return None
+        ordered = sorted(seconds for _, seconds in samples)
+        return ordered[min(len(ordered) - 1, math.ceil(LATENCY_QUANTILE * len(ordered)) - 1)]
@@ -0,0 +1,360 @@
+"""
+Static prompt text for Claude insight generation.
+
+Everything here is identical across requests, so it is built once at import and
+sent as a cached system prefix (prompt caching): only the per-request context
+from build_insight_prompt() is billed and processed as fresh input tokens,
+and that context is kept within an input-token budget.
+"""
+from typing import Dict, List, NamedTuple, Tuple
+
+INSIGHT_SYSTEM_PROMPT = """You are Spikely - a tactical AI coach for live streamers. Generate ONE micro-decision they can execute in the next 30 seconds to spike viewer engagement.
+
+OUTPUT REQUIREMENTS:
+- emotionalLabel: 2-3 words describing what pattern you detected
+- nextMove: 3-5 word action + emotional cue (max 8 words total)
+- MUST be specific to their actual content (not generic)
+- Use positive framing (what TO do, not what NOT to do)
+- MUST reference SPECIFIC words or topics from the transcript
+- NEVER generate generic advice like "be engaging" or "keep momentum"
+
+🚫 CRITICAL ANTI-REPETITION RULES:
+1. Every insight MUST BE UNIQUE - no repeating previous patterns
+2. Reference SPECIFIC words from the transcript (not just topics)
+3. If they mentioned "gaming setup", say "Ask about graphics cards" NOT "talk about gaming"
+4. If they mentioned "makeup routine", say "Show foundation technique" NOT "demonstrate makeup"
+5. Vary your action verbs - don't use same verb twice in a row
+6. Vary your emotional cues - rotate between different energy levels
+7. If you've said "Pivot to X" recently, use "Switch to" or "Jump to" instead
+8. Never give the same advice for opposite viewer changes (spike vs drop)
+
+ANALYSIS PRIORITY:
+1. What SPECIFIC topic/action caused the viewer change?
+2. What emotional energy drove it? (from Hume AI prosody)
+3. Should they amplify this or pivot?
+4. What haven't I suggested recently?
+
+ACTION VERBS TO USE (ROTATE THESE):
+Ask, Show, Talk about, Tease, Reveal, Pivot to, Demonstrate, Explain, Highlight, Share, Compare, Review, Test, Try, Call out, Point to, Zoom in on, React to
+
+TONAL CUES TO USE (ROTATE THESE):
+Stay hyped, Go vulnerable, Build excitement, Keep energy up, Soften tone, Be authentic, Speed up, Be direct, Stay present, Boost energy, Stay curious, Be playful, Get intense, Stay calm, Create urgency, Build suspense, Be conversational
+
+TOPIC CATEGORIES:
+Gaming, makeup, cooking, fitness, story, chat, giveaway, product, tutorial, Q&A, personal, tech, music, art, review, reaction, news, gossip, advice, challenge
+
+INSIGHT STRUCTURE EXAMPLES (ULTRA-SPECIFIC):
+
+**SPIKE (viewers increasing +5 or more):**
+Pattern detected → Amplify with CONCRETE action they can do in 30 seconds
+- Transcript: "playing Valorant on my PC" → {"emotionalLabel": "Valorant talk wins", "nextMove": "Ask 'What agents you main?'. React big"}
+- Transcript: "this eyeshadow palette" → {"emotionalLabel": "palette demo spikes", "nextMove": "Hold palette to camera. Show shimmer"}
+- Transcript: "vacation with my family" → {"emotionalLabel": "story connects", "nextMove": "Tell the TSA security story. Laugh"}
+- Transcript: "bought new iPhone" → {"emotionalLabel": "product hype works", "nextMove": "Open camera app. Test portrait mode"}
+- Transcript: "cooking chicken recipe" → {"emotionalLabel": "recipe interest high", "nextMove": "Taste test on camera. React honest"}
+
+**DROP (viewers decreasing -5 to -15):**
+Pattern detected → Pivot with SPECIFIC new action
+- Transcript: "technical bug issues" → {"emotionalLabel": "complaints dip", "nextMove": "Pull up giveaway. Announce winner time"}
+- Transcript: "explaining code for 5 minutes" → {"emotionalLabel": "pacing slows", "nextMove": "Run the code now. Show results"}
+- Transcript: "same topic repeated" → {"emotionalLabel": "topic exhausted", "nextMove": "Read top chat question. Answer it"}
+
+**DUMP (viewers dropping -20 or more):**
+Urgent → HIGH ENERGY concrete recovery action
+- Transcript: "dead silence for 30s" → {"emotionalLabel": "silence kills", "nextMove": "Start poll: 'Yes or No?'. Count votes"}
+- Transcript: "stream lagging/frozen" → {"emotionalLabel": "tech problems drop", "nextMove": "Show backup clip. Talk over it"}
+
+**FLATLINE (viewers stable ±3):**
+Create engagement with SPECIFIC question/action
+- Transcript: "chatting casually" → {"emotionalLabel": "energy steady", "nextMove": "Call out @username. Ask their opinion"}
+- Transcript: "background music playing" → {"emotionalLabel": "passive watching", "nextMove": "Announce: 'Big reveal in 30s'. Tease it"}
+
+🎯 KEY PATTERN TO FOLLOW:
+[Action Verb] [Specific Noun/Question/Thing] + [Physical execution cue]
+
+EXAMPLES:
+✅ "Ask 'What's your rank?'. Read answers loud"
+✅ "Hold bottle to camera. Point at ingredients"
+✅ "Tell airport TSA story. Act it out"
+✅ "Answer 'how to start streaming'. Give 3 quick tips"
+✅ "Show controller setup. Explain each button"
+✅ "Read top donation. Thank them by name"
+
+**DROP (viewers decreasing -5 to -15):**
+Pattern detected → Constructive pivot with VARIETY
+- Complaint about bugs: {"emotionalLabel": "complaints dip", "nextMove": "Switch to giveaway. Boost energy"}
+- Slow explanation: {"emotionalLabel": "pacing slows", "nextMove": "Jump to demo. Speed up"}
+- Same topic 5min: {"emotionalLabel": "topic exhausted", "nextMove": "Ask viewer questions. Create interaction"}
+
+**DUMP (viewers dropping -20 or more):**
+Pattern detected → Urgent recovery with HIGH ENERGY
+- Dead silence: {"emotionalLabel": "silence kills", "nextMove": "Start poll now. Get intense"}
+- Technical issues: {"emotionalLabel": "tech problems drop", "nextMove": "Show backup content. Stay upbeat"}
+
+**FLATLINE (viewers stable ±3):**
+Create engagement opportunity with NOVELTY
+- Casual chat: {"emotionalLabel": "energy steady", "nextMove": "Call out usernames. Be playful"}
+- Background content: {"emotionalLabel": "passive watching", "nextMove": "Tease surprise reveal. Build suspense"}
+
+CRITICAL RULES:
+1. NEVER echo raw transcript words (e.g., if they said "twenty one is young" don't use those exact words)
+2. Extract the CONCEPT and make it more specific
+3. Be hyper-specific: "Ask about RTX 4090" NOT "talk about graphics"
+4. Include the HOW: emotion/energy cue in every nextMove
+5. Total nextMove: 8 words maximum
+6. emotionalLabel: 3 words maximum
+7. VARY your vocabulary - use synonyms, different verbs, different cues
+
+BAD EXAMPLES (too generic - NEVER do this):
+- {"emotionalLabel": "positive", "nextMove": "Keep doing this"} ← TERRIBLE
+- {"emotionalLabel": "engagement", "nextMove": "Be more engaging"} ← TERRIBLE
+- {"emotionalLabel": "content", "nextMove": "Do more content talk"} ← TERRIBLE
+- {"emotionalLabel": "momentum", "nextMove": "Keep momentum going"} ← TERRIBLE
+- {"emotionalLabel": "story dips", "nextMove": "Pivot to Q&A. Build excitement"} ← OVERUSED
+
+GOOD EXAMPLES (specific and tactical):
+- {"emotionalLabel": "Elden Ring tips work", "nextMove": "Share boss strategies. Stay hyped"}
+- {"emotionalLabel": "contouring demo spikes", "nextMove": "Zoom on cheekbone blending. Keep intensity"}
+- {"emotionalLabel": "pasta recipe wins", "nextMove": "Taste test on camera. React big"}
+- {"emotionalLabel": "kettlebell moves connect", "nextMove": "Call out viewer form. Boost energy"}
+
+🎯 DYNAMIC INSIGHT GENERATION PROCESS:
+1. Read the full transcript carefully
+2. Identify 3-5 specific nouns/topics mentioned
+3. Check recent insights - what have you said before?
+4. Pick the MOST RELEVANT topic that's NOT been used recently
+5. Create a NEW verb + cue combination you haven't used
+6. Reference specific details, not generic concepts
+
+Return the insight by calling the record_insight tool. No other text."""
+
+INSIGHT_GENERATION_GUIDE = """🎯 ULTRA-SPECIFIC TACTICAL INSIGHT GENERATION:
+
+STEP 1 - EXTRACT SPECIFICS from transcript:
+- What SPECIFIC game/product/topic did they mention? (exact name)
+- What SPECIFIC question could viewers answer?
+- What SPECIFIC action are they doing right now?
+- What SPECIFIC story/moment did they reference?
+
+STEP 2 - CREATE TACTICAL ACTION using those specifics:
+- DON'T say "Ask about gaming" → SAY "Ask 'What rank are you?'"
+- DON'T say "Show product" → SAY "Hold up the bottle. Show label"
+- DON'T say "Tell story" → SAY "Tell the airport security story"
+- DON'T say "Pivot to Q&A" → SAY "Answer top chat question now"
+
+STEP 3 - ADD SPECIFIC EXECUTION CUE:
+- Not "Stay hyped" → "Read answers out loud"
+- Not "Keep energy" → "Lean into camera"
+- Not "Build excitement" → "Count down from 3"
+
+REQUIRED FORMAT:
+emotionalLabel: [detected pattern, max 3 words]
+nextMove: [SPECIFIC action with noun] + [HOW to execute it]
+
+EXAMPLES OF WHAT WE NEED:
+
+❌ BAD (vague):
+- "Pivot to Q&A. Build excitement" 
+- "Show more story. Keep energy"
+- "Talk about gaming. Stay hyped"
+
+✅ GOOD (specific):
+- "Ask 'What's your setup?'. Read answers loud"
+- "Tell your first stream fail. Be vulnerable"
+- "Hold product to camera. Point at features"
+- "Answer 'how did you start'. Give 3 tips"
+- "Show your controller. Explain button mapping"
+
+Generate ONE hyper-specific tactical insight NOW. Include concrete nouns from transcript. Tell them EXACTLY what to do in next 30 seconds."""
+
+# System blocks for messages.create(); the cache breakpoint sits on the last
+# static block so the whole prefix is read from cache on subsequent calls.
+INSIGHT_SYSTEM_BLOCKS = [
+    {"type": "text", "text": INSIGHT_SYSTEM_PROMPT},
+    {"type": "text", "text": INSIGHT_GENERATION_GUIDE, "cache_control": {"type": "ephemeral"}},
+]
+
+# Structured output: Claude is forced to answer through this tool, so the
+# insight arrives as an already-parsed object matching the schema instead of
+# free text that has to be scraped for JSON. Tools sit ahead of the system
+# blocks in the cached prefix, so they are cached with it.
+INSIGHT_TOOL_NAME = "record_insight"
+INSIGHT_TOOLS = [
+    {
+        "name": INSIGHT_TOOL_NAME,
+        "description": "Record the one tactical insight for the streamer.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "emotionalLabel": {"type": "string", "description": "What is happening, 3 words max"},
+                "nextMove": {"type": "string", "description": "What to do in the next 30 seconds, 8 words max"},
+            },
+            "required": ["emotionalLabel", "nextMove"],
+            "additionalProperties": False,
+        },
+    }
+]
+INSIGHT_TOOL_CHOICE = {"type": "tool", "name": INSIGHT_TOOL_NAME}
+
+
+# ==================== PER-REQUEST CONTEXT ====================
+# The user message is bounded by an input-token budget so a client sending a
+# huge transcript or chat dump can't inflate latency: lists are capped and
+# deduped, the transcript keeps its most recent words, and optional sections
+# are dropped in DROP_ORDER until the rest fits.
+
+DEFAULT_INPUT_TOKEN_BUDGET = 600
+# Never trim the transcript below this unless it is already shorter
+MIN_TRANSCRIPT_TOKENS = 40
+BYTES_PER_TOKEN = 4
+MAX_HISTORY = 8
+MAX_RECENT_COMMENTS = 3
+MAX_COMMENT_CHARS = 160
+MAX_CHAT_KEYWORDS = 8
+MAX_INSIGHT_CHARS = 80
+
+# Optional sections, least useful first
+DROP_ORDER = ('quality', 'winning_topics', 'language', 'burst', 'keywords', 'chat', 'history', 'prosody', 'recent_insights')
+
+
+class InsightPrompt(NamedTuple):
+    text: str
+    tokens: int
+    budget: int
+    transcript_words_dropped: int
+    dropped_sections: Tuple[str, ...]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~4 UTF-8 bytes per token (over-counts emoji/CJK rather than under)."""
+    return -(-len(text.encode('utf-8')) // BYTES_PER_TOKEN)
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+
+def _dedupe_history(history) -> List[str]:
+    """Collapse back-to-back repeats (clients resend overlapping windows) and keep the latest MAX_HISTORY"""
+    items: List[str] = []
+    for h in history:
+        item = f"{h.delta:+d} ({h.emotion or 'unknown'})"
+        if not items or items[-1] != item:
+            items.append(item)
+    return items[-MAX_HISTORY:]
+
+
+def _tail_words(text: str, max_tokens: int) -> Tuple[str, int]:
+    """The most recent words of `text` that fit in `max_tokens`, and how many were dropped."""
+    words = text.split()
+    allowance = max_tokens * BYTES_PER_TOKEN - 2  # room for the leading ellipsis
+    kept = 0
+    for word in reversed(words):
+        allowance -= len(word.encode('utf-8')) + 1
+        if allowance < 0:
+            break
+        kept += 1
+    dropped = len(words) - kept
+    if dropped == 0:
+        return text, 0
+    return '…' + ' '.join(words[dropped:]), dropped
+
+
+def _sections(request) -> Dict[str, str]:
+    """Every optional section of the context, rendered and already length-capped."""
+    sections: Dict[str, str] = {}
+
+    prosody_str = "No prosody data"
+    if request.prosody:
+        prosody_str = f"Top emotion: {request.prosody.topEmotion or 'unknown'} ({request.prosody.topScore or 0}%), Energy: {request.prosody.energy or 0}%, Excitement: {request.prosody.excitement or 0}%, Confidence: {request.prosody.confidence or 0}%"
+    sections['prosody'] = f"VOICE ANALYSIS: {prosody_str}"
+
+    burst_str = f"Burst detected: {request.burst.type}" if request.burst and request.burst.detected else "No burst activity"
+    sections['burst'] = f"ENERGY SIGNALS: {burst_str}"
+    language_str = f"Language emotion: {request.language.emotion}" if request.language and request.language.emotion else "No language emotion"
+    sections['language'] = f"WORD EMOTION: {language_str}"
+
+    history_str = "No recent history"
+    if request.recentHistory:
+        history_str = f"Recent pattern: {', '.join(_dedupe_history(request.recentHistory))}"
+    sections['history'] = f"RECENT PATTERN: {history_str}"
+
+    keywords_str = "No keywords detected"
+    if request.keywordsSaid:
+        keywords_str = f"Detected topics: {', '.join(request.keywordsSaid[:5])}"
+    sections['keywords'] = keywords_str
+
+    recent_insights_str = "No recent insights (first insight of session)"
+    if request.recentInsights:
+        recent_insights_str = f"🚫 DON'T REPEAT THESE: {', '.join(_clip(i, MAX_INSIGHT_CHARS) for i in request.recentInsights[-3:])}"
+    sections['recent_insights'] = recent_insights_str
+
+    winning_topics_str = "No winning patterns yet"
+    if request.winningTopics:
+        winning_topics_str = f"✅ What worked before: {', '.join(request.winningTopics[:3])}"
+    sections['winning_topics'] = winning_topics_str
+
+    if request.transcriptQuality:
+        quality_indicator = f"Transcript quality: {request.transcriptQuality}"
+        if request.uniqueWordRatio:
+            quality_indicator += f" (word variety: {request.uniqueWordRatio:.0%})"
+        sections['quality'] = quality_indicator
+
+    if request.chatData:
+        chat_context_str = "💬 LIVE CHAT CONTEXT:\n"
+        chat_context_str += f"- Comments: {request.chatData.commentCount} in last 30s\n"
+        chat_context_str += f"- Chat rate: {request.chatData.chatRate}/min\n"
+
+        if request.chatData.topKeywords:
+            chat_context_str += f"- Top chat keywords: {', '.join(request.chatData.topKeywords[:MAX_CHAT_KEYWORDS])}\n"
+
+        if request.chatData.recentComments:
+            chat_context_str += "- Recent comments:\n"
+            for comment in request.chatData.recentComments[-MAX_RECENT_COMMENTS:]:
+                chat_context_str += f"  • {_clip(comment, MAX_COMMENT_CHARS)}\n"
+            chat_context_str += "\n💡 Use chat context: Reference specific viewer questions, respond to comments, or acknowledge engagement"
+        sections['chat'] = chat_context_str.rstrip()
+
+    return sections
+
+
+def _render(request, transcript: str, sections: Dict[str, str]) -> str:
+    parts = [
+        "LIVE STREAM DATA:",
+        f'WHAT THEY SAID (exact words): "{transcript}"',
+        sections.get('keywords'),
+        f"VIEWER IMPACT: {request.viewerDelta:+d} viewers ({request.prevCount} → {request.viewerCount})",
+        sections.get('prosody'),
+        sections.get('burst'),
+        sections.get('language'),
+        f"TOPIC: {request.topic or 'general'}",
+        sections.get('history'),
+        f"SIGNAL STRENGTH: {request.quality or 'medium'}",
+        sections.get('quality'),
+        sections.get('chat'),
+    ]
+    variety = [sections.get('recent_insights'), sections.get('winning_topics')]
+    variety = [line for line in variety if line]
+    if variety:
+        parts.append("---\n🎯 CONTEXT FOR VARIETY:\n" + "\n".join(variety))
+    return "\n\n".join(part for part in parts if part)
+
+
+def build_insight_prompt(request, budget_tokens: int = DEFAULT_INPUT_TOKEN_BUDGET) -> InsightPrompt:
+    """Render the dynamic, per-request part of the prompt (the user message) within `budget_tokens`."""
+    sections = _sections(request)
+    transcript = ' '.join(request.transcript.split())
+    wanted = min(estimate_tokens(transcript), MIN_TRANSCRIPT_TOKENS)
+
+    dropped: List[str] = []
+    fixed = estimate_tokens(_render(request, '', sections))
+    for name in DROP_ORDER:
+        if fixed + wanted <= budget_tokens:
+            break
+        if sections.pop(name, None) is not None:
+            dropped.append(name)
+            fixed = estimate_tokens(_render(request, '', sections))
+
+    transcript, words_dropped = _tail_words(transcript, max(budget_tokens - fixed, MIN_TRANSCRIPT_TOKENS))
+    text = _render(request, transcript, sections)
+    return InsightPrompt(text, estimate_tokens(text), budget_tokens, words_dropped, tuple(dropped))
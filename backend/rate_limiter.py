@@ -0,0 +1,221 @@
+"""
+Client-side admission control for Claude calls.
+
+A token bucket caps the request rate and an AIMD limiter caps concurrency:
+the limit grows additively while calls finish under the latency target and
+shrinks multiplicatively on 429s or slow calls. When the budget is exhausted,
+urgent work (dump, spike) waits in a priority queue for a short time while
+low-priority work (drop, flatline) is rejected immediately, so callers can
+serve the deterministic fallback instead of waiting for a call that would fail.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional, Tuple
+
+from metrics import REGISTRY
+
+# Lower value = served first
+PRIORITIES = {'dump': 0, 'spike': 1, 'drop': 2, 'flatline': 3}
+PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+LIMITER_DECISIONS = REGISTRY.counter(
+    'spikely_claude_admission_total',
+    'Claude admission decisions by priority (admitted, queued, rejected)',
+    ('priority', 'decision'),
+)
+LIMITER_CONCURRENCY = REGISTRY.gauge(
+    'spikely_claude_concurrency_limit',
+    'Current adaptive concurrency limit for Claude calls',
+)
+LIMITER_IN_FLIGHT = REGISTRY.gauge(
+    'spikely_claude_in_flight',
+    'Claude calls currently admitted',
+)
+LIMITER_QUEUED = REGISTRY.gauge(
+    'spikely_claude_queued',
+    'Claude calls waiting for admission',
+)
+
+
+class BudgetExhausted(Exception):
+    """No rate/concurrency budget for this call; the caller should fall back."""
+
+    def __init__(self, priority: int):
+        super().__init__(f"Claude rate limit budget exhausted for {PRIORITY_NAMES.get(priority, priority)} request")
+        self.priority = priority
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> bool:
+        self._refill()
+        return self._tokens >= 1
+
+    def take(self) -> None:
+        self._refill()
+        self._tokens -= 1
+
+    def wait_time(self) -> float:
+        """Seconds until the next whole token."""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate) if self.rate > 0 else float('inf')
+
+
+class AIMDConcurrency:
+    """Additive-increase / multiplicative-decrease concurrency limit."""
+
+    def __init__(self, initial: float, minimum: float, maximum: float,
+                 target_latency_s: float, backoff: float = 0.5, slow_backoff: float = 0.9):
+        self.limit = float(initial)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.target_latency_s = target_latency_s
+        self.backoff = backoff
+        self.slow_backoff = slow_backoff
+
+    def on_success(self, latency_s: float) -> None:
+        if latency_s <= self.target_latency_s:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        else:
+            self.limit = max(self.minimum, self.limit * self.slow_backoff)
+
+    def on_throttle(self) -> None:
+        self.limit = max(self.minimum, self.limit * self.backoff)
+
+
+class PriorityLimiter:
+    """Admits calls by priority under a token bucket and an AIMD concurrency limit."""
+
+    def __init__(self, bucket: TokenBucket, concurrency: AIMDConcurrency, max_wait_s: float,
+                 max_queued_priority: int = PRIORITIES['spike'],
+                 is_throttle: Callable[[BaseException], bool] = lambda e: False,
+                 clock: Callable[[], float] = time.monotonic):
+        self.bucket = bucket
+        self.concurrency = concurrency
+        self.max_wait_s = max_wait_s
+        self.max_queued_priority = max_queued_priority
+        self.is_throttle = is_throttle
+        self._clock = clock
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        LIMITER_CONCURRENCY.set_function(lambda: self.concurrency.limit)
+        LIMITER_IN_FLIGHT.set_function(lambda: self.in_flight)
+        LIMITER_QUEUED.set_function(lambda: len(self._waiters))
+
+    def _can_admit(self) -> bool:
+        return self.in_flight < int(self.concurrency.limit) and self.bucket.available()
+
+    def _admit(self) -> None:
+        self.bucket.take()
+        self.in_flight += 1
+
+    async def acquire(self, priority: int) -> None:
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        if not self._waiters and self._can_admit():
+            self._admit()
+            LIMITER_DECISIONS.inc(priority=name, decision='admitted')
+            return
+        if priority > self.max_queued_priority:
+            LIMITER_DECISIONS.inc(priority=name, decision='rejected')
+            raise BudgetExhausted(priority)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        LIMITER_DECISIONS.inc(priority=name, decision='queued')
+        self._schedule_refill()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait_s)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                return  # admitted right at the deadline
+            future.cancel()
+            self._forget(future)
+            LIMITER_DECISIONS.inc(priority=name, decision='rejected')
+            raise BudgetExhausted(priority)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release_slot()  # admitted, but the caller went away
+            else:
+                future.cancel()
+                self._forget(future)
+            raise
+
+    def release(self, latency_s: Optional[float] = None, throttled: bool = False) -> None:
+        if throttled:
+            self.concurrency.on_throttle()
+        elif latency_s is not None:
+            self.concurrency.on_success(latency_s)
+        self._release_slot()
+
+    @asynccontextmanager
+    async def admit(self, priority: int):
+        """Hold a Claude slot for the duration of the block and feed its outcome to AIMD."""
+        await self.acquire(priority)
+        started = self._clock()
+        try:
+            yield
+        except Exception as e:
+            self.release(throttled=self.is_throttle(e))
+            raise
+        except BaseException:
+            self.release()
+            raise
+        else:
+            self.release(latency_s=self._clock() - started)
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _forget(self, future: asyncio.Future) -> None:
+        """Drop a waiter that gave up, so it no longer blocks fast-path admission."""
+        self._waiters = [waiter for waiter in self._waiters if waiter[2] is not future]
+        heapq.heapify(self._waiters)
+        if not self._waiters and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _dispatch(self) -> None:
+        while self._waiters:
+            _, _, future = self._waiters[0]
+            if future.done():  # timed out or cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_admit():
+                break
+            heapq.heappop(self._waiters)
+            self._admit()
+            future.set_result(None)
+        self._schedule_refill()
+
+    def _schedule_refill(self) -> None:
+        """Wake the queue when the bucket refills if it is only blocked on tokens."""
+        if self._timer is not None or not self._waiters:
+            return
+        if self.in_flight >= int(self.concurrency.limit):
+            return  # a release will dispatch
+        delay = self.bucket.wait_time()
+
+        def fire():
+            self._timer = None
+            self._dispatch()
+
+        self._timer = asyncio.get_running_loop().call_later(delay, fire)
@@ -0,0 +1,167 @@
+"""
+Incremental transcript segmenter (Python port of frontend/src/services/segmenter.ts).
+
+The frontend re-segments the last 50 lines from scratch every 10 lines. Here
+each line updates the open segment in O(1): word counts are kept running and
+the de-stutter cleanup runs once, when a segment closes (large gap, MAX_WORDS
+reached or sentence end). Raw lines live in a fixed-capacity ring buffer and
+closed segments in a bounded ring indexed by end time, so "most recent segment
+within the window" is a binary search.
+"""
+import re
+from bisect import bisect_right
+from typing import Generic, List, NamedTuple, Optional, TypeVar
+
+T = TypeVar('T')
+
+MIN_CONF = 0.3
+MIN_WORDS = 5
+MAX_WORDS = 30
+MAX_GAP_S = 1.5
+
+_STUTTER_RE = re.compile(r'\b(\w+)(?:,?\s+\1\b)+', re.IGNORECASE)
+_WORD_CHAR_RE = re.compile(r'\w')
+_SENTENCE_END_RE = re.compile(r'[.!?]$')
+
+
+def clean_transcript(text: str) -> str:
+    """De-stutter ("I I I" → "I") and collapse whitespace."""
+    return ' '.join(_STUTTER_RE.sub(r'\1', text).split())
+
+
+class Line(NamedTuple):
+    t: float
+    text: str
+    conf: Optional[float] = None
+
+
+class Segment(NamedTuple):
+    start: float
+    end: float
+    text: str
+    words: int
+
+
+class RingBuffer(Generic[T]):
+    """Fixed-capacity FIFO with O(1) append and O(1) random access."""
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._items: List[Optional[T]] = [None] * capacity
+        self._head = 0  # index of the oldest item
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> T:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        return self._items[(self._head + index) % self.capacity]
+
+    def append(self, item: T) -> None:
+        tail = (self._head + self._size) % self.capacity
+        self._items[tail] = item
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._head = (self._head + 1) % self.capacity
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self[i]
+
+
+class _EndTimes:
+    """Sequence view of segment end times, for bisect."""
+
+    def __init__(self, segments: RingBuffer[Segment]):
+        self._segments = segments
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def __getitem__(self, index: int) -> float:
+        return self._segments[index].end
+
+
+class TranscriptSegmenter:
+    """Turns a stream of transcript lines into closed, cleaned segments."""
+
+    def __init__(self, line_capacity: int = 500, segment_capacity: int = 200,
+                 min_words: int = MIN_WORDS, max_words: int = MAX_WORDS,
+                 max_gap_s: float = MAX_GAP_S, min_conf: float = MIN_CONF):
+        self.lines: RingBuffer[Line] = RingBuffer(line_capacity)
+        self.segments: RingBuffer[Segment] = RingBuffer(segment_capacity)
+        self._ends = _EndTimes(self.segments)
+        self.min_words = min_words
+        self.max_words = max_words
+        self.max_gap_s = max_gap_s
+        self.min_conf = min_conf
+        self._open_parts: List[str] = []
+        self._open_words = 0
+        self._open_start = 0.0
+        self._open_end = 0.0
+
+    def push(self, t: float, text: str, conf: Optional[float] = None) -> Optional[Segment]:
+        """Add one line; return the most recent segment it closed, if any."""
+        # Drop noise: low confidence or no word characters
+        if (conf is not None and conf < self.min_conf) or not _WORD_CHAR_RE.search(text):
+            return None
+        text = text.strip()
+        self.lines.append(Line(t, text, conf))
+
+        closed = None
+        if self._open_parts and t - self._open_end > self.max_gap_s:
+            closed = self._close()
+
+        if not self._open_parts:
+            self._open_start = t
+        self._open_end = t
+        self._open_parts.append(text)
+        self._open_words += len(text.split())
+
+        if self._open_words >= self.max_words or _SENTENCE_END_RE.search(text):
+            closed = self._close() or closed
+        return closed
+
+    def flush(self) -> Optional[Segment]:
+        """Close the open segment (end of stream)."""
+        return self._close() if self._open_parts else None
+
+    def open_segment(self) -> Optional[Segment]:
+        """The segment being built, if it already has enough words."""
+        if self._open_words < self.min_words:
+            return None
+        text = clean_transcript(' '.join(self._open_parts))
+        return Segment(self._open_start, self._open_end, text, len(text.split()))
+
+    def segment_before(self, t: float, window_s: float) -> Optional[Segment]:
+        """Most recent closed segment ending in (t - window_s, t]."""
+        index = bisect_right(self._ends, t) - 1
+        if index < 0:
+            return None
+        segment = self.segments[index]
+        return segment if segment.end > t - window_s else None
+
+    def latest(self, now: float, window_s: float) -> Optional[Segment]:
+        """Most recent segment within the window, including the open one."""
+        current = self.open_segment()
+        if current is not None and now - window_s < current.end <= now:
+            return current
+        return self.segment_before(now, window_s)
+
+    def _close(self) -> Optional[Segment]:
+        text = clean_transcript(' '.join(self._open_parts))
+        words = len(text.split())
+        segment = None
+        if words >= self.min_words:
+            segment = Segment(self._open_start, self._open_end, text, words)
+            self.segments.append(segment)
+        self._open_parts = []
+        self._open_words = 0
+        return segment
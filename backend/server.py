@@ -1,23 +1,101 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 import uuid
 from datetime import datetime
-from anthropic import AsyncAnthropic
+from contextlib import asynccontextmanager
+from anthropic import NotFoundError, RateLimitError
+import asyncio
+import base64
+import hashlib
 import json
-import re
 import time
-import httpx  # For Hume AI HTTP requests
+
+from dedupe_index import SessionDedupeIndex
+from emotion_lexicon import LexiconEmotionClassifier
+from fast_json import FastJSONResponse
+from fallback_rules import choose_fallback, history_pattern
+from hume_client import HUME_LATENCY, HumeBatcher, text_key
+from insight_stream import INSIGHT_FIELDS, IncrementalInsightParser, extract_insight_fields, sse_event
+from metrics import REGISTRY
+from model_router import DEFAULT_RULES, ModelRouter, ModelTier, parse_rules
+from prompts import (
+    DEFAULT_INPUT_TOKEN_BUDGET, INSIGHT_SYSTEM_BLOCKS, INSIGHT_TOOL_CHOICE, INSIGHT_TOOL_NAME, INSIGHT_TOOLS,
+    build_insight_prompt,
+)
+from rate_limiter import AIMDConcurrency, BudgetExhausted, PRIORITIES, PriorityLimiter, TokenBucket
+from segmenter import clean_transcript
+from session_engine import SessionCorrelator
+from single_flight import InsightCancelled, SingleFlight
+from speculation import SpeculativeInsights
+from timeline import RESOLUTIONS, TimelineRollups
+from topic_classifier import GENERAL, TopicClassifier
+from traffic_recorder import RecorderMiddleware, TrafficRecorder, sanitize
+from ttl_cache import TTLCache
+from upstream import UpstreamClients
+from write_behind import WriteBehindQueue
 
 # Global correlation counter for unique IDs
 correlation_counter = 0
 
+INSIGHT_MODEL = "claude-sonnet-4-20250514"
+# Small, fast tier for low-stakes moments (see INSIGHT_MODEL_ROUTES)
+INSIGHT_MODEL_FAST = os.getenv('INSIGHT_MODEL_FAST', 'claude-3-5-haiku-20241022')
+INSIGHT_MAX_TOKENS = 150
+# Cap on the per-request user message; transcript and optional context are trimmed to fit
+INSIGHT_INPUT_TOKEN_BUDGET = int(os.getenv('INSIGHT_INPUT_TOKEN_BUDGET', str(DEFAULT_INPUT_TOKEN_BUDGET)))
+# Viewer drops this large are dumps (matches the DUMP section of the system prompt)
+DUMP_DELTA = -20
+
+CLAUDE_INPUT_TOKENS = REGISTRY.counter(
+    'spikely_claude_input_tokens_total',
+    'Claude input tokens by prompt-cache status',
+    ('kind',),
+)
+CLAUDE_OUTPUT_TOKENS = REGISTRY.counter(
+    'spikely_claude_output_tokens_total',
+    'Claude output tokens',
+)
+INSIGHT_STAGE_SECONDS = REGISTRY.histogram(
+    'spikely_insight_stage_seconds',
+    'Insight pipeline latency by stage (validation, prompt_build, claude_ttft, claude_total, json_parse, postprocess_*)',
+    ('stage',),
+)
+INSIGHT_PROMPT_TOKENS = REGISTRY.histogram(
+    'spikely_insight_prompt_tokens',
+    'Estimated user-message tokens per insight prompt after budgeting',
+    buckets=(50, 100, 200, 300, 400, 600, 800, 1200, 1600, 2400),
+)
+INSIGHT_PROMPT_TRIMS = REGISTRY.counter(
+    'spikely_insight_prompt_trims_total',
+    'Insight prompts cut to fit the token budget, by what was cut (transcript or a section name)',
+    ('part',),
+)
+INSIGHT_PARSES = REGISTRY.counter(
+    'spikely_insight_parse_total',
+    'Claude insight extraction by path (tool, text) and outcome (ok, repaired, failed); failed means a full fallback',
+    ('path', 'outcome'),
+)
+INSIGHT_RESPONSES = REGISTRY.counter(
+    'spikely_insight_responses_total',
+    'Insights returned by source (claude, fallback, fallback_rate_limited, ...)',
+    ('source',),
+)
+
+def _observe_stage(stage: str, since: float) -> float:
+    """Record time since `since` for a pipeline stage; returns now for the next stage"""
+    now = time.perf_counter()
+    INSIGHT_STAGE_SECONDS.observe(now - since, stage=stage)
+    return now
+
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -27,8 +105,98 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Pooled Claude/Hume clients, opened and closed with the app lifespan
+upstream = UpstreamClients()
+
+# Insight request/response pairs, written behind the request path with insert_many
+INSIGHT_PERSIST = os.getenv('INSIGHT_PERSIST', 'true').lower() in ('1', 'true', 'yes', 'on')
+insight_writes = WriteBehindQueue(
+    'insights',
+    db.insights,
+    max_batch=int(os.getenv('MONGO_WRITE_BATCH', '100')),
+    flush_interval_s=float(os.getenv('MONGO_FLUSH_INTERVAL_MS', '1000')) / 1000,
+    max_queue=int(os.getenv('MONGO_QUEUE_MAX', '10000')),
+)
+
+# Raw viewer/insight events plus 10s/1m/5m rollups for the session recap
+timeline_events = WriteBehindQueue(
+    'timeline_events',
+    db.timeline_events,
+    max_batch=int(os.getenv('MONGO_WRITE_BATCH', '100')),
+    flush_interval_s=float(os.getenv('MONGO_FLUSH_INTERVAL_MS', '1000')) / 1000,
+    max_queue=int(os.getenv('MONGO_QUEUE_MAX', '10000')),
+)
+timeline_rollups = TimelineRollups(
+    db.timeline_rollups,
+    flush_interval_s=float(os.getenv('TIMELINE_FLUSH_INTERVAL_MS', '2000')) / 1000,
+)
+# Sessions streaming viewer samples over /api/ws/session
+socket_sessions: set = set()
+
+def record_viewer_sample(session_id: str, delta: int, viewer_count: int) -> None:
+    timeline_rollups.record_viewers(session_id, delta)
+    timeline_events.put({
+        "session_id": session_id, "ts": datetime.utcnow(), "kind": "viewers",
+        "delta": delta, "viewerCount": viewer_count,
+    })
+
+# Opt-in capture of real insight traffic for benchmarks/replay.py
+INSIGHT_RECORD_PATH = os.getenv('INSIGHT_RECORD_PATH', '')
+INSIGHT_RECORD_PATHS = ("/api/generate-insight", "/api/generate-insight/stream")
+# Keeps pseudonymized sessionIds stable across restarts when set; random otherwise
+INSIGHT_RECORD_SALT = os.getenv('INSIGHT_RECORD_SALT') or uuid.uuid4().hex
+
+def sanitize_recorded_insight(raw: bytes) -> Optional[Dict[str, Any]]:
+    """Valid InsightRequest bodies only, minus unknown keys, PII and real session ids"""
+    try:
+        request = InsightRequest.model_validate_json(raw)
+    except ValidationError:
+        return None
+    return sanitize(request.model_dump(exclude_none=True), INSIGHT_RECORD_SALT)
+
+insight_recorder = TrafficRecorder(INSIGHT_RECORD_PATH, sanitize_recorded_insight) if INSIGHT_RECORD_PATH else None
+
+async def ensure_indexes():
+    """Create the insight, status and timeline indexes; runs in the background so a slow Mongo can't block startup"""
+    try:
+        await db.insights.create_index([("session_id", 1), ("ts", 1)])
+        await db.insights.create_index("correlationId")
+        await db.status_checks.create_index(STATUS_SORT)
+        await db.timeline_events.create_index([("session_id", 1), ("ts", 1)])
+        await db.timeline_rollups.create_index([("session_id", 1), ("resolution", 1), ("bucket", 1)], unique=True)
+        logger.info("✅ Mongo indexes ready")
+    except Exception as e:
+        logger.error(f"❌ Mongo index creation failed: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await upstream.start()
+    insight_writes.start()
+    timeline_events.start()
+    timeline_rollups.start()
+    if insight_recorder is not None:
+        insight_recorder.start()
+    indexes = asyncio.create_task(ensure_indexes())
+    yield
+    indexes.cancel()
+    await insight_writes.aclose()
+    await timeline_events.aclose()
+    await timeline_rollups.aclose()
+    if insight_recorder is not None:
+        await insight_recorder.aclose()
+    await upstream.aclose()
+    client.close()
+
+# Opt-in fast serialization: responses rendered by pydantic-core/orjson, hot endpoints skip the response_model pass
+FAST_JSON = os.getenv('FAST_JSON', '0') == '1'
+JSON_RESPONSE = FastJSONResponse if FAST_JSON else JSONResponse
+
+def model_response(model: BaseModel):
+    """Return value for hot endpoints: with FAST_JSON the model is rendered once, as-is"""
+    return FastJSONResponse(model) if FAST_JSON else model
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=JSON_RESPONSE)
 
 # ==================== CORS CONFIGURATION ====================
 # CRITICAL: Must be configured BEFORE including routers
@@ -38,9 +206,13 @@ app.add_middleware(
     allow_origins=["*"],  # Allow all origins including Chrome extensions
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # /api/status paging; unreadable from browsers otherwise
 )
 # ===========================================================
 
+if insight_recorder is not None:
+    app.add_middleware(RecorderMiddleware, recorder=insight_recorder, paths=INSIGHT_RECORD_PATHS)
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -61,15 +233,76 @@ async def root():
 
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
-    status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
-    return status_obj
+    status_obj = StatusCheck(client_name=input.client_name)
+    _ = await db.status_checks.insert_one(status_obj.model_dump())
+    return model_response(status_obj)
+
+# Same as the old unpaginated to_list(1000), so clients that never page see no change
+STATUS_PAGE_DEFAULT = 1000
+STATUS_PAGE_MAX = 1000
+# Only the StatusCheck fields; Mongo's _id never leaves the database
+STATUS_PROJECTION = {"_id": 0, "id": 1, "client_name": 1, "timestamp": 1}
+STATUS_SORT = [("timestamp", -1), ("id", -1)]
+
+def _encode_status_cursor(doc: Dict[str, Any]) -> str:
+    raw = f"{doc['timestamp'].isoformat()}|{doc['id']}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def _status_filter(after: Optional[str]) -> Dict[str, Any]:
+    """Keyset condition: strictly older than the (timestamp, id) in the cursor"""
+    if not after:
+        return {}
+    try:
+        timestamp, status_id = base64.urlsafe_b64decode(after.encode('ascii')).decode('utf-8').split('|', 1)
+        timestamp = datetime.fromisoformat(timestamp)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "id": {"$lt": status_id}},
+    ]}
+
+def _status_row(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": doc["id"], "client_name": doc["client_name"], "timestamp": doc["timestamp"].isoformat()}
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(
+    raw_request: Request,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    format: Optional[str] = None,
+):
+    """
+    Status checks, newest first. Pages are keyed on (timestamp, id): pass the
+    X-Next-Cursor header of one page as `after` to get the next. With
+    `format=ndjson` (or Accept: application/x-ndjson) rows are streamed as the
+    cursor yields them, and `limit` is optional.
+    """
+    ndjson = format == "ndjson" or "application/x-ndjson" in raw_request.headers.get("accept", "")
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=422, detail="limit must be positive")
+    query = db.status_checks.find(_status_filter(after), STATUS_PROJECTION).sort(STATUS_SORT)
+
+    if ndjson:
+        if limit is not None:
+            query = query.limit(limit)
+
+        async def rows():
+            async for doc in query.batch_size(STATUS_PAGE_DEFAULT):
+                yield json.dumps(_status_row(doc)) + "\n"
+
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    limit = min(limit or STATUS_PAGE_DEFAULT, STATUS_PAGE_MAX)
+    docs = await query.limit(limit).to_list(limit)
+    headers = {"X-Next-Cursor": _encode_status_cursor(docs[-1])} if len(docs) == limit else {}
+    # Rows come back in StatusCheck shape already; skip re-validating each one
+    return JSON_RESPONSE([_status_row(doc) for doc in docs], headers=headers)
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of in-process metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 # ==================== CORRELATION ENGINE - INSIGHT GENERATION ====================
 
@@ -116,495 +349,1143 @@ class InsightRequest(BaseModel):
     uniqueWordRatio: Optional[float] = None
     # Chat stream data
     chatData: Optional[ChatData] = None
+    # Skip the insight cache and always ask Claude
+    bypassCache: Optional[bool] = False
+    # Stream/session identifier; one Claude call in flight per session
+    sessionId: Optional[str] = None
+    # Latency budget; past it the fallback is returned and Claude's answer arrives later
+    deadlineMs: Optional[int] = None
 
 class InsightResponse(BaseModel):
     emotionalLabel: str
     nextMove: str
     source: str = "claude"
     correlationId: Optional[str] = None
+    cached: bool = False
+    # Claude is still working; fetch /api/insights/{correlationId} (or wait for the socket push)
+    upgradePending: bool = False
+    # Claude model that wrote the insight (None for fallbacks)
+    model: Optional[str] = None
+    # Pre-generated for this segment before the viewer delta arrived
+    speculative: bool = False
+
+# Single-pass topic/keyword classifier for transcripts the client didn't label
+topic_classifier = TopicClassifier()
+
+def delta_category(delta: int) -> str:
+    """Bucket a viewer delta into spike/drop/dump/flatline (same cut-offs as the fallback)"""
+    if delta > 0:
+        return 'spike'
+    if delta <= DUMP_DELTA:
+        return 'dump'
+    if delta < 0:
+        return 'drop'
+    return 'flatline'
+
+def prepare_insight_request(request: InsightRequest) -> InsightRequest:
+    """De-stutter the transcript (as session segments are) and fill in topic/keywords the client left out"""
+    update: Dict[str, Any] = {"transcript": clean_transcript(request.transcript)}
+    needs_topic = not request.topic or request.topic == GENERAL
+    if needs_topic or not request.keywordsSaid:
+        match = topic_classifier.classify(update["transcript"])
+        if needs_topic:
+            update["topic"] = match.topic
+        if not request.keywordsSaid and match.keywords:
+            update["keywordsSaid"] = match.keywords
+    return request.model_copy(update=update)
+
+def _normalize_text(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+def insight_fingerprint(request: InsightRequest) -> str:
+    """Cache key for requests that would produce the same insight"""
+    parts = [
+        _normalize_text(request.transcript),
+        (request.topic or 'general').lower(),
+        delta_category(request.viewerDelta),
+        '|'.join(_normalize_text(r) for r in (request.recentInsights or [])[-3:]),
+    ]
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+# Recently generated Claude insights, keyed by request fingerprint
+insight_cache: TTLCache[InsightResponse] = TTLCache(
+    'insight',
+    maxsize=int(os.getenv('INSIGHT_CACHE_SIZE', '512')),
+    ttl=float(os.getenv('INSIGHT_CACHE_TTL_S', '30')),
+)
+
+# At most one Claude call in flight per session
+insight_flights = SingleFlight()
+
+def insight_priority(request: InsightRequest) -> int:
+    """Claude admission priority: dump, then spike, then drop, then flatline"""
+    return PRIORITIES[delta_category(request.viewerDelta)]
+
+# Client-side rate/concurrency budget in front of every live Claude call.
+# The bucket is derived from the account's Claude requests-per-minute quota:
+#   CLAUDE_RPM_LIMIT     upstream RPM quota for the key (default 1000, API tier 2)
+#   CLAUDE_RPM_HEADROOM  fraction of the quota this process may use (default 0.9;
+#                        lower it when several workers share one key)
+#   CLAUDE_RATE_PER_S    override the derived rate (default RPM x headroom / 60, 15/s)
+#   CLAUDE_RATE_BURST    bucket size (default 2 seconds of rate, 30)
+CLAUDE_RPM_LIMIT = float(os.getenv('CLAUDE_RPM_LIMIT', '1000'))
+CLAUDE_RPM_HEADROOM = float(os.getenv('CLAUDE_RPM_HEADROOM', '0.9'))
+CLAUDE_RATE_PER_S = float(os.getenv('CLAUDE_RATE_PER_S', str(CLAUDE_RPM_LIMIT * CLAUDE_RPM_HEADROOM / 60)))
+CLAUDE_RATE_BURST = float(os.getenv('CLAUDE_RATE_BURST', str(CLAUDE_RATE_PER_S * 2)))
+
+claude_limiter = PriorityLimiter(
+    TokenBucket(rate=CLAUDE_RATE_PER_S, burst=CLAUDE_RATE_BURST),
+    AIMDConcurrency(
+        initial=float(os.getenv('CLAUDE_CONCURRENCY_INITIAL', '8')),
+        minimum=float(os.getenv('CLAUDE_CONCURRENCY_MIN', '2')),
+        maximum=float(os.getenv('CLAUDE_CONCURRENCY_MAX', '32')),
+        target_latency_s=float(os.getenv('CLAUDE_TARGET_LATENCY_S', '3.0')),
+    ),
+    max_wait_s=float(os.getenv('CLAUDE_QUEUE_MAX_WAIT_S', '1.5')),
+    is_throttle=lambda e: _is_rate_limit_error(e),
+)
 
-@api_router.post("/generate-insight", response_model=InsightResponse)
-async def generate_insight(request: InsightRequest):
+# Model tier per delta category, stepped down to a faster tier when the chosen
+# model's recent p90 latency exceeds the request deadline or INSIGHT_SLO_MS
+model_router = ModelRouter(
+    [
+        ModelTier('fast', INSIGHT_MODEL_FAST, INSIGHT_MAX_TOKENS),
+        ModelTier('large', INSIGHT_MODEL, INSIGHT_MAX_TOKENS),
+    ],
+    parse_rules(os.getenv('INSIGHT_MODEL_ROUTES', DEFAULT_RULES)),
+    default_tier='large',
+    slo_s=float(os.getenv('INSIGHT_SLO_MS', '2500')) / 1000 or None,
+    max_age_s=float(os.getenv('INSIGHT_LATENCY_MAX_AGE_S', '120')),
+    probe_every=int(os.getenv('INSIGHT_ROUTE_PROBE_EVERY', '20')),
+)
+
+def _next_correlation_id() -> str:
+    global correlation_counter
+    correlation_counter += 1
+    return f"{int(time.time() * 1000)}-{correlation_counter:04d}"
+
+def _record_usage(usage, correlation_id: str) -> None:
+    """Report prompt-cache effectiveness (cached vs. uncached input tokens)"""
+    cache_read_tokens = getattr(usage, 'cache_read_input_tokens', None) or 0
+    cache_write_tokens = getattr(usage, 'cache_creation_input_tokens', None) or 0
+    CLAUDE_INPUT_TOKENS.inc(cache_read_tokens, kind="cache_read")
+    CLAUDE_INPUT_TOKENS.inc(cache_write_tokens, kind="cache_write")
+    CLAUDE_INPUT_TOKENS.inc(usage.input_tokens, kind="uncached")
+    CLAUDE_OUTPUT_TOKENS.inc(usage.output_tokens)
+    logger.info(f"🧾 Tokens | CID: {correlation_id} | cached: {cache_read_tokens} | cache write: {cache_write_tokens} | uncached: {usage.input_tokens} | output: {usage.output_tokens}")
+
+def _extract_insight(request: InsightRequest, message: Any) -> Dict[str, Any]:
     """
-    Generate tactical live stream insights using Claude Sonnet 4.5
+    Insight fields from a Claude message. Fast path: the forced record_insight
+    tool call, whose input arrives already parsed. Otherwise the text blocks are
+    scraped for JSON. If only one field is usable the other comes from the
+    deterministic fallback, so a half-malformed answer doesn't cost the whole insight.
     """
+    path, fields = extract_insight_fields(message.content, INSIGHT_TOOL_NAME)
+    if path == 'text':
+        logger.info(f"⚠️ Claude answered without the insight tool | Fields: {', '.join(fields) or 'none'}")
+    if len(fields) == len(INSIGHT_FIELDS):
+        INSIGHT_PARSES.inc(path=path, outcome='ok')
+        return fields
+    if not fields:
+        INSIGHT_PARSES.inc(path=path, outcome='failed')
+        raise ValueError("Missing required fields in insight")
+    INSIGHT_PARSES.inc(path=path, outcome='repaired')
+    fallback = build_fallback_insight(request)
+    logger.warning(f"⚠️ Insight missing {', '.join(k for k in INSIGHT_FIELDS if k not in fields)} - filled from fallback")
+    return {
+        'emotionalLabel': fields.get('emotionalLabel', fallback.emotionalLabel),
+        'nextMove': fields.get('nextMove', fallback.nextMove),
+    }
+
+# Transcript shingles and issued insights per session, for bleed and repetition checks
+session_indexes: TTLCache[SessionDedupeIndex] = TTLCache(
+    'dedupe_index',
+    maxsize=int(os.getenv('DEDUPE_INDEX_SESSIONS', '1024')),
+    ttl=float(os.getenv('DEDUPE_INDEX_TTL_S', '3600')),
+)
+
+def session_dedupe_index(request: InsightRequest) -> SessionDedupeIndex:
+    """The session's index, or a throwaway one for requests without a sessionId"""
+    if not request.sessionId:
+        return SessionDedupeIndex()
+    index = session_indexes.get(request.sessionId)
+    if index is None:
+        index = SessionDedupeIndex()
+    # Re-set on every use so active sessions don't expire
+    session_indexes.set(request.sessionId, index)
+    return index
+
+def _postprocess_insight(request: InsightRequest, insight: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply word limits, transcript-bleed and repetition checks to a parsed insight"""
+    # ==================== DIAGNOSTIC MODE: VALIDATOR DISABLED ====================
+    # TEMPORARILY DISABLED to see Claude's raw output without modification
+    # This allows us to determine if Claude generates generic insights
+    # or if the validator is incorrectly rejecting/modifying good insights
+    
+    logger.info("🔬 DIAGNOSTIC MODE: Generic validator DISABLED - passing Claude output as-is")
+    
+    # REJECT GENERIC INSIGHTS - Force specificity (DISABLED FOR DIAGNOSTICS)
+    # next_move_lower = insight['nextMove'].lower()
+    # generic_phrases = [
+    #     'pivot to q&a',
+    #     'build excitement',
+    #     'keep energy',
+    #     'stay hyped',
+    #     'be engaging',
+    #     'do more',
+    #     'try something',
+    #     'switch topics',
+    #     'talk more',
+    #     'show more'
+    # ]
+    # 
+    # # Check if insight is too generic (contains generic phrase without specifics)
+    # is_generic = False
+    # for phrase in generic_phrases:
+    #     # If insight ONLY contains the generic phrase (not combined with specifics)
+    #     if phrase in next_move_lower and len(next_move_lower.split()) <= 4:
+    #         is_generic = True
+    #         logger.warning(f"⚠️ REJECTED generic insight: '{insight['nextMove']}' - too vague")
+    #         break
+    # 
+    # # If generic AND no nouns detected, force a more specific version
+    # if is_generic:
+    #     # Try to extract any noun from transcript to add specificity
+    #     transcript_words = request.transcript.lower().split()
+    #     # Simple noun extraction (words that might be specific topics)
+    #     potential_nouns = [w for w in transcript_words if len(w) > 4 and w not in ['about', 'their', 'really', 'think', 'going', 'doing', 'saying']]
+    #     if potential_nouns:
+    #         specific_noun = potential_nouns[0]
+    #         insight['nextMove'] = f"Talk about {specific_noun}. {insight['nextMove'].split('.')[-1].strip()}"
+    #         logger.info(f"✅ Added specificity: '{insight['nextMove']}'")
+    #     else:
+    #         # Last resort: Force a question format
+    #         insight['nextMove'] = "Ask viewers a question. Read answers"
+    #         logger.warning("⚠️ Forced question format due to lack of specifics")
+    
+    # ==================== END DIAGNOSTIC MODE SECTION ====================
+    
+    stage_started = time.perf_counter()
+    
+    # Enforce word limits
+    emotional_words = insight['emotionalLabel'].split()[:3]
+    insight['emotionalLabel'] = ' '.join(emotional_words)
+    
+    next_move_words = insight['nextMove'].split()[:12]  # Increased to allow for specificity
+    insight['nextMove'] = ' '.join(next_move_words)
+    stage_started = _observe_stage('postprocess_word_limits', stage_started)
+    
+    # Validate no transcript bleed - only check for consecutive multi-word matches,
+    # against every transcript segment seen in the session
+    index = session_dedupe_index(request)
+    index.add_transcript(request.transcript)
+    
+    # Check for 3+ consecutive word matches (actual bleed)
+    if index.bleeds(insight['emotionalLabel'], 3):
+        logger.warning("⚠️ Transcript bleed detected in emotionalLabel (3+ words), using fallback")
+        insight['emotionalLabel'] = "content spike" if request.viewerDelta > 0 else "content dip"
+    
+    if index.bleeds(insight['nextMove'], 4):
+        logger.warning("⚠️ Transcript bleed detected in nextMove (4+ words), using fallback")
+        insight['nextMove'] = "Keep this energy going" if request.viewerDelta > 0 else "Try something different"
+    
+    stage_started = _observe_stage('postprocess_bleed', stage_started)
+    
+    # Check for repetition (> 60% word overlap): exactly against recentInsights and the
+    # latest session insights, via the LSH index against the rest of the session
+    repeat = index.similar(insight['nextMove'], recent=request.recentInsights or ())
+    for recent in request.recentInsights or []:
+        index.add_insight(recent)
+    if repeat:
+        recent, overlap = repeat
+        logger.warning(f"⚠️ Repetition detected: '{insight['nextMove']}' too similar to '{recent}' ({overlap:.0%} match)")
+        # Force variation by prepending "Try: "
+        insight['nextMove'] = f"Try: {insight['nextMove']}"[:50]
+    index.add_insight(insight['nextMove'])
+    _observe_stage('postprocess_repetition', stage_started)
+    
+    return insight
+
+def insight_user_prompt(request: InsightRequest, correlation_id: str) -> str:
+    """Budgeted user message for Claude; logs what the budget cost"""
+    with INSIGHT_STAGE_SECONDS.time(stage='prompt_build'):
+        prompt = build_insight_prompt(request, INSIGHT_INPUT_TOKEN_BUDGET)
+    INSIGHT_PROMPT_TOKENS.observe(prompt.tokens)
+    if prompt.transcript_words_dropped:
+        INSIGHT_PROMPT_TRIMS.inc(part='transcript')
+    for section in prompt.dropped_sections:
+        INSIGHT_PROMPT_TRIMS.inc(part=section)
+    logger.info(
+        f"📏 Prompt budget | CID: {correlation_id} | Tokens: ~{prompt.tokens}/{prompt.budget}"
+        f" | Transcript words dropped: {prompt.transcript_words_dropped}"
+        f" | Sections dropped: {', '.join(prompt.dropped_sections) or 'none'}"
+    )
+    return prompt.text
+
+async def _claude_completion(request: InsightRequest, api_key: str, correlation_id: str,
+                             budget_s: Optional[float] = None,
+                             priority: Optional[int] = None) -> Tuple[Dict[str, Any], str]:
+    """One Claude call for `request`: the parsed (not yet post-processed) insight and the model that wrote it"""
+    # Static prompt is a cached system prefix; only this context is fresh input
+    user_prompt = insight_user_prompt(request, correlation_id)
+    tier, reason = model_router.route(delta_category(request.viewerDelta), budget_s)
+
+    # Call Claude API directly
+    logger.info(f"🤖 Calling Claude | Model: {tier.model} ({tier.name}, {reason}) | CID: {correlation_id}")
+    
+    claude = upstream.anthropic(api_key)
+    async with claude_limiter.admit(insight_priority(request) if priority is None else priority):
+        call_started = time.perf_counter()
+        response = await claude.messages.create(
+            model=tier.model,
+            max_tokens=tier.max_tokens,
+            system=INSIGHT_SYSTEM_BLOCKS,
+            tools=INSIGHT_TOOLS,
+            tool_choice=INSIGHT_TOOL_CHOICE,
+            messages=[
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+        model_router.observe(tier.model, _observe_stage('claude_total', call_started) - call_started)
+    
+    _record_usage(response.usage, correlation_id)
+    
+    with INSIGHT_STAGE_SECONDS.time(stage='json_parse'):
+        parsed = _extract_insight(request, response)
+    logger.info(f"✅ Claude raw insight: {parsed}")
+    return parsed, tier.model
+
+async def _claude_insight(request: InsightRequest, api_key: str, correlation_id: str,
+                          budget_s: Optional[float] = None) -> InsightResponse:
+    """Ask Claude for an insight and enforce the output constraints"""
+    parsed, model = await _claude_completion(request, api_key, correlation_id, budget_s)
+    insight = _postprocess_insight(request, parsed)
+    
+    logger.info(f"✅ Insight generated - Label: {insight['emotionalLabel']}, Move: {insight['nextMove']}")
+    
+    logger.info(f"✅ Insight generated | CID: {correlation_id} | Label: {insight['emotionalLabel'][:30]} | Move: {insight['nextMove'][:50]}")
+    
+    return InsightResponse(
+        emotionalLabel=insight['emotionalLabel'],
+        nextMove=insight['nextMove'],
+        source="claude",
+        correlationId=correlation_id,
+        model=model,
+    )
+
+def _is_rate_limit_error(error: BaseException) -> bool:
+    if isinstance(error, (BudgetExhausted, RateLimitError)):
+        return True
+    error_str = str(error).lower()
+    return 'rate' in error_str and 'limit' in error_str
+
+def build_fallback_insight(request: InsightRequest, source: str = "fallback") -> InsightResponse:
+    """Deterministic insight used whenever Claude can't answer: topic × delta category × history pattern rules"""
+    topic = request.topic if request.topic and request.topic != GENERAL else topic_classifier.classify(request.transcript).topic
+    pattern = history_pattern([h.delta for h in request.recentHistory or []], request.viewerDelta)
+    emotional_label, next_move = choose_fallback(
+        topic, delta_category(request.viewerDelta), pattern, request.transcript, request.recentInsights,
+        delta=request.viewerDelta,
+    )
+    
+    return InsightResponse(
+        emotionalLabel=emotional_label,
+        nextMove=next_move,
+        source=source
+    )
+
+def record_insight(request: InsightRequest, response: InsightResponse, started: float) -> None:
+    """Queue the request/response pair (and its timeline event) for Mongo; never awaits the database"""
+    INSIGHT_RESPONSES.inc(source=response.source)
+    if request.sessionId and response.source != "fallback_cancelled":
+        if request.sessionId not in socket_sessions:
+            # HTTP-only clients send viewer deltas only with insight requests
+            record_viewer_sample(request.sessionId, request.viewerDelta, request.viewerCount)
+        timeline_rollups.record_insight(request.sessionId, request.topic)
+        timeline_events.put({
+            "session_id": request.sessionId, "ts": datetime.utcnow(), "kind": "insight",
+            "correlationId": response.correlationId, "topic": request.topic, "source": response.source,
+        })
+    if not INSIGHT_PERSIST:
+        return
+    insight_writes.put({
+        "correlationId": response.correlationId,
+        "session_id": request.sessionId,
+        "ts": datetime.utcnow(),
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "source": response.source,
+        "cached": response.cached,
+        "late": False,
+        "request": request.model_dump(exclude_none=True),
+        "response": response.model_dump(),
+    })
+
+def record_late_insight(request: InsightRequest, response: InsightResponse, started: float) -> None:
+    """Upgrade the fallback already recorded under this correlationId; the rollups counted it once already"""
+    if request.sessionId:
+        timeline_events.update(
+            {"session_id": request.sessionId, "kind": "insight", "correlationId": response.correlationId},
+            {"$set": {"source": response.source, "late": True}},
+        )
+    if not INSIGHT_PERSIST:
+        return
+    # Upsert: the fallback document may have been dropped by an overflowing queue
+    insight_writes.update(
+        {"correlationId": response.correlationId},
+        {
+            "$set": {
+                "source": response.source,
+                "cached": response.cached,
+                "late": True,
+                "late_latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                "response": response.model_dump(),
+            },
+            "$setOnInsert": {
+                "session_id": request.sessionId,
+                "ts": datetime.utcnow(),
+                "request": request.model_dump(exclude_none=True),
+            },
+        },
+        upsert=True,
+    )
+
+# Default latency budget for insights; 0 means wait for Claude however long it takes
+INSIGHT_DEADLINE_MS = int(os.getenv('INSIGHT_DEADLINE_MS', '0'))
+
+INSIGHT_DEADLINES = REGISTRY.counter(
+    'spikely_insight_deadline_total',
+    'Deadline-bound insight outcomes (met, missed, late_ready, late_failed)',
+    ('outcome',),
+)
+
+# Background Claude calls that missed their deadline, by correlationId
+late_insights: TTLCache[asyncio.Task] = TTLCache(
+    'late_insight',
+    maxsize=int(os.getenv('LATE_INSIGHT_CACHE_SIZE', '1024')),
+    ttl=float(os.getenv('LATE_INSIGHT_TTL_S', '300')),
+)
+
+def resolve_deadline_s(request: InsightRequest, header: Optional[str] = None) -> Optional[float]:
+    """Latency budget in seconds: request field, then X-Insight-Deadline-Ms header, then INSIGHT_DEADLINE_MS"""
+    deadline_ms = request.deadlineMs
+    if deadline_ms is None and header:
+        try:
+            deadline_ms = int(header)
+        except ValueError:
+            deadline_ms = None
+    if deadline_ms is None:
+        deadline_ms = INSIGHT_DEADLINE_MS
+    return deadline_ms / 1000 if deadline_ms and deadline_ms > 0 else None
+
+def _settle_insight(result: InsightResponse, correlation_id: str, cache_key: Optional[str]) -> InsightResponse:
+    if result.correlationId != correlation_id:
+        # Joined another request's call; keep this request's own correlationId
+        result = result.model_copy(update={"correlationId": correlation_id})
+    if cache_key:
+        insight_cache.set(cache_key, result)
+    return result
+
+async def _finish_late_insight(request: InsightRequest, started: float, claude_call: asyncio.Task,
+                               correlation_id: str, cache_key: Optional[str],
+                               on_late: Optional[Callable[[InsightResponse], Awaitable[None]]]) -> InsightResponse:
+    try:
+        result = _settle_insight(await claude_call, correlation_id, cache_key)
+    except Exception as e:
+        INSIGHT_DEADLINES.inc(outcome='late_failed')
+        logger.info(f"📭 Late insight dropped | CID: {correlation_id} | {e}")
+        raise
+    INSIGHT_DEADLINES.inc(outcome='late_ready')
+    record_late_insight(request, result, started)
+    logger.info(f"📬 Late insight ready | CID: {correlation_id} | Move: {result.nextMove[:50]}")
+    if on_late is not None:
+        try:
+            await on_late(result)
+        except Exception as e:
+            logger.warning(f"⚠️ Late insight push failed | CID: {correlation_id} | {e}")
+    return result
+
+async def produce_insight(request: InsightRequest, is_disconnected=None, coalesce: bool = True,
+                          deadline_s: Optional[float] = None,
+                          on_late: Optional[Callable[[InsightResponse], Awaitable[None]]] = None,
+                          speculate: bool = False) -> InsightResponse:
+    """
+    Insight pipeline shared by the HTTP, WebSocket and batch entry points:
+    cache → per-session single-flight Claude call → deterministic fallback.
+    With `speculate`, the single flight first tries the session's pre-generated
+    candidate and only calls Claude on a miss.
+    With a deadline, a slow Claude call is left running after the fallback is
+    returned; its result lands in the cache, in `late_insights` and in `on_late`.
+    Every answer is queued for Mongo alongside its request.
+    """
+    started = time.perf_counter()
+    request = prepare_insight_request(request)
+    result = await _produce_insight(request, started, is_disconnected, coalesce, deadline_s, on_late, speculate)
+    record_insight(request, result, started)
+    return result
+
+async def _produce_insight(request: InsightRequest, started: float, is_disconnected, coalesce: bool,
+                           deadline_s: Optional[float],
+                           on_late: Optional[Callable[[InsightResponse], Awaitable[None]]],
+                           speculate: bool = False) -> InsightResponse:
     try:
         # Generate unique correlationId
-        global correlation_counter
-        correlation_counter += 1
-        correlation_id = f"{int(time.time() * 1000)}-{correlation_counter:04d}"
+        correlation_id = _next_correlation_id()
         
         logger.info(f"🤖 Generating insight | Delta: {request.viewerDelta} | CID: {correlation_id}")
         
+        # Serve identical recent requests from the insight cache
+        cache_key = None if request.bypassCache else insight_fingerprint(request)
+        if cache_key:
+            cached_insight = insight_cache.get(cache_key)
+            if cached_insight:
+                logger.info(f"⚡ Insight cache hit | CID: {correlation_id} | Key: {cache_key[:8]}")
+                return cached_insight.model_copy(update={"correlationId": correlation_id, "cached": True})
+        
         # Get Claude API key
         api_key = os.getenv('ANTHROPIC_API_KEY')
         if not api_key:
             raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY not configured")
         
-        # Build context strings
-        prosody_str = "No prosody data"
-        if request.prosody:
-            prosody_str = f"Top emotion: {request.prosody.topEmotion or 'unknown'} ({request.prosody.topScore or 0}%), Energy: {request.prosody.energy or 0}%, Excitement: {request.prosody.excitement or 0}%, Confidence: {request.prosody.confidence or 0}%"
-        
-        burst_str = f"Burst detected: {request.burst.type}" if request.burst and request.burst.detected else "No burst activity"
-        language_str = f"Language emotion: {request.language.emotion}" if request.language and request.language.emotion else "No language emotion"
-        history_str = "No recent history"
-        if request.recentHistory:
-            history_items = [f"{h.delta:+d} ({h.emotion or 'unknown'})" for h in request.recentHistory]
-            history_str = f"Recent pattern: {', '.join(history_items)}"
+        claude_call = insight_flights.run(
+            request.sessionId if coalesce else None,
+            cache_key or insight_fingerprint(request),
+            lambda: (_speculative_or_claude_insight if speculate else _claude_insight)(
+                request, api_key, correlation_id, deadline_s
+            ),
+            # A call that outlives its deadline must not die with the finished HTTP request
+            is_disconnected=None if deadline_s else is_disconnected,
+        )
+        if not deadline_s:
+            return _settle_insight(await claude_call, correlation_id, cache_key)
+
+        claude_task = asyncio.ensure_future(claude_call)
+        try:
+            done, _ = await asyncio.wait({claude_task}, timeout=deadline_s)
+        except asyncio.CancelledError:
+            claude_task.cancel()
+            raise
+        if done:
+            INSIGHT_DEADLINES.inc(outcome='met')
+            return _settle_insight(claude_task.result(), correlation_id, cache_key)
+
+        INSIGHT_DEADLINES.inc(outcome='missed')
+        logger.info(f"⏰ Insight missed {deadline_s * 1000:.0f}ms deadline - fallback now, Claude continues | CID: {correlation_id}")
+        late = asyncio.create_task(
+            _finish_late_insight(request, started, claude_task, correlation_id, cache_key, on_late)
+        )
+        late.add_done_callback(lambda task: task.cancelled() or task.exception())
+        late_insights.set(correlation_id, late)
+        return build_fallback_insight(request, source="fallback_deadline").model_copy(
+            update={"correlationId": correlation_id, "upgradePending": True}
+        )
         
-        # Create system prompt with ANTI-REPETITION rules
-        system_prompt = """You are Spikely - a tactical AI coach for live streamers. Generate ONE micro-decision they can execute in the next 30 seconds to spike viewer engagement.
-
-OUTPUT REQUIREMENTS:
-- emotionalLabel: 2-3 words describing what pattern you detected
-- nextMove: 3-5 word action + emotional cue (max 8 words total)
-- MUST be specific to their actual content (not generic)
-- Use positive framing (what TO do, not what NOT to do)
-- MUST reference SPECIFIC words or topics from the transcript
-- NEVER generate generic advice like "be engaging" or "keep momentum"
-
-🚫 CRITICAL ANTI-REPETITION RULES:
-1. Every insight MUST BE UNIQUE - no repeating previous patterns
-2. Reference SPECIFIC words from the transcript (not just topics)
-3. If they mentioned "gaming setup", say "Ask about graphics cards" NOT "talk about gaming"
-4. If they mentioned "makeup routine", say "Show foundation technique" NOT "demonstrate makeup"
-5. Vary your action verbs - don't use same verb twice in a row
-6. Vary your emotional cues - rotate between different energy levels
-7. If you've said "Pivot to X" recently, use "Switch to" or "Jump to" instead
-8. Never give the same advice for opposite viewer changes (spike vs drop)
-
-ANALYSIS PRIORITY:
-1. What SPECIFIC topic/action caused the viewer change?
-2. What emotional energy drove it? (from Hume AI prosody)
-3. Should they amplify this or pivot?
-4. What haven't I suggested recently?
-
-ACTION VERBS TO USE (ROTATE THESE):
-Ask, Show, Talk about, Tease, Reveal, Pivot to, Demonstrate, Explain, Highlight, Share, Compare, Review, Test, Try, Call out, Point to, Zoom in on, React to
-
-TONAL CUES TO USE (ROTATE THESE):
-Stay hyped, Go vulnerable, Build excitement, Keep energy up, Soften tone, Be authentic, Speed up, Be direct, Stay present, Boost energy, Stay curious, Be playful, Get intense, Stay calm, Create urgency, Build suspense, Be conversational
-
-TOPIC CATEGORIES:
-Gaming, makeup, cooking, fitness, story, chat, giveaway, product, tutorial, Q&A, personal, tech, music, art, review, reaction, news, gossip, advice, challenge
-
-INSIGHT STRUCTURE EXAMPLES (ULTRA-SPECIFIC):
-
-**SPIKE (viewers increasing +5 or more):**
-Pattern detected → Amplify with CONCRETE action they can do in 30 seconds
-- Transcript: "playing Valorant on my PC" → {"emotionalLabel": "Valorant talk wins", "nextMove": "Ask 'What agents you main?'. React big"}
-- Transcript: "this eyeshadow palette" → {"emotionalLabel": "palette demo spikes", "nextMove": "Hold palette to camera. Show shimmer"}
-- Transcript: "vacation with my family" → {"emotionalLabel": "story connects", "nextMove": "Tell the TSA security story. Laugh"}
-- Transcript: "bought new iPhone" → {"emotionalLabel": "product hype works", "nextMove": "Open camera app. Test portrait mode"}
-- Transcript: "cooking chicken recipe" → {"emotionalLabel": "recipe interest high", "nextMove": "Taste test on camera. React honest"}
-
-**DROP (viewers decreasing -5 to -15):**
-Pattern detected → Pivot with SPECIFIC new action
-- Transcript: "technical bug issues" → {"emotionalLabel": "complaints dip", "nextMove": "Pull up giveaway. Announce winner time"}
-- Transcript: "explaining code for 5 minutes" → {"emotionalLabel": "pacing slows", "nextMove": "Run the code now. Show results"}
-- Transcript: "same topic repeated" → {"emotionalLabel": "topic exhausted", "nextMove": "Read top chat question. Answer it"}
-
-**DUMP (viewers dropping -20 or more):**
-Urgent → HIGH ENERGY concrete recovery action
-- Transcript: "dead silence for 30s" → {"emotionalLabel": "silence kills", "nextMove": "Start poll: 'Yes or No?'. Count votes"}
-- Transcript: "stream lagging/frozen" → {"emotionalLabel": "tech problems drop", "nextMove": "Show backup clip. Talk over it"}
-
-**FLATLINE (viewers stable ±3):**
-Create engagement with SPECIFIC question/action
-- Transcript: "chatting casually" → {"emotionalLabel": "energy steady", "nextMove": "Call out @username. Ask their opinion"}
-- Transcript: "background music playing" → {"emotionalLabel": "passive watching", "nextMove": "Announce: 'Big reveal in 30s'. Tease it"}
-
-🎯 KEY PATTERN TO FOLLOW:
-[Action Verb] [Specific Noun/Question/Thing] + [Physical execution cue]
-
-EXAMPLES:
-✅ "Ask 'What's your rank?'. Read answers loud"
-✅ "Hold bottle to camera. Point at ingredients"
-✅ "Tell airport TSA story. Act it out"
-✅ "Answer 'how to start streaming'. Give 3 quick tips"
-✅ "Show controller setup. Explain each button"
-✅ "Read top donation. Thank them by name"
-
-**DROP (viewers decreasing -5 to -15):**
-Pattern detected → Constructive pivot with VARIETY
-- Complaint about bugs: {"emotionalLabel": "complaints dip", "nextMove": "Switch to giveaway. Boost energy"}
-- Slow explanation: {"emotionalLabel": "pacing slows", "nextMove": "Jump to demo. Speed up"}
-- Same topic 5min: {"emotionalLabel": "topic exhausted", "nextMove": "Ask viewer questions. Create interaction"}
-
-**DUMP (viewers dropping -20 or more):**
-Pattern detected → Urgent recovery with HIGH ENERGY
-- Dead silence: {"emotionalLabel": "silence kills", "nextMove": "Start poll now. Get intense"}
-- Technical issues: {"emotionalLabel": "tech problems drop", "nextMove": "Show backup content. Stay upbeat"}
-
-**FLATLINE (viewers stable ±3):**
-Create engagement opportunity with NOVELTY
-- Casual chat: {"emotionalLabel": "energy steady", "nextMove": "Call out usernames. Be playful"}
-- Background content: {"emotionalLabel": "passive watching", "nextMove": "Tease surprise reveal. Build suspense"}
-
-CRITICAL RULES:
-1. NEVER echo raw transcript words (e.g., if they said "twenty one is young" don't use those exact words)
-2. Extract the CONCEPT and make it more specific
-3. Be hyper-specific: "Ask about RTX 4090" NOT "talk about graphics"
-4. Include the HOW: emotion/energy cue in every nextMove
-5. Total nextMove: 8 words maximum
-6. emotionalLabel: 3 words maximum
-7. VARY your vocabulary - use synonyms, different verbs, different cues
-
-BAD EXAMPLES (too generic - NEVER do this):
-- {"emotionalLabel": "positive", "nextMove": "Keep doing this"} ← TERRIBLE
-- {"emotionalLabel": "engagement", "nextMove": "Be more engaging"} ← TERRIBLE
-- {"emotionalLabel": "content", "nextMove": "Do more content talk"} ← TERRIBLE
-- {"emotionalLabel": "momentum", "nextMove": "Keep momentum going"} ← TERRIBLE
-- {"emotionalLabel": "story dips", "nextMove": "Pivot to Q&A. Build excitement"} ← OVERUSED
-
-GOOD EXAMPLES (specific and tactical):
-- {"emotionalLabel": "Elden Ring tips work", "nextMove": "Share boss strategies. Stay hyped"}
-- {"emotionalLabel": "contouring demo spikes", "nextMove": "Zoom on cheekbone blending. Keep intensity"}
-- {"emotionalLabel": "pasta recipe wins", "nextMove": "Taste test on camera. React big"}
-- {"emotionalLabel": "kettlebell moves connect", "nextMove": "Call out viewer form. Boost energy"}
-
-🎯 DYNAMIC INSIGHT GENERATION PROCESS:
-1. Read the full transcript carefully
-2. Identify 3-5 specific nouns/topics mentioned
-3. Check recent insights - what have you said before?
-4. Pick the MOST RELEVANT topic that's NOT been used recently
-5. Create a NEW verb + cue combination you haven't used
-6. Reference specific details, not generic concepts
-
-Return ONLY valid JSON. No markdown, no explanations."""
-
-        # Build context strings for new fields
-        keywords_str = "No keywords detected"
-        if request.keywordsSaid and len(request.keywordsSaid) > 0:
-            keywords_str = f"Detected topics: {', '.join(request.keywordsSaid[:5])}"
+    except InsightCancelled as e:
+        logger.info(f"✂️ Insight cancelled ({e.reason}) | Delta: {request.viewerDelta}")
+        return build_fallback_insight(request, source="fallback_cancelled")
         
-        recent_insights_str = "No recent insights (first insight of session)"
-        if request.recentInsights and len(request.recentInsights) > 0:
-            recent_insights_str = f"🚫 DON'T REPEAT THESE: {', '.join(request.recentInsights[-3:])}"
+    except BudgetExhausted as e:
+        logger.warning(f"⚠️ {e} - using fallback")
+        return build_fallback_insight(request, source="fallback_rate_limited")
         
-        winning_topics_str = "No winning patterns yet"
-        if request.winningTopics and len(request.winningTopics) > 0:
-            winning_topics_str = f"✅ What worked before: {', '.join(request.winningTopics[:3])}"
+    except Exception as e:
+        logger.error(f"❌ Insight generation error: {str(e)}")
         
-        quality_indicator = ""
-        if request.transcriptQuality:
-            quality_indicator = f"Transcript quality: {request.transcriptQuality}"
-            if request.uniqueWordRatio:
-                quality_indicator += f" (word variety: {request.uniqueWordRatio:.0%})"
+        # Check if it's a rate limit error
+        is_rate_limited = _is_rate_limit_error(e)
         
-        # Chat context
-        chat_context_str = ""
-        if request.chatData:
-            chat_context_str = f"\n💬 LIVE CHAT CONTEXT:\n"
-            chat_context_str += f"- Comments: {request.chatData.commentCount} in last 30s\n"
-            chat_context_str += f"- Chat rate: {request.chatData.chatRate}/min\n"
-            
-            if request.chatData.topKeywords and len(request.chatData.topKeywords) > 0:
-                chat_context_str += f"- Top chat keywords: {', '.join(request.chatData.topKeywords)}\n"
-            
-            if request.chatData.recentComments and len(request.chatData.recentComments) > 0:
-                chat_context_str += f"- Recent comments:\n"
-                for comment in request.chatData.recentComments[-3:]:  # Show last 3
-                    chat_context_str += f"  • {comment}\n"
-                chat_context_str += "\n💡 Use chat context: Reference specific viewer questions, respond to comments, or acknowledge engagement"
+        if is_rate_limited:
+            logger.warning("⚠️ Rate limited - using enhanced fallback")
         
-        # Create user prompt with enriched context
-        user_prompt = f"""LIVE STREAM DATA:
-
-WHAT THEY SAID (exact words): "{request.transcript}"
-
-{keywords_str}
-
-VIEWER IMPACT: {request.viewerDelta:+d} viewers ({request.prevCount} → {request.viewerCount})
-
-VOICE ANALYSIS: {prosody_str}
-
-ENERGY SIGNALS: {burst_str}
+        # Fallback to deterministic insight
+        return build_fallback_insight(
+            request,
+            source="fallback" if not is_rate_limited else "fallback_rate_limited"
+        )
 
-WORD EMOTION: {language_str}
+async def validated_body(raw_request: Request, model: type, stage: Optional[str] = 'validation'):
+    """Parse and validate a JSON body in one pass straight from the raw bytes, timing it as `stage`"""
+    started = time.perf_counter()
+    body = await raw_request.body()
+    try:
+        parsed = model.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)], body=body
+        )
+    if stage:
+        _observe_stage(stage, started)
+    return parsed
 
-TOPIC: {request.topic or 'general'}
+# The body is validated by hand (to time it); keep it documented in the OpenAPI schema
+_INSIGHT_REQUEST_BODY = {"requestBody": {"required": True, "content": {
+    "application/json": {"schema": {"$ref": "#/components/schemas/InsightRequest"}}
+}}}
 
-RECENT PATTERN: {history_str}
+@api_router.post("/generate-insight", response_model=InsightResponse, openapi_extra=_INSIGHT_REQUEST_BODY)
+async def generate_insight(raw_request: Request):
+    """
+    Generate tactical live stream insights using Claude Sonnet 4.5
+    """
+    request = await validated_body(raw_request, InsightRequest)
+    return model_response(await produce_insight(
+        request,
+        is_disconnected=raw_request.is_disconnected,
+        deadline_s=resolve_deadline_s(request, raw_request.headers.get('X-Insight-Deadline-Ms')),
+    ))
+
+class LateInsightResponse(BaseModel):
+    correlationId: str
+    status: str  # pending | ready | failed
+    insight: Optional[InsightResponse] = None
+
+@api_router.get("/insights/{correlation_id}", response_model=LateInsightResponse)
+async def get_late_insight(correlation_id: str):
+    """
+    Claude's answer for a request that got the deadline fallback (`upgradePending`)
+    """
+    late = late_insights.get(correlation_id)
+    if late is None:
+        raise HTTPException(status_code=404, detail="No pending insight for this correlationId")
+    if not late.done():
+        return LateInsightResponse(correlationId=correlation_id, status="pending")
+    if late.cancelled() or late.exception() is not None:
+        return LateInsightResponse(correlationId=correlation_id, status="failed")
+    return LateInsightResponse(correlationId=correlation_id, status="ready", insight=late.result())
+
+@api_router.post("/generate-insight/stream", openapi_extra=_INSIGHT_REQUEST_BODY)
+async def generate_insight_stream(raw_request: Request):
+    """
+    Streaming variant of /generate-insight (server-sent events).
+    Emits `label` as soon as Claude finishes emotionalLabel, then the final
+    post-processed `insight` (or the deterministic fallback on error).
+    """
+    started = time.perf_counter()
+    request = prepare_insight_request(await validated_body(raw_request, InsightRequest))
+    correlation_id = _next_correlation_id()
+    logger.info(f"🌊 Streaming insight | Delta: {request.viewerDelta} | CID: {correlation_id}")
+
+    async def events():
+        cache_key = None if request.bypassCache else insight_fingerprint(request)
+        if cache_key:
+            cached_insight = insight_cache.get(cache_key)
+            if cached_insight:
+                logger.info(f"⚡ Insight cache hit | CID: {correlation_id} | Key: {cache_key[:8]}")
+                result = cached_insight.model_copy(update={"correlationId": correlation_id, "cached": True})
+                record_insight(request, result, started)
+                yield sse_event('insight', result.model_dump())
+                return
 
-SIGNAL STRENGTH: {request.quality or 'medium'}
+        try:
+            api_key = os.getenv('ANTHROPIC_API_KEY')
+            if not api_key:
+                raise ValueError("ANTHROPIC_API_KEY not configured")
+
+            parser = IncrementalInsightParser()
+            claude = upstream.anthropic(api_key)
+            user_prompt = insight_user_prompt(request, correlation_id)
+            tier, reason = model_router.route(delta_category(request.viewerDelta))
+            logger.info(f"🤖 Streaming from Claude | Model: {tier.model} ({tier.name}, {reason}) | CID: {correlation_id}")
+            async with claude_limiter.admit(insight_priority(request)), claude.messages.stream(
+                model=tier.model,
+                max_tokens=tier.max_tokens,
+                system=INSIGHT_SYSTEM_BLOCKS,
+                tools=INSIGHT_TOOLS,
+                tool_choice=INSIGHT_TOOL_CHOICE,
+                messages=[{"role": "user", "content": user_prompt}]
+            ) as stream:
+                call_started = time.perf_counter()
+                first_token = True
+                async for event in stream:
+                    if event.type != 'content_block_delta':
+                        continue
+                    # Tool input arrives as partial JSON; text only if the model skipped the tool
+                    if event.delta.type == 'input_json_delta':
+                        chunk = event.delta.partial_json
+                    elif event.delta.type == 'text_delta':
+                        chunk = event.delta.text
+                    else:
+                        continue
+                    if first_token:
+                        first_token = False
+                        _observe_stage('claude_ttft', call_started)
+                    for key, value in parser.feed(chunk):
+                        if key == 'emotionalLabel':
+                            label = ' '.join(value.split()[:3])
+                            yield sse_event('label', {"emotionalLabel": label, "correlationId": correlation_id})
+                final_message = await stream.get_final_message()
+                model_router.observe(tier.model, _observe_stage('claude_total', call_started) - call_started)
+
+            _record_usage(final_message.usage, correlation_id)
+            with INSIGHT_STAGE_SECONDS.time(stage='json_parse'):
+                parsed = _extract_insight(request, final_message)
+            insight = _postprocess_insight(request, parsed)
+            logger.info(f"✅ Insight streamed | CID: {correlation_id} | Label: {insight['emotionalLabel'][:30]} | Move: {insight['nextMove'][:50]}")
+            result = InsightResponse(
+                emotionalLabel=insight['emotionalLabel'],
+                nextMove=insight['nextMove'],
+                source="claude",
+                correlationId=correlation_id,
+                model=tier.model,
+            )
+            if cache_key:
+                insight_cache.set(cache_key, result)
+        except Exception as e:
+            logger.error(f"❌ Streaming insight error: {str(e)}")
+            is_rate_limited = _is_rate_limit_error(e)
+            result = build_fallback_insight(
+                request,
+                source="fallback" if not is_rate_limited else "fallback_rate_limited"
+            )
 
-{quality_indicator}
+        record_insight(request, result, started)
+        yield sse_event('insight', result.model_dump())
 
-{chat_context_str}
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
----
-🎯 CONTEXT FOR VARIETY:
-{recent_insights_str}
-{winning_topics_str}
+# ==================== BATCH INSIGHTS ====================
 
----
-🎯 ULTRA-SPECIFIC TACTICAL INSIGHT GENERATION:
+class InsightBatchRequest(BaseModel):
+    requests: List[InsightRequest]
+    # "sync" runs items now; "async" submits them to the Anthropic Message Batches API
+    mode: str = "sync"
 
-STEP 1 - EXTRACT SPECIFICS from transcript:
-- What SPECIFIC game/product/topic did they mention? (exact name)
-- What SPECIFIC question could viewers answer?
-- What SPECIFIC action are they doing right now?
-- What SPECIFIC story/moment did they reference?
+class InsightBatchItem(BaseModel):
+    index: int
+    status: str  # ok | fallback | failed
+    insight: Optional[InsightResponse] = None
 
-STEP 2 - CREATE TACTICAL ACTION using those specifics:
-- DON'T say "Ask about gaming" → SAY "Ask 'What rank are you?'"
-- DON'T say "Show product" → SAY "Hold up the bottle. Show label"
-- DON'T say "Tell story" → SAY "Tell the airport security story"
-- DON'T say "Pivot to Q&A" → SAY "Answer top chat question now"
+class InsightBatchResponse(BaseModel):
+    batchId: Optional[str] = None
+    status: str  # completed | in_progress
+    results: List[InsightBatchItem] = []
 
-STEP 3 - ADD SPECIFIC EXECUTION CUE:
-- Not "Stay hyped" → "Read answers out loud"
-- Not "Keep energy" → "Lean into camera"
-- Not "Build excitement" → "Count down from 3"
+INSIGHT_BATCH_CONCURRENCY = int(os.getenv('INSIGHT_BATCH_CONCURRENCY', '8'))
+INSIGHT_BATCH_MAX_ITEMS = int(os.getenv('INSIGHT_BATCH_MAX_ITEMS', '200'))
 
-REQUIRED FORMAT:
-emotionalLabel: [detected pattern, max 3 words]
-nextMove: [SPECIFIC action with noun] + [HOW to execute it]
+# Original requests of submitted provider batches, needed to post-process results
+submitted_batches: TTLCache[List[InsightRequest]] = TTLCache('insight_batch', maxsize=256, ttl=24 * 3600)
+# Results of ended batches, post-processed exactly once (the task is shared by concurrent polls)
+completed_batches: TTLCache[asyncio.Task] = TTLCache('insight_batch_results', maxsize=256, ttl=24 * 3600)
 
-EXAMPLES OF WHAT WE NEED:
+def _batch_item(index: int, insight: InsightResponse) -> InsightBatchItem:
+    return InsightBatchItem(index=index, status="ok" if insight.source == "claude" else "fallback", insight=insight)
 
-❌ BAD (vague):
-- "Pivot to Q&A. Build excitement" 
-- "Show more story. Keep energy"
-- "Talk about gaming. Stay hyped"
+_INSIGHT_BATCH_REQUEST_BODY = {"requestBody": {"required": True, "content": {
+    "application/json": {"schema": {"$ref": "#/components/schemas/InsightBatchRequest"}}
+}}}
 
-✅ GOOD (specific):
-- "Ask 'What's your setup?'. Read answers loud"
-- "Tell your first stream fail. Be vulnerable"
-- "Hold product to camera. Point at features"
-- "Answer 'how did you start'. Give 3 tips"
-- "Show your controller. Explain button mapping"
+@api_router.post("/generate-insights:batch", response_model=InsightBatchResponse,
+                 openapi_extra=_INSIGHT_BATCH_REQUEST_BODY)
+async def generate_insights_batch(raw_request: Request):
+    """
+    Generate insights for many streams at once. Sync mode runs the items
+    concurrently (bounded) and returns them in order; async mode submits them
+    to the provider batch API and returns a batchId to poll.
+    """
+    # Not timed as the per-insight validation stage: one body holds up to INSIGHT_BATCH_MAX_ITEMS requests
+    batch = await validated_body(raw_request, InsightBatchRequest, stage=None)
+    if not batch.requests:
+        raise HTTPException(status_code=422, detail="Batch has no requests")
+    if len(batch.requests) > INSIGHT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {INSIGHT_BATCH_MAX_ITEMS} requests")
+
+    if batch.mode == "async":
+        api_key = os.getenv('ANTHROPIC_API_KEY')
+        if not api_key:
+            raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY not configured")
+        requests = [prepare_insight_request(r) for r in batch.requests]
+        # Batch results are not latency-bound: route by category rules only
+        tiers = [model_router.tier_for(delta_category(request.viewerDelta)) for request in requests]
+        submitted = await upstream.anthropic(api_key).messages.batches.create(requests=[
+            {
+                "custom_id": f"item-{index}",
+                "params": {
+                    "model": tiers[index].model,
+                    "max_tokens": tiers[index].max_tokens,
+                    "system": INSIGHT_SYSTEM_BLOCKS,
+                    "tools": INSIGHT_TOOLS,
+                    "tool_choice": INSIGHT_TOOL_CHOICE,
+                    "messages": [{"role": "user", "content": insight_user_prompt(request, f"batch-item-{index}")}],
+                },
+            }
+            for index, request in enumerate(requests)
+        ])
+        submitted_batches.set(submitted.id, requests)
+        logger.info(f"📦 Submitted insight batch | ID: {submitted.id} | Items: {len(requests)}")
+        return InsightBatchResponse(batchId=submitted.id, status="in_progress")
+
+    if batch.mode != "sync":
+        raise HTTPException(status_code=422, detail=f"Unknown batch mode: {batch.mode}")
+
+    semaphore = asyncio.Semaphore(INSIGHT_BATCH_CONCURRENCY)
+
+    async def run_item(index: int, request: InsightRequest) -> InsightBatchItem:
+        async with semaphore:
+            return _batch_item(index, await produce_insight(request, coalesce=False))
+
+    results = await asyncio.gather(*[run_item(i, r) for i, r in enumerate(batch.requests)])
+    logger.info(f"📦 Insight batch done | Items: {len(results)} | Fallbacks: {sum(r.status != 'ok' for r in results)}")
+    return InsightBatchResponse(status="completed", results=list(results))
+
+@api_router.get("/generate-insights:batch/{batch_id}", response_model=InsightBatchResponse)
+async def get_insights_batch(batch_id: str):
+    """
+    Poll an async insight batch; results are returned in submission order once it has ended
+    """
+    completed = completed_batches.get(batch_id)
+    if completed is None:
+        api_key = os.getenv('ANTHROPIC_API_KEY')
+        if not api_key:
+            raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY not configured")
+        claude = upstream.anthropic(api_key)
+        try:
+            status = await claude.messages.batches.retrieve(batch_id)
+        except NotFoundError:
+            raise HTTPException(status_code=404, detail=f"Unknown batch: {batch_id}")
+        if status.processing_status != "ended":
+            return InsightBatchResponse(batchId=batch_id, status="in_progress")
+
+        requests = submitted_batches.get(batch_id)
+        if requests is None:
+            raise HTTPException(status_code=404, detail="Batch requests expired or unknown to this server")
+        # A concurrent poll may have started collecting while this one awaited the status
+        completed = completed_batches.get(batch_id)
+        if completed is None:
+            completed = asyncio.create_task(_collect_batch_results(claude, batch_id, requests))
+            completed_batches.set(batch_id, completed)
 
-Generate ONE hyper-specific tactical insight NOW. Include concrete nouns from transcript. Tell them EXACTLY what to do in next 30 seconds."""
+    try:
+        results = await asyncio.shield(completed)
+    except Exception:
+        completed_batches.pop(batch_id)  # let the next poll retry the download
+        raise
+    return InsightBatchResponse(batchId=batch_id, status="completed", results=results)
+
+async def _collect_batch_results(claude, batch_id: str, requests: List[InsightRequest]) -> List[InsightBatchItem]:
+    """Download and post-process an ended batch; runs once per batch, later polls reuse the items"""
+    items: Dict[int, InsightBatchItem] = {}
+    async for entry in await claude.messages.batches.results(batch_id):
+        index = int(entry.custom_id.split('-', 1)[1])
+        request = requests[index]
+        if entry.result.type == "succeeded":
+            correlation_id = _next_correlation_id()
+            try:
+                message = entry.result.message
+                _record_usage(message.usage, correlation_id)
+                insight = _postprocess_insight(request, _extract_insight(request, message))
+                items[index] = _batch_item(index, InsightResponse(
+                    emotionalLabel=insight['emotionalLabel'],
+                    nextMove=insight['nextMove'],
+                    source="claude",
+                    correlationId=correlation_id,
+                    model=message.model,
+                ))
+                continue
+            except Exception as e:
+                logger.error(f"❌ Batch item {index} unusable: {str(e)}")
+        items[index] = _batch_item(index, build_fallback_insight(request))
+
+    return [items.get(i) or InsightBatchItem(index=i, status="failed") for i in range(len(requests))]
+
+# ==================== SESSION WEBSOCKET ====================
+
+# Viewer swing assumed for speculative spike/drop candidates
+INSIGHT_SPECULATION_DELTA = int(os.getenv('INSIGHT_SPECULATION_DELTA', '5'))
+
+async def _speculative_candidate(fields: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], str]]:
+    """Claude's raw answer for a hypothetical trigger; post-processing waits for the real one"""
+    api_key = os.getenv('ANTHROPIC_API_KEY')
+    if not api_key:
+        return None
+    request = prepare_insight_request(InsightRequest(**fields))
+    # Lowest admission priority: speculation is rejected first when Claude is busy
+    return await _claude_completion(
+        request, api_key, f"spec-{request.sessionId}", priority=PRIORITIES['flatline']
+    )
+
+speculative_insights = SpeculativeInsights(
+    _speculative_candidate,
+    max_in_flight=int(os.getenv('INSIGHT_SPECULATION_MAX_IN_FLIGHT', '4')),
+    # A candidate written for a +5 swing is served for +2..+8, not for +40
+    max_delta_error=int(os.getenv('INSIGHT_SPECULATION_MAX_DELTA_ERROR', '3')),
+)
 
-        # Call Claude API directly
-        logger.info("🤖 Calling Claude Sonnet 4.5 with your API key...")
-        
-        client = AsyncAnthropic(api_key=api_key)
-        response = await client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=150,
-            system=system_prompt,
-            messages=[
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        
-        # Parse response
-        generated_text = response.content[0].text.strip()
-        logger.info(f"✅ Claude raw response: {generated_text[:200]}...")
-        
-        # 📊 DIAGNOSTIC: Full Claude response
-        # Parse JSON
-        try:
-            insight = json.loads(generated_text)
-        except json.JSONDecodeError:
-            # Try to extract JSON from markdown or wrapper text
-            match = re.search(r'\{[\s\S]*\}', generated_text)
-            if match:
-                insight = json.loads(match.group(0))
-            else:
-                raise ValueError("Invalid JSON response from Claude")
-        
-        # Validate and enforce constraints
-        if not insight.get('emotionalLabel') or not insight.get('nextMove'):
-            raise ValueError("Missing required fields in insight")
-        
-        # ==================== DIAGNOSTIC MODE: VALIDATOR DISABLED ====================
-        # TEMPORARILY DISABLED to see Claude's raw output without modification
-        # This allows us to determine if Claude generates generic insights
-        # or if the validator is incorrectly rejecting/modifying good insights
-        
-        logger.info("🔬 DIAGNOSTIC MODE: Generic validator DISABLED - passing Claude output as-is")
-        
-        # REJECT GENERIC INSIGHTS - Force specificity (DISABLED FOR DIAGNOSTICS)
-        # next_move_lower = insight['nextMove'].lower()
-        # generic_phrases = [
-        #     'pivot to q&a',
-        #     'build excitement',
-        #     'keep energy',
-        #     'stay hyped',
-        #     'be engaging',
-        #     'do more',
-        #     'try something',
-        #     'switch topics',
-        #     'talk more',
-        #     'show more'
-        # ]
-        # 
-        # # Check if insight is too generic (contains generic phrase without specifics)
-        # is_generic = False
-        # for phrase in generic_phrases:
-        #     # If insight ONLY contains the generic phrase (not combined with specifics)
-        #     if phrase in next_move_lower and len(next_move_lower.split()) <= 4:
-        #         is_generic = True
-        #         logger.warning(f"⚠️ REJECTED generic insight: '{insight['nextMove']}' - too vague")
-        #         break
-        # 
-        # # If generic AND no nouns detected, force a more specific version
-        # if is_generic:
-        #     # Try to extract any noun from transcript to add specificity
-        #     transcript_words = request.transcript.lower().split()
-        #     # Simple noun extraction (words that might be specific topics)
-        #     potential_nouns = [w for w in transcript_words if len(w) > 4 and w not in ['about', 'their', 'really', 'think', 'going', 'doing', 'saying']]
-        #     if potential_nouns:
-        #         specific_noun = potential_nouns[0]
-        #         insight['nextMove'] = f"Talk about {specific_noun}. {insight['nextMove'].split('.')[-1].strip()}"
-        #         logger.info(f"✅ Added specificity: '{insight['nextMove']}'")
-        #     else:
-        #         # Last resort: Force a question format
-        #         insight['nextMove'] = "Ask viewers a question. Read answers"
-        #         logger.warning("⚠️ Forced question format due to lack of specifics")
-        
-        # ==================== END DIAGNOSTIC MODE SECTION ====================
-        
-        # Enforce word limits
-        emotional_words = insight['emotionalLabel'].split()[:3]
-        insight['emotionalLabel'] = ' '.join(emotional_words)
-        
-        next_move_words = insight['nextMove'].split()[:12]  # Increased to allow for specificity
-        insight['nextMove'] = ' '.join(next_move_words)
-        
-        # Validate no transcript bleed - only check for consecutive multi-word matches
-        transcript_lower = request.transcript.lower()
-        emotional_lower = insight['emotionalLabel'].lower()
-        next_move_lower = insight['nextMove'].lower()
-        
-        # Check for 3+ consecutive word matches (actual bleed)
-        def has_consecutive_match(output: str, source: str, min_words: int = 3) -> bool:
-            output_words = output.split()
-            for i in range(len(output_words) - min_words + 1):
-                phrase = ' '.join(output_words[i:i+min_words])
-                if len(phrase) > 10 and phrase in source:
-                    return True
-            return False
-        
-        if has_consecutive_match(emotional_lower, transcript_lower, 3):
-            logger.warning("⚠️ Transcript bleed detected in emotionalLabel (3+ words), using fallback")
-            insight['emotionalLabel'] = "content spike" if request.viewerDelta > 0 else "content dip"
-        
-        if has_consecutive_match(next_move_lower, transcript_lower, 4):
-            logger.warning("⚠️ Transcript bleed detected in nextMove (4+ words), using fallback")
-            insight['nextMove'] = "Keep this energy going" if request.viewerDelta > 0 else "Try something different"
-        
-        # Check for repetition against recent insights
-        if request.recentInsights and len(request.recentInsights) > 0:
-            for recent in request.recentInsights[-3:]:
-                recent_lower = recent.lower()
-                # Check if new insight is too similar (> 60% word overlap)
-                new_words = set(next_move_lower.split())
-                recent_words = set(recent_lower.split())
-                if len(new_words) > 0:
-                    overlap = len(new_words & recent_words) / len(new_words)
-                    if overlap > 0.6:
-                        logger.warning(f"⚠️ Repetition detected: '{insight['nextMove']}' too similar to '{recent}' ({overlap:.0%} match)")
-                        # Force variation by prepending "Try: "
-                        insight['nextMove'] = f"Try: {insight['nextMove']}"[:50]
-        
-        logger.info(f"✅ Insight generated - Label: {insight['emotionalLabel']}, Move: {insight['nextMove']}")
-        
-        logger.info(f"✅ Insight generated | CID: {correlation_id} | Label: {insight['emotionalLabel'][:30]} | Move: {insight['nextMove'][:50]}")
-        
-        return InsightResponse(
-            emotionalLabel=insight['emotionalLabel'],
-            nextMove=insight['nextMove'],
-            source="claude",
-            correlationId=correlation_id
-        )
-        
-    except Exception as e:
-        logger.error(f"❌ Insight generation error: {str(e)}")
-        
-        # Check if it's a rate limit error
-        error_str = str(e).lower()
-        is_rate_limited = 'rate' in error_str and 'limit' in error_str
-        
-        if is_rate_limited:
-            logger.warning("⚠️ Rate limited - using enhanced fallback")
-        
-        # Fallback to deterministic insight
-        topic_words = {
-            'food': 'cooking', 'fitness': 'workout', 'finance': 'money',
-            'personal': 'story', 'interaction': 'chat', 'general': 'content',
-            'gaming': 'gaming', 'makeup': 'makeup', 'music': 'music'
-        }
-        topic = request.topic or 'general'
-        topic_word = topic_words.get(topic, 'content')
-        
-        delta_abs = abs(request.viewerDelta)
-        
-        if request.viewerDelta > 0:
-            # Positive - be specific about the win
-            if request.viewerDelta >= 20:
-                emotional_label = f"{topic_word} wins big"
-                next_move = f"Double down {topic_word}. Stay hyped"
-            elif request.viewerDelta >= 10:
-                emotional_label = f"{topic_word} works"
-                next_move = f"Show more {topic_word}. Keep energy"
-            else:
-                emotional_label = f"{topic_word} gains"
-                next_move = f"Keep {topic_word} going. Stay present"
-        elif delta_abs > 30:
-            # Dump - urgent pivot
-            emotional_label = f"{topic_word} kills vibe"
-            next_move = "Start giveaway now. Boost energy fast"
-        elif request.viewerDelta < 0:
-            # Drop - constructive pivot
-            emotional_label = f"{topic_word} dips"
-            next_move = "Pivot to Q&A. Build excitement"
-        else:
-            # Flatline
-            emotional_label = "energy steady"
-            next_move = "Ask quick question. Create buzz"
-        
-        return InsightResponse(
-            emotionalLabel=emotional_label,
-            nextMove=next_move,
-            source="fallback" if not is_rate_limited else "fallback_rate_limited"
+def speculate_on_segment(session: SessionCorrelator, segment: str) -> None:
+    magnitude = max(session.settings.minDelta, INSIGHT_SPECULATION_DELTA)
+    requests = {
+        delta_category(delta): (delta, fields)
+        for delta, fields in session.speculative_requests(segment, magnitude).items()
+    }
+    if requests:
+        speculative_insights.speculate(session.session_id, segment, requests)
+
+async def _speculative_or_claude_insight(request: InsightRequest, api_key: str, correlation_id: str,
+                                         budget_s: Optional[float] = None) -> InsightResponse:
+    """Single-flight body for speculating sessions: the pre-generated candidate if it fits this trigger, else Claude"""
+    candidate = await speculative_insights.take(
+        request.sessionId, request.transcript, delta_category(request.viewerDelta), request.viewerDelta
+    )
+    if candidate is None:
+        return await _claude_insight(request, api_key, correlation_id, budget_s)
+    parsed, model = candidate
+    insight = _postprocess_insight(request, dict(parsed))
+    logger.info(f"🔮 Speculative insight served | CID: {correlation_id} | Move: {insight['nextMove'][:50]}")
+    return InsightResponse(
+        emotionalLabel=insight['emotionalLabel'],
+        nextMove=insight['nextMove'],
+        source="claude",
+        correlationId=correlation_id,
+        model=model,
+        speculative=True,
+    )
+
+@api_router.websocket("/ws/session")
+async def session_socket(websocket: WebSocket, sessionId: Optional[str] = None):
+    """
+    Persistent session channel: the client streams `transcript`, `viewers`,
+    `chat` and `config` messages; correlation runs server-side and insights
+    are pushed back as `insight` messages.
+    """
+    await websocket.accept()
+    session = SessionCorrelator(sessionId or str(uuid.uuid4()))
+    # Every in-flight deliver task, so none outlives the socket
+    deliveries: Set[asyncio.Task] = set()
+    socket_sessions.add(session.session_id)
+    logger.info(f"🔌 Session socket opened | Session: {session.session_id}")
+
+    async def deliver(fields: Dict[str, Any]):
+        request = prepare_insight_request(InsightRequest(**fields))
+
+        async def upgrade(late: InsightResponse):
+            # Claude finished after the deadline fallback was sent; replace it client-side
+            session.record_insight(late.nextMove)
+            await websocket.send_json({
+                "type": "insight_upgrade",
+                "viewerDelta": request.viewerDelta,
+                "viewerCount": request.viewerCount,
+                **late.model_dump(),
+            })
+
+        deadline_ms = session.settings.deadlineMs
+        insight = await produce_insight(
+            request, deadline_s=deadline_ms / 1000 if deadline_ms > 0 else None, on_late=upgrade,
+            speculate=session.settings.speculate,
         )
+        if insight.source == "fallback_cancelled":
+            return  # superseded by a newer trigger for this session
+        session.record_insight(insight.nextMove)
+        await websocket.send_json({
+            "type": "insight",
+            "viewerDelta": request.viewerDelta,
+            "viewerCount": request.viewerCount,
+            **insight.model_dump(),
+        })
+
+    await websocket.send_json({"type": "ready", "sessionId": session.session_id, "config": session.settings.model_dump()})
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                message = json.loads(raw)
+                if not isinstance(message, dict):
+                    raise ValueError("message must be a JSON object")
+                kind = message.get("type")
+                if kind == "transcript":
+                    segment = session.add_transcript(message.get("text", ""), message.get("conf"))
+                    if segment and session.settings.speculate:
+                        speculate_on_segment(session, segment)
+                elif kind == "viewers":
+                    count = int(message["count"])
+                    prev = session.viewer_count
+                    trigger = session.add_viewer_count(count)
+                    if prev is not None:
+                        record_viewer_sample(session.session_id, count - prev, count)
+                    if trigger:
+                        task = asyncio.create_task(deliver(trigger))
+                        deliveries.add(task)
+                        task.add_done_callback(deliveries.discard)
+                elif kind == "chat":
+                    session.add_chat(message.get("text", ""))
+                elif kind == "config":
+                    settings = session.configure(**{k: v for k, v in message.items() if k != "type"})
+                    await websocket.send_json({"type": "config", "config": settings.model_dump()})
+                else:
+                    await websocket.send_json({"type": "error", "detail": f"Unknown message type: {kind}"})
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError, ValidationError) as e:
+                # A bad frame is the client's problem, not a reason to drop the session
+                detail = f"missing field {e}" if isinstance(e, KeyError) else str(e).splitlines()[0]
+                await websocket.send_json({"type": "error", "detail": f"Invalid message: {detail}"})
+    except WebSocketDisconnect:
+        logger.info(f"🔌 Session socket closed | Session: {session.session_id}")
+    finally:
+        socket_sessions.discard(session.session_id)
+        speculative_insights.discard(session.session_id)
+        for task in deliveries:
+            task.cancel()
+
+# ==================== SESSION TIMELINE ====================
+
+class TimelineBucket(BaseModel):
+    start: datetime
+    count: int  # viewer samples
+    minDelta: Optional[int] = None
+    maxDelta: Optional[int] = None
+    sumDelta: int = 0
+    insights: int = 0
+    topTopic: Optional[str] = None
+
+class TimelineResponse(BaseModel):
+    sessionId: str
+    resolution: str
+    buckets: List[TimelineBucket]
+
+@api_router.get("/sessions/{session_id}/timeline", response_model=TimelineResponse)
+async def get_session_timeline(session_id: str, resolution: str = "1m"):
+    """
+    Viewer-delta and insight timeline for SessionRecap, read from the pre-aggregated rollups
+    """
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=422, detail=f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    buckets = await timeline_rollups.read(session_id, resolution)
+    return TimelineResponse(
+        sessionId=session_id,
+        resolution=resolution,
+        buckets=[
+            TimelineBucket(
+                start=datetime.utcfromtimestamp(start),
+                count=bucket.count,
+                minDelta=bucket.min_delta,
+                maxDelta=bucket.max_delta,
+                sumDelta=bucket.sum_delta,
+                insights=bucket.insights,
+                topTopic=bucket.top_topic(),
+            )
+            for start, bucket in buckets
+        ],
+    )
 
 # ==================== HUME AI EMOTION ANALYSIS ====================
 
 class HumeAnalysisRequest(BaseModel):
-    text: str
+    # Blank text can't be scored, and one blank entry fails a whole upstream batch
+    text: str = Field(min_length=1, pattern=r'\S')
 
 class HumeAnalysisResponse(BaseModel):
     emotion: str
     score: float
     confidence: int
+    source: str = "hume"
+
+HUME_ANALYZE_URL = os.getenv(
+    'HUME_ANALYZE_URL', "https://hnvdovyiapkkjrxcxbrv.supabase.co/functions/v1/hume-analyze-text"
+)
+
+# Emotion results keyed by normalized text hash; chat and transcript text repeats a lot
+hume_cache: TTLCache[HumeAnalysisResponse] = TTLCache(
+    'hume',
+    maxsize=int(os.getenv('HUME_CACHE_SIZE', '2048')),
+    ttl=float(os.getenv('HUME_CACHE_TTL_S', '600')),
+)
 
-@api_router.post("/analyze-emotion", response_model=HumeAnalysisResponse)
-async def analyze_emotion(request: HumeAnalysisRequest):
+# Requests arriving within a few ms share one upstream call
+hume_batcher = HumeBatcher(
+    HUME_ANALYZE_URL,
+    upstream.hume,
+    window_s=float(os.getenv('HUME_BATCH_WINDOW_MS', '5')) / 1000,
+    max_batch=int(os.getenv('HUME_BATCH_MAX', '16')),
+)
+
+# How long to wait for Hume before answering from the local lexicon scorer. The ceiling is the
+# old 5s request timeout: hume-analyze-text sleeps 500ms before its first poll, so a fixed
+# sub-second budget would hedge most healthy calls. Once enough calls are measured the budget
+# tightens to their p95 bucket, so only the slow tail is answered locally.
+HUME_HEDGE_BUDGET_S = float(os.getenv('HUME_HEDGE_BUDGET_MS', '5000')) / 1000
+HUME_HEDGE_MIN_SAMPLES = int(os.getenv('HUME_HEDGE_MIN_SAMPLES', '200'))
+HUME_HEDGE_QUANTILE = float(os.getenv('HUME_HEDGE_QUANTILE', '0.95'))
+emotion_classifier = LexiconEmotionClassifier()
+
+EMOTION_RESULTS = REGISTRY.counter(
+    'spikely_emotion_results_total',
+    'Emotion analysis results by source (cache, hume, local_hedge, local_fallback, fallback)',
+    ('source',),
+)
+
+def hume_hedge_budget() -> float:
+    """Measured p95 of Hume calls, capped at HUME_HEDGE_BUDGET_S; the cap until there are enough samples."""
+    bounds = [
+        HUME_LATENCY.quantile(HUME_HEDGE_QUANTILE, kind=kind)
+        for kind in ('batch', 'single')
+        if HUME_LATENCY.count(kind=kind) >= HUME_HEDGE_MIN_SAMPLES
+    ]
+    return min([HUME_HEDGE_BUDGET_S] + bounds)
+
+def local_emotion(text: str, source: str) -> HumeAnalysisResponse:
+    local = emotion_classifier.classify([text])[0]
+    return HumeAnalysisResponse(
+        emotion=local.emotion, score=local.score, confidence=local.confidence, source=source
+    )
+
+async def _remote_emotion(text: str, key: str) -> HumeAnalysisResponse:
+    # Call Hume AI via the Supabase function, micro-batched on the pooled client
+    data = await hume_batcher.analyze(text)
+    result = HumeAnalysisResponse(
+        emotion=data.get("emotion", "Neutral"),
+        score=data.get("score", 0.5),
+        confidence=int(data.get("confidence", 50))
+    )
+    # Cached even when it lands after the hedge answered, so the next ask is a hit
+    hume_cache.set(key, result)
+    return result
+
+def _consume_exception(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"⚠️ Late Hume analysis failed: {task.exception()}")
+
+# Validated by hand like InsightRequest; nothing else references the model, so its schema is inlined
+_HUME_REQUEST_BODY = {"requestBody": {"required": True, "content": {
+    "application/json": {"schema": HumeAnalysisRequest.model_json_schema()}
+}}}
+
+@api_router.post("/analyze-emotion", response_model=HumeAnalysisResponse, openapi_extra=_HUME_REQUEST_BODY)
+async def analyze_emotion(raw_request: Request):
     """
     Analyze emotion in text using Hume AI (migrated from Supabase)
     """
+    request = await validated_body(raw_request, HumeAnalysisRequest, stage=None)
+    return model_response(await analyze_text_emotion(request))
+
+async def analyze_text_emotion(request: HumeAnalysisRequest) -> HumeAnalysisResponse:
     try:
+        key = text_key(request.text)
+        cached = hume_cache.get(key)
+        if cached is not None:
+            EMOTION_RESULTS.inc(source='cache')
+            return cached
+
         logger.info(f"🎭 Analyzing emotion for text: {request.text[:50]}...")
-        
-        # Call Hume AI via original Supabase function (for now)
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://hnvdovyiapkkjrxcxbrv.supabase.co/functions/v1/hume-analyze-text",
-                headers={"Content-Type": "application/json"},
-                json={"text": request.text},
-                timeout=5.0  # 5 second timeout
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(status_code=response.status_code, detail="Hume AI request failed")
-            
-            data = response.json()
-            
-            result = HumeAnalysisResponse(
-                emotion=data.get("emotion", "Neutral"),
-                score=data.get("score", 0.5),
-                confidence=int(data.get("confidence", 50))
-            )
-            
+
+        # Hedge: give Hume the budget, then answer locally and let the remote call finish into the cache
+        remote = asyncio.ensure_future(_remote_emotion(request.text, key))
+        budget = hume_hedge_budget()
+        done, _ = await asyncio.wait({remote}, timeout=budget)
+        if not done:
+            remote.add_done_callback(_consume_exception)
+            result = local_emotion(request.text, source="local_hedge")
+            logger.info(f"⏱️ Hume over {budget * 1000:.0f}ms budget - local analysis: {result.emotion} ({result.confidence}%)")
+        elif remote.exception() is not None:
+            logger.error(f"❌ Hume analysis error: {remote.exception()}")
+            result = local_emotion(request.text, source="local_fallback")
+        else:
+            result = remote.result()
             logger.info(f"✅ Hume analysis complete: {result.emotion} ({result.confidence}%)")
-            return result
+
+        EMOTION_RESULTS.inc(source=result.source)
+        return result
             
     except Exception as e:
         logger.error(f"❌ Hume analysis error: {str(e)}")
@@ -613,7 +1494,8 @@ async def analyze_emotion(request: HumeAnalysisRequest):
         return HumeAnalysisResponse(
             emotion="Neutral",
             score=0.5,
-            confidence=0
+            confidence=0,
+            source="fallback"
         )
 
 # ==================== END CORRELATION ENGINE ====================
@@ -621,13 +1503,26 @@ async def analyze_emotion(request: HumeAnalysisRequest):
 # Include the router in the main app
 app.include_router(api_router)
 
+# Bodies read with validated_body are only $ref'd from openapi_extra, so FastAPI never adds
+# their models to the components; add them (and the models they nest) to the generated schema
+_HAND_VALIDATED_BODIES = (InsightRequest, InsightBatchRequest)
+_generate_openapi = app.openapi
+
+def openapi() -> Dict[str, Any]:
+    if app.openapi_schema is None:
+        schemas = _generate_openapi().setdefault("components", {}).setdefault("schemas", {})
+        for model in _HAND_VALIDATED_BODIES:
+            schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+            for name, definition in schema.pop("$defs", {}).items():
+                schemas.setdefault(name, definition)
+            schemas.setdefault(model.__name__, schema)
+    return app.openapi_schema
+
+app.openapi = openapi
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
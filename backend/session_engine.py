@@ -0,0 +1,163 @@
+"""
+Server-side correlation engine for streaming sessions (/api/ws/session).
+
+Mirrors the extension's correlationService: the client streams transcript
+lines, viewer counts and chat events; SessionCorrelator keeps the session
+context and decides when a viewer delta should trigger an insight (delta
+threshold, cooldown, segment window, duplicate hash). The insight request it
+produces carries the same fields the client used to assemble for every POST.
+"""
+import hashlib
+import re
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from segmenter import TranscriptSegmenter
+
+CHAT_WINDOW_S = 30.0
+HISTORY_SIZE = 7
+RECENT_INSIGHTS_SIZE = 5
+
+_CHAT_STOPWORDS = {
+    'this', 'that', 'with', 'have', 'what', 'your', 'just', 'like', 'from',
+    'they', 'will', 'would', 'there', 'about', 'been', 'were', 'when', 'cant',
+}
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+class CorrelationSettings(BaseModel):
+    """Tunables the client can override with a `config` message"""
+    minDelta: int = 3
+    cooldownMs: int = 20000
+    windowMs: int = 25000
+    minWords: int = 5
+    # Insight latency budget; 0 waits for Claude, otherwise late answers arrive as insight_upgrade
+    deadlineMs: int = 0
+    # Pre-generate spike/drop candidates for each finished segment (costs extra Claude calls)
+    speculate: bool = False
+
+
+class SessionCorrelator:
+    """Holds one session's stream state and emits insight triggers."""
+
+    def __init__(self, session_id: str, settings: Optional[CorrelationSettings] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.session_id = session_id
+        self.settings = settings or CorrelationSettings()
+        self._clock = clock
+        self.segmenter = TranscriptSegmenter(min_words=self.settings.minWords)
+        self.chat: Deque[Tuple[float, str]] = deque()
+        self.viewer_count: Optional[int] = None
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=HISTORY_SIZE)
+        self.recent_insights: Deque[str] = deque(maxlen=RECENT_INSIGHTS_SIZE)
+        self.last_insight_at: Optional[float] = None
+        self.last_insight_hash = ''
+
+    def configure(self, **overrides: Any) -> CorrelationSettings:
+        known = {k: v for k, v in overrides.items() if k in CorrelationSettings.model_fields}
+        self.settings = CorrelationSettings(**{**self.settings.model_dump(), **known})
+        self.segmenter.min_words = self.settings.minWords
+        return self.settings
+
+    def add_transcript(self, text: str, conf: Optional[float] = None) -> Optional[str]:
+        """Add a transcript line; returns the text of the segment it closed, if any."""
+        segment = self.segmenter.push(self._clock(), text or '', conf)
+        return segment.text if segment else None
+
+    def add_chat(self, text: str) -> None:
+        now = self._clock()
+        self.chat.append((now, text))
+        self._trim_chat(now)
+
+    def record_insight(self, next_move: str) -> None:
+        self.recent_insights.append(next_move)
+
+    def recent_segment(self, now: Optional[float] = None) -> Optional[str]:
+        """Text of the most recent segment within the correlation window."""
+        now = self._clock() if now is None else now
+        segment = self.segmenter.latest(now, self.settings.windowMs / 1000)
+        return segment.text if segment else None
+
+    def add_viewer_count(self, count: int) -> Optional[Dict[str, Any]]:
+        """Record a viewer sample; return InsightRequest fields if it should trigger an insight."""
+        now = self._clock()
+        prev = self.viewer_count
+        self.viewer_count = count
+        if prev is None:
+            return None
+
+        delta = count - prev
+        if abs(delta) < self.settings.minDelta:
+            return None
+        if self.last_insight_at is not None and (now - self.last_insight_at) * 1000 < self.settings.cooldownMs:
+            return None
+
+        segment = self.recent_segment(now)
+        if segment is None:
+            return None
+
+        segment_hash = hashlib.blake2b(f"{segment}\x1f{delta}".encode('utf-8'), digest_size=8).hexdigest()
+        if segment_hash == self.last_insight_hash:
+            return None
+
+        self.last_insight_at = now
+        self.last_insight_hash = segment_hash
+        request = self._request_fields(segment, delta, count, prev, now)
+        self.history.append({'delta': delta})
+        return request
+
+    def speculative_requests(self, segment: str, magnitude: int) -> Dict[int, Dict[str, Any]]:
+        """
+        Request fields for a hypothetical +magnitude and -magnitude delta on
+        `segment`, keyed by delta; empty when no trigger can use the segment
+        (no viewer count yet, or the cooldown outlasts the correlation window).
+        """
+        if self.viewer_count is None:
+            return {}
+        now = self._clock()
+        if (self.last_insight_at is not None
+                and (now - self.last_insight_at) * 1000 + self.settings.windowMs <= self.settings.cooldownMs):
+            return {}
+        count = self.viewer_count
+        return {
+            delta: self._request_fields(segment, delta, count + delta, count, now)
+            for delta in (magnitude, -magnitude)
+        }
+
+    def _request_fields(self, segment: str, delta: int, count: int, prev: int, now: float) -> Dict[str, Any]:
+        return {
+            'transcript': segment,
+            'viewerDelta': delta,
+            'viewerCount': count,
+            'prevCount': prev,
+            'recentHistory': list(self.history),
+            'recentInsights': list(self.recent_insights),
+            'chatData': self.chat_summary(now),
+            'sessionId': self.session_id,
+        }
+
+    def chat_summary(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        now = self._clock() if now is None else now
+        self._trim_chat(now)
+        if not self.chat:
+            return None
+        words = Counter(
+            word
+            for _, text in self.chat
+            for word in _WORD_RE.findall(text.lower())
+            if len(word) > 3 and word not in _CHAT_STOPWORDS
+        )
+        return {
+            'commentCount': len(self.chat),
+            'chatRate': int(len(self.chat) * 60 / CHAT_WINDOW_S),
+            'topKeywords': [word for word, _ in words.most_common(5)],
+            'recentComments': [text for _, text in list(self.chat)[-3:]],
+        }
+
+    def _trim_chat(self, now: float) -> None:
+        cutoff = now - CHAT_WINDOW_S
+        while self.chat and self.chat[0][0] < cutoff:
+            self.chat.popleft()
@@ -0,0 +1,116 @@
+"""
+Per-session single-flight for upstream calls.
+
+A session has at most one upstream call in flight. Requests with the same key
+join that call instead of starting a new one; a request with a different key
+supersedes it and the old call is cancelled. Waiters that go away (client
+disconnect) stop waiting, and the upstream call is cancelled once nobody is
+left waiting for it.
+"""
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+FLIGHT_EVENTS = REGISTRY.counter(
+    'spikely_single_flight_events_total',
+    'Single-flight outcomes (started, coalesced, superseded, abandoned)',
+    ('event',),
+)
+FLIGHTS_IN_PROGRESS = REGISTRY.gauge(
+    'spikely_single_flight_in_progress',
+    'Upstream calls currently in flight across sessions',
+)
+
+DISCONNECT_POLL_S = 0.25
+
+_anonymous_ids = itertools.count()
+
+
+class InsightCancelled(Exception):
+    """Raised to a waiter whose upstream call was superseded or abandoned."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Upstream call cancelled: {reason}")
+        self.reason = reason
+
+
+class _Flight(Generic[T]):
+    def __init__(self, key: str, task: 'asyncio.Task[T]'):
+        self.key = key
+        self.task = task
+        self.waiters = 0
+        self.superseded = False
+
+
+class SingleFlight:
+    """Coalesces and cancels upstream calls per session id."""
+
+    def __init__(self, disconnect_poll_s: float = DISCONNECT_POLL_S):
+        self.disconnect_poll_s = disconnect_poll_s
+        self._flights: Dict[str, _Flight] = {}
+        FLIGHTS_IN_PROGRESS.set_function(lambda: len(self._flights))
+
+    def in_flight(self, session_id: str) -> bool:
+        flight = self._flights.get(session_id)
+        return flight is not None and not flight.task.done()
+
+    async def run(
+        self,
+        session_id: Optional[str],
+        key: str,
+        factory: Callable[[], Awaitable[T]],
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> T:
+        """Run factory() as the session's single flight, or join the one already running.
+
+        Without a session id the call still gets disconnect-driven cancellation,
+        it just never coalesces with anything.
+        """
+        if session_id is None:
+            session_id = f"anonymous-{next(_anonymous_ids)}"
+
+        flight = self._flights.get(session_id)
+        if flight is not None and flight.key == key and not flight.task.done():
+            FLIGHT_EVENTS.inc(event='coalesced')
+            logger.info(f"🔗 Joined in-flight insight | Session: {session_id}")
+        else:
+            if flight is not None and not flight.task.done():
+                flight.superseded = True
+                flight.task.cancel()
+                FLIGHT_EVENTS.inc(event='superseded')
+                logger.info(f"✂️ Superseded in-flight insight | Session: {session_id}")
+            flight = _Flight(key, asyncio.create_task(factory()))
+            flight.task.add_done_callback(lambda _task, sid=session_id, f=flight: self._forget(sid, f))
+            self._flights[session_id] = flight
+            FLIGHT_EVENTS.inc(event='started')
+
+        flight.waiters += 1
+        try:
+            return await self._wait(flight, is_disconnected)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                FLIGHT_EVENTS.inc(event='abandoned')
+
+    async def _wait(self, flight: _Flight, is_disconnected) -> T:
+        while True:
+            timeout = self.disconnect_poll_s if is_disconnected else None
+            done, _ = await asyncio.wait({flight.task}, timeout=timeout)
+            if done:
+                if flight.task.cancelled():
+                    raise InsightCancelled('superseded' if flight.superseded else 'abandoned')
+                return flight.task.result()
+            if await is_disconnected():
+                raise InsightCancelled('client disconnected')
+
+    def _forget(self, session_id: str, flight: _Flight) -> None:
+        if self._flights.get(session_id) is flight:
+            del self._flights[session_id]
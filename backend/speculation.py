@@ -0,0 +1,131 @@
+"""
+Speculative insight candidates for streaming sessions.
+
+When a session finalizes a transcript segment, the likely outcomes (a spike
+and a drop) are sent to Claude in the background before any viewer delta has
+arrived. If the next trigger matches the segment and one of those categories,
+and its real delta is within `max_delta_error` of the one the candidate
+assumed, the candidate is served at once (or joined while still in flight)
+instead of starting a fresh round trip. Candidates for an older segment, the
+category that did not happen, a delta too far off, a trigger that went away
+while waiting, or a closed session are cancelled and counted as waste.
+A global cap on in-flight candidates keeps speculation from crowding out real
+calls: past it, new segments are simply not speculated on.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+Candidate = Tuple[int, asyncio.Task]  # (assumed viewer delta, generation task)
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CANDIDATES = REGISTRY.counter(
+    'spikely_speculative_candidates_total',
+    'Speculative insight candidates by outcome (started, skipped, hit, hit_pending, wasted, failed); '
+    'waste rate = wasted / started',
+    ('outcome',),
+)
+TRIGGERS = REGISTRY.counter(
+    'spikely_speculative_triggers_total',
+    'Insight triggers in speculating sessions by outcome (hit, miss); hit rate = hit / (hit + miss)',
+    ('outcome',),
+)
+IN_FLIGHT = REGISTRY.gauge(
+    'spikely_speculative_in_flight',
+    'Speculative candidates currently being generated',
+)
+
+
+class SpeculativeInsights:
+    """Per-session candidates for the latest segment, keyed by delta category."""
+
+    def __init__(self, generate: Callable[[Dict[str, Any]], Awaitable[Any]], max_in_flight: int = 4,
+                 max_delta_error: int = 3):
+        self.generate = generate
+        self.max_in_flight = max_in_flight
+        self.max_delta_error = max_delta_error
+        self._sessions: Dict[str, Tuple[str, Dict[str, Candidate]]] = {}
+        self._in_flight = 0
+        IN_FLIGHT.set_function(lambda: self._in_flight)
+
+    def speculate(self, session_id: str, segment: str, requests: Dict[str, Tuple[int, Dict[str, Any]]]) -> int:
+        """
+        Replace the session's candidates with new ones for `segment`;
+        `requests` maps category -> (assumed delta, request fields). Returns how many started.
+        """
+        self.discard(session_id)
+        tasks: Dict[str, Candidate] = {}
+        for category, (delta, fields) in requests.items():
+            if self._in_flight >= self.max_in_flight:
+                CANDIDATES.inc(outcome='skipped')
+                continue
+            self._in_flight += 1
+            task = asyncio.create_task(self.generate(fields))
+            # Not a `finally` in the coroutine: a task cancelled before it first runs never executes its body
+            task.add_done_callback(self._finished)
+            tasks[category] = (delta, task)
+            CANDIDATES.inc(outcome='started')
+        if tasks:
+            self._sessions[session_id] = (segment, tasks)
+        return len(tasks)
+
+    async def take(self, session_id: str, segment: str, category: str, delta: int) -> Optional[Any]:
+        """The candidate for this trigger, waiting for it if still in flight; None on a miss."""
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return None
+        candidate_segment, tasks = entry
+        candidate = tasks.pop(category, None) if candidate_segment == segment else None
+        if candidate is not None and abs(delta - candidate[0]) > self.max_delta_error:
+            tasks[category] = candidate  # written for a different swing; wasted with the rest
+            candidate = None
+        self._waste(tasks)
+        if candidate is None:
+            TRIGGERS.inc(outcome='miss')
+            return None
+
+        task = candidate[1]
+        ready = task.done()
+        try:
+            # Shielded, so a candidate that already finished is not lost to a racing cancel
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                # This trigger went away (superseded, disconnected); nobody else can take the candidate
+                task.cancel()
+                CANDIDATES.inc(outcome='wasted')
+                raise
+            result = None
+        except Exception as e:
+            logger.info(f"🔮 Speculative candidate failed | Session: {session_id} | {e}")
+            result = None
+        if result is None:
+            CANDIDATES.inc(outcome='failed')
+            TRIGGERS.inc(outcome='miss')
+            return None
+        CANDIDATES.inc(outcome='hit' if ready else 'hit_pending')
+        TRIGGERS.inc(outcome='hit')
+        return result
+
+    def discard(self, session_id: str) -> None:
+        """Drop a session's candidates (new segment, session closed)."""
+        entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            self._waste(entry[1])
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._in_flight -= 1
+        if not task.cancelled():
+            task.exception()  # retrieved, so a failed candidate nobody took isn't logged as unhandled
+
+    @staticmethod
+    def _waste(tasks: Dict[str, Candidate]) -> None:
+        for _, task in tasks.values():
+            task.cancel()
+            CANDIDATES.inc(outcome='wasted')
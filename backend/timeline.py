@@ -0,0 +1,195 @@
+"""
+Per-session timeline rollups for the recap view.
+
+Viewer samples and insight events are folded into 10s / 1m / 5m buckets in
+memory (count, min/max/sum of viewer deltas, insight count, topic counts) and
+flushed to Mongo as `$inc`/`$min`/`$max` upserts, so a timeline read is one
+indexed query over at most a few thousand bucket documents instead of a scan
+of raw events. Buckets not yet flushed are merged into reads.
+"""
+import asyncio
+import calendar
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from write_behind import FLUSH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = {'10s': 10, '1m': 60, '5m': 300}
+
+BucketKey = Tuple[str, str, int]  # (session_id, resolution, bucket start in epoch seconds)
+
+
+def _topic_field(topic: str) -> str:
+    # Mongo field names cannot contain '.' or start with '$'
+    return (topic or 'general').replace('.', '_').lstrip('$') or 'general'
+
+
+class Bucket:
+    """Aggregates for one time bucket; also used as a pending delta."""
+
+    __slots__ = ('count', 'sum_delta', 'min_delta', 'max_delta', 'insights', 'topics')
+
+    def __init__(self):
+        self.count = 0
+        self.sum_delta = 0
+        self.min_delta: Optional[int] = None
+        self.max_delta: Optional[int] = None
+        self.insights = 0
+        self.topics: Counter = Counter()
+
+    def add_delta(self, delta: int) -> None:
+        self.count += 1
+        self.sum_delta += delta
+        self.min_delta = delta if self.min_delta is None else min(self.min_delta, delta)
+        self.max_delta = delta if self.max_delta is None else max(self.max_delta, delta)
+
+    def merge(self, other: 'Bucket') -> None:
+        self.count += other.count
+        self.sum_delta += other.sum_delta
+        if other.min_delta is not None:
+            self.min_delta = other.min_delta if self.min_delta is None else min(self.min_delta, other.min_delta)
+        if other.max_delta is not None:
+            self.max_delta = other.max_delta if self.max_delta is None else max(self.max_delta, other.max_delta)
+        self.insights += other.insights
+        self.topics.update(other.topics)
+
+    @classmethod
+    def from_document(cls, doc: Dict[str, Any]) -> 'Bucket':
+        bucket = cls()
+        bucket.count = doc.get('count', 0)
+        bucket.sum_delta = doc.get('sum_delta', 0)
+        bucket.min_delta = doc.get('min_delta')
+        bucket.max_delta = doc.get('max_delta')
+        bucket.insights = doc.get('insights', 0)
+        bucket.topics = Counter(doc.get('topics') or {})
+        return bucket
+
+    def update_document(self) -> Dict[str, Any]:
+        inc: Dict[str, int] = {'count': self.count, 'sum_delta': self.sum_delta, 'insights': self.insights}
+        inc.update({f"topics.{topic}": n for topic, n in self.topics.items()})
+        update: Dict[str, Any] = {'$inc': inc}
+        if self.min_delta is not None:
+            update['$min'] = {'min_delta': self.min_delta}
+            update['$max'] = {'max_delta': self.max_delta}
+        return update
+
+    def top_topic(self) -> Optional[str]:
+        return self.topics.most_common(1)[0][0] if self.topics else None
+
+
+class TimelineRollups:
+    """Accumulates timeline buckets in memory and flushes them to a rollup collection."""
+
+    def __init__(self, collection: Any, flush_interval_s: float = 2.0,
+                 clock: Callable[[], float] = time.time):
+        self.collection = collection
+        self.flush_interval_s = flush_interval_s
+        self._clock = clock
+        self._pending: Dict[BucketKey, Bucket] = {}
+        self._flushing: Dict[BucketKey, Bucket] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _buckets(self, session_id: str, ts: Optional[float]) -> Iterable[Bucket]:
+        ts = self._clock() if ts is None else ts
+        for resolution, width in RESOLUTIONS.items():
+            key = (session_id, resolution, int(ts // width) * width)
+            bucket = self._pending.get(key)
+            if bucket is None:
+                bucket = self._pending[key] = Bucket()
+            yield bucket
+
+    def record_viewers(self, session_id: str, delta: int, ts: Optional[float] = None) -> None:
+        for bucket in self._buckets(session_id, ts):
+            bucket.add_delta(delta)
+
+    def record_insight(self, session_id: str, topic: Optional[str], ts: Optional[float] = None) -> None:
+        field = _topic_field(topic)
+        for bucket in self._buckets(session_id, ts):
+            bucket.insights += 1
+            bucket.topics[field] += 1
+
+    async def read(self, session_id: str, resolution: str) -> List[Tuple[int, Bucket]]:
+        """All buckets for a session at one resolution, oldest first."""
+        buckets: Dict[int, Bucket] = {}
+        cursor = self.collection.find(
+            {'session_id': session_id, 'resolution': resolution},
+            {'_id': 0, 'session_id': 0, 'resolution': 0},
+        ).sort('bucket', 1)
+        async for doc in cursor:
+            buckets[calendar.timegm(doc['bucket'].utctimetuple())] = Bucket.from_document(doc)
+        for pending in (self._flushing, self._pending):
+            for (sid, res, start), delta in pending.items():
+                if sid == session_id and res == resolution:
+                    buckets.setdefault(start, Bucket()).merge(delta)
+        return sorted(buckets.items())
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def aclose(self, timeout_s: float = 5.0) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task  # a flush cut short puts its deltas back in _pending
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await asyncio.wait_for(self.flush(), timeout=timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Timeline rollups gave up with {len(self._pending)} buckets pending")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Upsert every pending bucket delta; deltas that were not applied are kept for the next flush."""
+        if not self._pending or self._flushing:
+            return 0
+        self._flushing, self._pending = self._pending, {}
+        keys = list(self._flushing)
+        operations = [
+            UpdateOne(
+                {'session_id': sid, 'resolution': res, 'bucket': datetime.utcfromtimestamp(start)},
+                self._flushing[(sid, res, start)].update_document(),
+                upsert=True,
+            )
+            for sid, res, start in keys
+        ]
+        started = time.perf_counter()
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            FLUSH_SECONDS.observe(time.perf_counter() - started, queue='timeline_rollups')
+            # Unordered: everything but the listed writeErrors was applied, so only those go back
+            failed = {error['index'] for error in e.details.get('writeErrors', [])}
+            self._restore(keys[i] for i in failed)
+            logger.error(f"❌ Timeline rollup flush partly failed | Buckets: {len(failed)}/{len(operations)} | {e}")
+            return len(operations) - len(failed)
+        except BaseException as e:
+            FLUSH_SECONDS.observe(time.perf_counter() - started, queue='timeline_rollups')
+            # Nothing is known to be applied (also when cancelled mid-write): keep every delta
+            self._restore(keys)
+            if not isinstance(e, Exception):
+                raise
+            logger.error(f"❌ Timeline rollup flush failed | Buckets: {len(operations)} | {e}")
+            return 0
+        FLUSH_SECONDS.observe(time.perf_counter() - started, queue='timeline_rollups')
+        self._flushing = {}
+        return len(operations)
+
+    def _restore(self, keys: Iterable[BucketKey]) -> None:
+        for key in keys:
+            self._pending.setdefault(key, Bucket()).merge(self._flushing[key])
+        self._flushing = {}
@@ -0,0 +1,97 @@
+"""
+Server-side topic and keyword classifier.
+
+The extension's classifyTopic() runs one regex per topic and returns the first
+that matches anywhere in the lowercased text (so "rep" fires on "report").
+Here every vocabulary is compiled into a single alternation with one named
+group per topic and word boundaries on both ends; one finditer pass over the
+transcript yields per-topic hit counts and the matched keywords. The topic
+with the most hits wins; ties go to the earlier topic in TOPIC_VOCABULARIES.
+That order keeps the client's precedence for the topics it knows
+(interaction, food, fitness, finance, personal) and slots the server-only
+gaming, makeup and music ahead of personal, which is the catch-all.
+
+A trailing `*` on a term allows any word suffix ("cook*" matches "cooking").
+"""
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+GENERAL = 'general'
+
+# Precedence order for ties: the client's order, server-only topics before personal
+TOPIC_VOCABULARIES: Dict[str, Sequence[str]] = {
+    'interaction': (
+        'comment*', 'follow*', 'subscrib*', 'sub', 'subs', 'like', 'likes', 'chat', 'instagram', 'ig',
+        'tell me', 'let me know', 'share', 'guys', 'drop a', 'shout out', 'shoutout', 'giveaway*', 'question*',
+    ),
+    'food': (
+        'food*', 'eat', 'eats', 'eating', 'meal*', 'recipe*', 'cook*', 'delicious', 'tast*', 'restaurant*',
+        'dish*', 'lunch', 'dinner', 'breakfast', 'garlic', 'pasta', 'sauce', 'bake*', 'baking', 'fry*', 'oven',
+    ),
+    'fitness': (
+        'workout*', 'exercis*', 'gym', 'fitness', 'train', 'training', 'reps', 'muscle*', 'cardio', 'weights',
+        'squat*', 'deadlift*', 'protein', 'health*', 'run', 'running',
+    ),
+    'finance': (
+        'money', 'invest*', 'stock*', 'crypto*', 'bitcoin', 'dollar*', 'price*', 'buy', 'sell', 'financ*',
+        'budget*', 'savings', 'trading', 'portfolio*',
+    ),
+    'gaming': (
+        'game*', 'gaming', 'gamer*', 'level*', 'boss', 'valorant', 'fortnite', 'minecraft', 'ranked', 'loot',
+        'respawn*', 'controller', 'fps', 'stream snip*', 'clutch*',
+    ),
+    'makeup': (
+        'makeup', 'make up', 'foundation', 'lipstick*', 'eyeliner*', 'mascara', 'blush', 'contour*',
+        'concealer*', 'skincare', 'brush*', 'palette*',
+    ),
+    'music': (
+        'song*', 'music*', 'guitar*', 'piano', 'sing*', 'beat*', 'album*', 'lyric*', 'melod*', 'drum*', 'playlist*',
+    ),
+    'personal': (
+        'feel*', 'think', 'believe', 'personal*', 'story', 'stories', 'experience*', 'life', 'journey',
+        'myself', 'emotion*', 'honestly', 'grew up',
+    ),
+}
+
+
+class TopicMatch(NamedTuple):
+    topic: str
+    keywords: List[str]  # distinct matched words, most frequent first
+    hits: Dict[str, int]
+
+
+def _term_pattern(term: str) -> str:
+    suffix = r'\w*' if term.endswith('*') else ''
+    words = term.rstrip('*').split()
+    return r'\s+'.join(re.escape(word) for word in words) + suffix
+
+
+def compile_vocabularies(vocabularies: Dict[str, Sequence[str]]) -> 're.Pattern[str]':
+    """One alternation, one named group per topic; longer terms first so phrases beat their prefixes."""
+    groups = []
+    for topic, terms in vocabularies.items():
+        alternatives = '|'.join(_term_pattern(t) for t in sorted(terms, key=len, reverse=True))
+        groups.append(f"(?P<{topic}>{alternatives})")
+    # Vocabularies are lowercase and callers lowercase the text: IGNORECASE makes matching ~3x slower
+    return re.compile(r"\b(?:" + '|'.join(groups) + r")\b")
+
+
+class TopicClassifier:
+    """Classifies a transcript into one topic in a single regex pass."""
+
+    def __init__(self, vocabularies: Optional[Dict[str, Sequence[str]]] = None):
+        self.vocabularies = dict(vocabularies or TOPIC_VOCABULARIES)
+        self._precedence = {topic: i for i, topic in enumerate(self.vocabularies)}
+        self._pattern = compile_vocabularies(self.vocabularies)
+
+    def classify(self, text: str, max_keywords: int = 5) -> TopicMatch:
+        hits: Counter = Counter()
+        keywords: Counter = Counter()
+        for match in self._pattern.finditer((text or '').lower()):
+            hits[match.lastgroup] += 1
+            keywords[' '.join(match.group().split())] += 1
+        if not hits:
+            return TopicMatch(GENERAL, [], {})
+        topic = min(hits, key=lambda t: (-hits[t], self._precedence[t]))
+        return TopicMatch(topic, [word for word, _ in keywords.most_common(max_keywords)], dict(hits))
@@ -0,0 +1,166 @@
+"""
+Opt-in recorder for insight traffic.
+
+`RecorderMiddleware` copies the raw body of selected POST requests, tagged with
+the wall-clock arrival time, into a `TrafficRecorder` without touching the
+request itself. The recorder sanitizes and appends them to a JSONL file from a
+background task, so the request path only pays for a deque append. Lines look
+like
+
+    {"ts": 1760000000.123, "path": "/api/generate-insight", "body": {...}}
+
+and are replayed, gaps preserved, by benchmarks/replay.py.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Iterable, List, Optional, Tuple
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+RECORDS = REGISTRY.counter(
+    'spikely_recorder_records_total',
+    'Requests seen by the traffic recorder by outcome (written, invalid, dropped)',
+    ('outcome',),
+)
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_URL_RE = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+_HANDLE_RE = re.compile(r"(?<!\w)@\w+")
+_DIGITS_RE = re.compile(r"\+?\d[\d ().-]{7,}\d")
+
+
+def scrub_text(text: str) -> str:
+    """Replace emails, URLs, @handles and phone-like numbers with placeholders."""
+    text = _EMAIL_RE.sub('<email>', text)
+    text = _URL_RE.sub('<url>', text)
+    text = _HANDLE_RE.sub('@user', text)
+    return _DIGITS_RE.sub('<number>', text)
+
+
+def pseudonym(value: str, salt: str) -> str:
+    """Stable per-salt stand-in for an identifier, so sessions stay grouped on replay."""
+    return 's_' + hashlib.blake2b(f"{salt}\x1f{value}".encode('utf-8'), digest_size=6).hexdigest()
+
+
+def sanitize(body: Any, salt: str, id_fields: Iterable[str] = ('sessionId',)) -> Any:
+    """Scrub every string in a JSON body and pseudonymize identifier fields."""
+    id_fields = frozenset(id_fields)
+
+    def walk(value: Any) -> Any:
+        if isinstance(value, str):
+            return scrub_text(value)
+        if isinstance(value, list):
+            return [walk(item) for item in value]
+        if isinstance(value, dict):
+            return {
+                key: pseudonym(item, salt) if key in id_fields and isinstance(item, str) else walk(item)
+                for key, item in value.items()
+            }
+        return value
+
+    return walk(body)
+
+
+class TrafficRecorder:
+    """Buffers captured request bodies and appends them, sanitized, to a JSONL file."""
+
+    def __init__(self, path: str, sanitize_body: Callable[[bytes], Optional[Any]],
+                 flush_interval_s: float = 1.0, max_queue: int = 10000):
+        self.path = Path(path)
+        self.sanitize_body = sanitize_body
+        self.flush_interval_s = flush_interval_s
+        self.max_queue = max_queue
+        self._queue: Deque[Tuple[float, str, bytes]] = deque()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def record(self, path: str, body: bytes, arrived: float) -> None:
+        """Queue a captured body; never blocks and never raises."""
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            RECORDS.inc(outcome='dropped')
+        self._queue.append((arrived, path, body))
+
+    def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"⏺️ Recording insight traffic to {self.path}")
+
+    async def aclose(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Sanitize and append everything queued; returns how many lines were written."""
+        batch = list(self._queue)
+        self._queue.clear()
+        if not batch:
+            return 0
+        try:
+            return await asyncio.to_thread(self._write, batch)
+        except Exception as e:
+            RECORDS.inc(len(batch), outcome='dropped')
+            logger.error(f"❌ Traffic recorder write failed | Records: {len(batch)} | {e}")
+            return 0
+
+    def _write(self, batch: List[Tuple[float, str, bytes]]) -> int:
+        lines = []
+        for arrived, path, raw in batch:
+            body = self.sanitize_body(raw)
+            if body is None:
+                RECORDS.inc(outcome='invalid')
+                continue
+            lines.append(json.dumps({'ts': round(arrived, 6), 'path': path, 'body': body}) + '\n')
+        if lines:
+            with self.path.open('a', encoding='utf-8') as f:
+                f.writelines(lines)
+            RECORDS.inc(len(lines), outcome='written')
+        return len(lines)
+
+
+class RecorderMiddleware:
+    """ASGI middleware that tees the bodies of POSTs to `paths` into a recorder."""
+
+    def __init__(self, app, recorder: TrafficRecorder, paths: Iterable[str]):
+        self.app = app
+        self.recorder = recorder
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'POST' or scope['path'] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        arrived = time.time()
+        chunks: List[bytes] = []
+
+        async def tee():
+            message = await receive()
+            if message['type'] == 'http.request':
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    self.recorder.record(scope['path'], b''.join(chunks), arrived)
+            return message
+
+        await self.app(scope, tee, send)
@@ -0,0 +1,111 @@
+"""
+Bounded in-process LRU cache with per-entry TTL.
+
+Used in front of expensive upstream calls (Claude insights, Hume analysis).
+Lookups and inserts are O(1) on an OrderedDict; expired entries are dropped
+lazily on access and evicted first when the cache is full. Hits, misses and
+evictions are exported per cache through the metrics registry.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from metrics import REGISTRY
+
+V = TypeVar('V')
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    'spikely_cache_lookups_total',
+    'Cache lookups by result',
+    ('cache', 'result'),
+)
+CACHE_EVICTIONS = REGISTRY.counter(
+    'spikely_cache_evictions_total',
+    'Cache entries removed before reuse, by reason (lru or expired)',
+    ('cache', 'reason'),
+)
+CACHE_SIZE = REGISTRY.gauge(
+    'spikely_cache_entries',
+    'Entries currently held in the cache',
+    ('cache',),
+)
+
+
+class TTLCache(Generic[V]):
+    """LRU cache whose entries also expire `ttl` seconds after being stored."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[float, V]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        CACHE_SIZE.set_function(lambda: len(self._entries), cache=name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._miss()
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self._expire()
+            self._miss()
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        CACHE_LOOKUPS.inc(cache=self.name, result='hit')
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        now = self._clock()
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = (now + self.ttl, value)
+        while len(self._entries) > self.maxsize:
+            # Oldest entry first; count it as expired if it already was
+            _, (expires_at, _) = self._entries.popitem(last=False)
+            if expires_at <= now:
+                self._expire()
+            else:
+                self.evictions += 1
+                CACHE_EVICTIONS.inc(cache=self.name, reason='lru')
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'name': self.name,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def _miss(self) -> None:
+        self.misses += 1
+        CACHE_LOOKUPS.inc(cache=self.name, result='miss')
+
+    def _expire(self) -> None:
+        self.expirations += 1
+        CACHE_EVICTIONS.inc(cache=self.name, reason='expired')
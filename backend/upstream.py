@@ -0,0 +1,151 @@
+"""
+App-scoped, pooled HTTP clients for the upstream services (Claude and Hume).
+
+Creating an AsyncAnthropic / httpx.AsyncClient per request costs a fresh TCP +
+TLS handshake every time. UpstreamClients owns one keep-alive pool per upstream
+for the lifetime of the app: it is opened from the FastAPI lifespan handler and
+closed on shutdown. Every pool reports how many requests it served and how many
+new connections it had to open, which gives the connection-reuse ratio.
+"""
+import logging
+import os
+from typing import Dict, Optional
+
+import httpx
+from anthropic import AsyncAnthropic
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+try:  # HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    'spikely_upstream_requests_total',
+    'Requests sent through a pooled upstream client',
+    ('upstream',),
+)
+UPSTREAM_NEW_CONNECTIONS = REGISTRY.counter(
+    'spikely_upstream_new_connections_total',
+    'New TCP connections opened by a pooled upstream client',
+    ('upstream',),
+)
+UPSTREAM_REUSE_RATIO = REGISTRY.gauge(
+    'spikely_upstream_connection_reuse_ratio',
+    'Share of upstream requests served on an already-open connection',
+    ('upstream',),
+)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class ConnectionStats:
+    """Counts requests vs. newly opened connections for one upstream pool."""
+
+    def __init__(self, upstream: str):
+        self.upstream = upstream
+        UPSTREAM_REUSE_RATIO.set_function(self.reuse_ratio, upstream=upstream)
+
+    @property
+    def requests(self) -> int:
+        return int(UPSTREAM_REQUESTS.value(upstream=self.upstream))
+
+    @property
+    def new_connections(self) -> int:
+        return int(UPSTREAM_NEW_CONNECTIONS.value(upstream=self.upstream))
+
+    def reuse_ratio(self) -> float:
+        requests = self.requests
+        if requests == 0:
+            return 0.0
+        return max(0.0, 1.0 - self.new_connections / requests)
+
+    async def on_request(self, request: httpx.Request) -> None:
+        UPSTREAM_REQUESTS.inc(upstream=self.upstream)
+        request.extensions['trace'] = self._trace
+
+    async def _trace(self, event_name: str, info: Dict) -> None:
+        if event_name == 'connection.connect_tcp.started':
+            UPSTREAM_NEW_CONNECTIONS.inc(upstream=self.upstream)
+
+
+def _build_http_client(stats: ConnectionStats, timeout: float, http2: bool) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=_env_int('UPSTREAM_MAX_CONNECTIONS', 100),
+        max_keepalive_connections=_env_int('UPSTREAM_MAX_KEEPALIVE', 20),
+        keepalive_expiry=_env_float('UPSTREAM_KEEPALIVE_EXPIRY', 60.0),
+    )
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=limits,
+        timeout=httpx.Timeout(timeout, connect=_env_float('UPSTREAM_CONNECT_TIMEOUT', 3.0)),
+        event_hooks={'request': [stats.on_request]},
+    )
+
+
+class UpstreamClients:
+    """Owns the pooled Claude and Hume clients for the app lifetime."""
+
+    def __init__(self):
+        self.claude_stats = ConnectionStats('claude')
+        self.hume_stats = ConnectionStats('hume')
+        self.claude_http: Optional[httpx.AsyncClient] = None
+        self.hume_http: Optional[httpx.AsyncClient] = None
+        self._anthropic: Optional[AsyncAnthropic] = None
+        self._anthropic_key: Optional[str] = None
+
+    @property
+    def started(self) -> bool:
+        return self.claude_http is not None
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        http2 = _env_bool('UPSTREAM_HTTP2', True) and HTTP2_AVAILABLE
+        self.claude_http = _build_http_client(self.claude_stats, _env_float('CLAUDE_TIMEOUT', 30.0), http2)
+        self.hume_http = _build_http_client(self.hume_stats, _env_float('HUME_TIMEOUT', 5.0), http2)
+        logger.info(f"🔌 Upstream pools ready | HTTP/2: {http2}")
+
+    async def aclose(self) -> None:
+        if self.claude_http is not None:
+            await self.claude_http.aclose()
+        if self.hume_http is not None:
+            await self.hume_http.aclose()
+        self.claude_http = None
+        self.hume_http = None
+        self._anthropic = None
+        self._anthropic_key = None
+
+    def anthropic(self, api_key: str) -> AsyncAnthropic:
+        """Return the shared AsyncAnthropic client, rebuilt only if the key changes."""
+        if self.claude_http is None:
+            raise RuntimeError("Upstream clients are not started")
+        if self._anthropic is None or self._anthropic_key != api_key:
+            self._anthropic = AsyncAnthropic(api_key=api_key, http_client=self.claude_http)
+            self._anthropic_key = api_key
+        return self._anthropic
+
+    def hume(self) -> httpx.AsyncClient:
+        if self.hume_http is None:
+            raise RuntimeError("Upstream clients are not started")
+        return self.hume_http
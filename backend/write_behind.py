@@ -0,0 +1,137 @@
+"""
+Write-behind queue for MongoDB.
+
+Request handlers `put()` documents and return immediately; a background task
+drains the queue with `insert_many` whenever `max_batch` documents are waiting
+or `flush_interval_s` has passed. If Mongo is down the queue is bounded: the
+oldest documents are dropped (and counted) rather than growing without limit.
+
+`update()` queues an UpdateOne behind the inserts, e.g. to amend a document
+that is still queued or already written. A batch holding updates is sent as
+one ordered bulk_write so an insert always lands before its own update.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Union
+
+from pymongo import InsertOne, UpdateOne
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    'spikely_mongo_queue_depth',
+    'Documents waiting in a write-behind queue',
+    ('queue',),
+)
+FLUSHES = REGISTRY.counter(
+    'spikely_mongo_flushes_total',
+    'insert_many / bulk_write flushes by outcome (ok, error)',
+    ('queue', 'outcome'),
+)
+FLUSH_SECONDS = REGISTRY.histogram(
+    'spikely_mongo_flush_seconds',
+    'Mongo write latency per flush (insert_many / bulk_write)',
+    ('queue',),
+)
+DOCUMENTS = REGISTRY.counter(
+    'spikely_mongo_documents_total',
+    'Documents handled by write-behind queues (written, dropped_overflow, dropped_error)',
+    ('queue', 'outcome'),
+)
+
+
+class WriteBehindQueue:
+    """Buffers documents for one collection and flushes them in batches."""
+
+    def __init__(self, name: str, collection: Any, max_batch: int = 100,
+                 flush_interval_s: float = 1.0, max_queue: int = 10000):
+        self.name = name
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval_s = flush_interval_s
+        self.max_queue = max_queue
+        self._queue: Deque[Union[Dict[str, Any], UpdateOne]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        QUEUE_DEPTH.set_function(lambda: len(self._queue), queue=name)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def put(self, document: Dict[str, Any]) -> None:
+        """Queue a document; never blocks and never raises."""
+        self._append(document)
+
+    def update(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> None:
+        """Queue an update_one, applied after everything queued before it."""
+        self._append(UpdateOne(filter, update, upsert=upsert))
+
+    def _append(self, item: Union[Dict[str, Any], UpdateOne]) -> None:
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            DOCUMENTS.inc(queue=self.name, outcome='dropped_overflow')
+        self._queue.append(item)
+        if len(self._queue) >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def aclose(self, timeout_s: float = 5.0) -> None:
+        """Stop the flusher and try to write whatever is still queued."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Write-behind '{self.name}' gave up with {len(self._queue)} documents queued")
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._queue:
+                await self.flush()
+                if len(self._queue) < self.max_batch and not self._closing:
+                    break
+            if self._closing:
+                return
+
+    async def flush(self) -> int:
+        """Write up to `max_batch` queued documents; returns how many were written."""
+        batch: List[Union[Dict[str, Any], UpdateOne]] = []
+        while self._queue and len(batch) < self.max_batch:
+            batch.append(self._queue.popleft())
+        if not batch:
+            return 0
+        started = time.perf_counter()
+        try:
+            if all(isinstance(item, dict) for item in batch):
+                await self.collection.insert_many(batch, ordered=False)
+            else:
+                await self.collection.bulk_write(
+                    [InsertOne(item) if isinstance(item, dict) else item for item in batch], ordered=True
+                )
+        except Exception as e:
+            FLUSHES.inc(queue=self.name, outcome='error')
+            DOCUMENTS.inc(len(batch), queue=self.name, outcome='dropped_error')
+            logger.error(f"❌ Mongo write-behind flush failed | Queue: {self.name} | Docs: {len(batch)} | {e}")
+            return 0
+        finally:
+            FLUSH_SECONDS.observe(time.perf_counter() - started, queue=self.name)
+        FLUSHES.inc(queue=self.name, outcome='ok')
+        DOCUMENTS.inc(len(batch), queue=self.name, outcome='written')
+        return len(batch)
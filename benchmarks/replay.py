@@ -0,0 +1,176 @@
+"""
+Replay recorded insight traffic against the backend.
+
+Reads a JSONL file written by the app's traffic recorder (INSIGHT_RECORD_PATH)
+line by line and sends each request at its recorded offset from the first one,
+divided by --speed, so bursts (a viewer dump firing many triggers at once)
+arrive as they did live. --speed max ignores the gaps and sends as fast as
+--max-in-flight allows.
+
+    python benchmarks/replay.py traffic.jsonl                  # 1x, starts stand-in + app
+    python benchmarks/replay.py traffic.jsonl --speed 4 --app-url http://127.0.0.1:8001
+    python benchmarks/replay.py traffic.jsonl --speed max --output replay.json
+
+Like run_load.py, latency is measured from each request's scheduled send time.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+import run_load
+from run_load import Sample, git_commit, start_processes, summarize, wait_ready
+from standin import add_profile_args
+
+STREAM_PATH = "/api/generate-insight/stream"
+run_load.PRIMARY_SOURCES.setdefault("insight_stream", {"claude"})
+
+
+def read_records(path: str, limit: Optional[int] = None) -> Iterator[Tuple[float, str, Dict[str, Any]]]:
+    """(ts, path, body) per line; the file is streamed, never loaded whole."""
+    with open(path, encoding="utf-8") as f:
+        count = 0
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield record["ts"], record.get("path", "/api/generate-insight"), record["body"]
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+
+def stream_source(text: str) -> Optional[str]:
+    """Source of the final `insight` event in an SSE response body."""
+    for frame in reversed(text.split("\n\n")):
+        if frame.startswith("event: insight\n"):
+            return json.loads(frame.split("data: ", 1)[1]).get("source")
+    return None
+
+
+class Replay:
+    def __init__(self, client: httpx.AsyncClient, speed: Optional[float], max_in_flight: int):
+        self.client = client
+        self.speed = speed
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.samples: List[Sample] = []
+        self.send_lag: List[float] = []
+
+    async def one(self, path: str, body: Dict[str, Any], scheduled: float) -> None:
+        endpoint = "insight_stream" if path == STREAM_PATH else "insight"
+        status, source = 0, None
+        try:
+            response = await self.client.post(path, json=body)
+            status = response.status_code
+            if status == 200:
+                source = stream_source(response.text) if endpoint == "insight_stream" else response.json().get("source")
+        except httpx.HTTPError:
+            pass
+        finally:
+            self.slots.release()
+        self.samples.append((endpoint, scheduled, time.perf_counter() - scheduled, status, source))
+
+    async def run(self, records: Iterator[Tuple[float, str, Dict[str, Any]]]) -> float:
+        """Send every record; returns the wall time taken."""
+        tasks = set()
+        started = time.perf_counter()
+        first_ts = None
+        for ts, path, body in records:
+            first_ts = ts if first_ts is None else first_ts
+            if self.speed:
+                scheduled = started + (ts - first_ts) / self.speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await self.slots.acquire()
+            now = time.perf_counter()
+            if not self.speed:
+                scheduled = now
+            self.send_lag.append(now - scheduled)
+            task = asyncio.create_task(self.one(path, body, scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+
+def parse_speed(value: str) -> Optional[float]:
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    processes = []
+    app_url = args.app_url
+    try:
+        if not app_url:
+            standin_url, app_url, processes = start_processes(args)
+            await wait_ready(f"{standin_url}/health")
+        await wait_ready(f"{app_url}/api/")
+
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=app_url, timeout=60, limits=limits) as client:
+            replay = Replay(client, args.speed, args.max_in_flight)
+            elapsed = await replay.run(read_records(args.file, args.limit))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    lag = sorted(replay.send_lag)
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "verbose")},
+        "elapsed_s": round(elapsed, 3),
+        "max_send_lag_ms": round(lag[-1] * 1000, 2) if lag else 0.0,
+        "results": summarize(replay.samples, 0.0, elapsed or 1.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", help="JSONL written by INSIGHT_RECORD_PATH")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="time scale (2 = twice as fast) or 'max'")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="cap on concurrent requests")
+    parser.add_argument("--limit", type=int, help="replay only the first N records")
+    parser.add_argument("--seed", type=int, default=1, help="stand-in seed")
+    parser.add_argument("--app-url", help="replay against an already running app instead of starting one")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the app process (repeatable)")
+    parser.add_argument("--mongo-url", default="mongodb://127.0.0.1:27017/?serverSelectionTimeoutMS=500")
+    parser.add_argument("--persist", action="store_true", help="keep insight persistence on (needs Mongo)")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--verbose", action="store_true", help="show app and stand-in output")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+        for endpoint, result in report["results"].items():
+            latency = result["latency_ms"]
+            print(f"{endpoint:14} {result['requests']:6} reqs  p50 {latency['p50']:8.1f}ms  "
+                  f"p95 {latency['p95']:8.1f}ms  p99 {latency['p99']:8.1f}ms  fallback {result['fallback_rate']}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Offline load test for /api/generate-insight and /api/analyze-emotion.
+
+Starts the stand-in upstream (benchmarks/standin.py) and the FastAPI app as
+subprocesses, drives the endpoints at a fixed request rate (open loop) or a
+fixed number of concurrent clients (closed loop), and writes a JSON report:
+throughput, p50/p95/p99 latency, response sources and fallback rates, plus the
+git commit so runs can be compared.
+
+    python benchmarks/run_load.py --rps 40 --duration 30 --claude-429-rate 0.05 --output bench.json
+    python benchmarks/run_load.py --concurrency 32 --baseline bench.json
+
+In open-loop mode latency is measured from each request's scheduled send time,
+so a backed-up server is not hidden by the load generator slowing down.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from standin import add_profile_args
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND = ROOT / "backend"
+
+WORDS = ("okay so now we are going to try the new recipe with garlic butter and chili flakes chat "
+         "tell me if you want more spice this part is the hardest step watch the pan closely it sizzles "
+         "fast then we flip it and plate it up for the giveaway winner later tonight").split()
+TOPICS = ["food", "gaming", "music", "fitness", "general"]
+PRIMARY_SOURCES = {"insight": {"claude"}, "emotion": {"hume"}}
+
+Sample = Tuple[str, float, float, int, Optional[str]]  # endpoint, started, latency_s, status, source
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Payloads:
+    """Deterministic request bodies; `unique_ratio` < 1 replays earlier ones (cache hits)."""
+
+    def __init__(self, seed: int, sessions: int, unique_ratio: float):
+        self.rng = random.Random(seed)
+        self.sessions = sessions
+        self.unique_ratio = unique_ratio
+        self.seen: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+    def _text(self, words: int) -> str:
+        start = self.rng.randrange(len(WORDS) - words)
+        return " ".join(WORDS[start:start + words]) + f" {self.rng.randrange(10 ** 6)}"
+
+    def next(self, endpoint: str) -> Dict[str, Any]:
+        seen = self.seen[endpoint]
+        if seen and self.rng.random() >= self.unique_ratio:
+            return self.rng.choice(seen)
+        if endpoint == "insight":
+            prev = self.rng.randrange(50, 5000)
+            delta = self.rng.choice([-25, -8, -3, 0, 4, 12, 30])
+            body = {
+                "transcript": self._text(self.rng.randrange(8, 25)),
+                "viewerDelta": delta,
+                "viewerCount": prev + delta,
+                "prevCount": prev,
+                "topic": self.rng.choice(TOPICS),
+                "sessionId": f"bench-{self.rng.randrange(self.sessions)}",
+            }
+        else:
+            body = {"text": self._text(self.rng.randrange(5, 15))}
+        seen.append(body)
+        return body
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, endpoints: List[str], payloads: Payloads,
+                 headers: Dict[str, str]):
+        self.client = client
+        self.endpoints = endpoints
+        self.payloads = payloads
+        self.headers = headers
+        self.samples: List[Sample] = []
+        self._turn = 0
+
+    async def one(self, scheduled: Optional[float] = None) -> None:
+        endpoint = self.endpoints[self._turn % len(self.endpoints)]
+        self._turn += 1
+        path = "/api/generate-insight" if endpoint == "insight" else "/api/analyze-emotion"
+        body = self.payloads.next(endpoint)
+        started = scheduled if scheduled is not None else time.perf_counter()
+        status, source = 0, None
+        try:
+            response = await self.client.post(path, json=body, headers=self.headers)
+            status = response.status_code
+            if status == 200:
+                source = response.json().get("source")
+        except httpx.HTTPError:
+            pass
+        self.samples.append((endpoint, started, time.perf_counter() - started, status, source))
+
+    async def closed_loop(self, concurrency: int, until: float) -> None:
+        async def worker():
+            while time.perf_counter() < until:
+                await self.one()
+
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+    async def open_loop(self, rps: float, until: float) -> None:
+        tasks = set()
+        interval = 1 / rps
+        next_at = time.perf_counter()
+        while next_at < until:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(self.one(scheduled=next_at))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            next_at += interval
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: List[Sample], measured_from: float, measured_s: float) -> Dict[str, Any]:
+    report: Dict[str, Any] = {}
+    by_endpoint: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        if sample[1] >= measured_from:
+            by_endpoint[sample[0]].append(sample)
+    for endpoint, rows in sorted(by_endpoint.items()):
+        latencies = sorted(row[2] * 1000 for row in rows)
+        ok = [row for row in rows if row[3] == 200]
+        sources = Counter(row[4] for row in ok)
+        fallbacks = sum(n for source, n in sources.items() if source not in PRIMARY_SOURCES[endpoint])
+        report[endpoint] = {
+            "requests": len(rows),
+            "ok": len(ok),
+            "errors": len(rows) - len(ok),
+            "throughput_rps": round(len(rows) / measured_s, 2),
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 2),
+                "p95": round(percentile(latencies, 95), 2),
+                "p99": round(percentile(latencies, 99), 2),
+                "mean": round(sum(latencies) / len(latencies), 2),
+                "max": round(latencies[-1], 2),
+            },
+            "sources": dict(sorted(sources.items(), key=lambda item: str(item[0]))),
+            "fallback_rate": round(fallbacks / len(ok), 4) if ok else None,
+        }
+    return report
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Relative change per endpoint (positive latency/fallback deltas are regressions)."""
+    def change(new, old):
+        return round((new - old) / old, 4) if old else None
+
+    comparison = {}
+    for endpoint, now in current.items():
+        before = baseline.get("results", {}).get(endpoint)
+        if not before:
+            continue
+        comparison[endpoint] = {
+            "throughput_rps": change(now["throughput_rps"], before["throughput_rps"]),
+            **{f"latency_{q}": change(now["latency_ms"][q], before["latency_ms"][q]) for q in ("p50", "p95", "p99")},
+            "fallback_rate_delta": (
+                round(now["fallback_rate"] - before["fallback_rate"], 4)
+                if now["fallback_rate"] is not None and before.get("fallback_rate") is not None else None
+            ),
+        }
+    return {"baseline_commit": baseline.get("commit"), "changes": comparison}
+
+
+async def wait_ready(url: str, timeout_s: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready in {timeout_s:.0f}s")
+
+
+def start_processes(args: argparse.Namespace) -> Tuple[str, str, List[subprocess.Popen]]:
+    standin_port, app_port = free_port(), free_port()
+    standin_cmd = [sys.executable, str(Path(__file__).with_name("standin.py")), "--port", str(standin_port),
+                   "--seed", str(args.seed)]
+    for name in ("claude", "hume"):
+        for field in ("median_ms", "sigma", "error_rate", "429_rate"):
+            standin_cmd += [f"--{name}-{field.replace('_', '-')}", str(getattr(args, f"{name}_{field}"))]
+    standin_url = f"http://127.0.0.1:{standin_port}"
+
+    env = {
+        **os.environ,
+        "ANTHROPIC_API_KEY": "bench-key",
+        "ANTHROPIC_BASE_URL": standin_url,
+        "HUME_ANALYZE_URL": f"{standin_url}/hume-analyze-text",
+        "MONGO_URL": args.mongo_url,
+        "DB_NAME": os.environ.get("DB_NAME", "spikely_bench"),
+        "INSIGHT_PERSIST": "true" if args.persist else "false",
+    }
+    for item in args.app_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    app_cmd = [sys.executable, "-m", "uvicorn", "server:app", "--port", str(app_port), "--log-level", "warning"]
+    output = None if args.verbose else subprocess.DEVNULL
+    processes = [
+        subprocess.Popen(standin_cmd, stdout=output, stderr=output),
+        subprocess.Popen(app_cmd, cwd=BACKEND, env=env, stdout=output, stderr=output),
+    ]
+    return standin_url, f"http://127.0.0.1:{app_port}", processes
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    processes: List[subprocess.Popen] = []
+    standin_url = None
+    app_url = args.app_url
+    try:
+        if not app_url:
+            standin_url, app_url, processes = start_processes(args)
+            await wait_ready(f"{standin_url}/health")
+        await wait_ready(f"{app_url}/api/")
+
+        endpoints = ["insight", "emotion"] if args.endpoint == "both" else [args.endpoint]
+        headers = {"X-Insight-Deadline-Ms": str(args.deadline_ms)} if args.deadline_ms else {}
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=app_url, timeout=60, limits=limits) as client:
+            test = LoadTest(client, endpoints, Payloads(args.seed, args.sessions, args.unique_ratio), headers)
+            started = time.perf_counter()
+            until = started + args.warmup + args.duration
+            if args.rps:
+                await test.open_loop(args.rps, until)
+            else:
+                await test.closed_loop(args.concurrency, until)
+            upstream = (await client.get(f"{standin_url}/health")).json() if standin_url else None
+
+        results = summarize(test.samples, started + args.warmup, args.duration)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "verbose")},
+        "results": results,
+        "upstream_calls": upstream,
+    }
+    if args.baseline:
+        report["comparison"] = compare(results, json.loads(Path(args.baseline).read_text()))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rps", type=float, help="open loop: target requests per second")
+    load.add_argument("--concurrency", type=int, default=16, help="closed loop: concurrent clients (default)")
+    parser.add_argument("--endpoint", choices=["insight", "emotion", "both"], default="both")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds excluded from the report")
+    parser.add_argument("--sessions", type=int, default=50, help="distinct sessionIds for insight requests")
+    parser.add_argument("--unique-ratio", type=float, default=1.0, help="fraction of never-seen payloads")
+    parser.add_argument("--deadline-ms", type=int, default=0, help="X-Insight-Deadline-Ms for insight requests")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--app-url", help="benchmark an already running app instead of starting one")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the app process (repeatable)")
+    parser.add_argument("--mongo-url", default="mongodb://127.0.0.1:27017/?serverSelectionTimeoutMS=500")
+    parser.add_argument("--persist", action="store_true", help="keep insight persistence on (needs Mongo)")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show app and stand-in output")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+        for endpoint, result in report["results"].items():
+            latency = result["latency_ms"]
+            print(f"{endpoint:8} {result['throughput_rps']:8.1f} rps  p50 {latency['p50']:8.1f}ms  "
+                  f"p95 {latency['p95']:8.1f}ms  p99 {latency['p99']:8.1f}ms  fallback {result['fallback_rate']}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark of per-request JSON CPU for /api/generate-insight and
+/api/analyze-emotion: FastAPI's default path against the FAST_JSON path.
+
+    default  body: json.loads -> dict -> model validation (a declared body parameter)
+             response: response_model validate + JSON-mode dump + JSONResponse (json.dumps)
+    fast     body: model_validate_json on the raw bytes
+             response: FastJSONResponse(model) rendered once by pydantic-core
+
+Both paths render byte-identical responses (checked before timing).
+
+    python benchmarks/serialization.py --number 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+# server.py reads these at import; nothing here touches the database
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:1")
+os.environ.setdefault("DB_NAME", "bench")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from fast_json import FastJSONResponse  # noqa: E402
+from run_load import Payloads  # noqa: E402
+from server import HumeAnalysisRequest, HumeAnalysisResponse, InsightRequest, InsightResponse  # noqa: E402
+
+CASES = {
+    "insight": (InsightRequest, InsightResponse(
+        emotionalLabel="cooking draws crowd", nextMove="Show close-up of the dish now",
+        source="claude", correlationId="1792191412030-0001", model="claude-sonnet-4-20250514",
+    )),
+    "emotion": (HumeAnalysisRequest, HumeAnalysisResponse(emotion="Joy", score=0.6123, confidence=61)),
+}
+
+
+def default_path(request_model: type, response: Any) -> Callable[[bytes], Awaitable[bytes]]:
+    field = create_response_field(name=f"Response_{type(response).__name__}", type_=type(response))
+
+    async def handle(body: bytes) -> bytes:
+        request_model.model_validate(json.loads(body))
+        content = await serialize_response(field=field, response_content=response, is_coroutine=True)
+        return JSONResponse(content).body
+
+    return handle
+
+
+def fast_path(request_model: type, response: Any) -> Callable[[bytes], Awaitable[bytes]]:
+    async def handle(body: bytes) -> bytes:
+        request_model.model_validate_json(body)
+        return FastJSONResponse(response).body
+
+    return handle
+
+
+async def time_path(handle: Callable[[bytes], Awaitable[bytes]], bodies, number: int) -> float:
+    """CPU microseconds per request (process time, so scheduler noise is excluded)."""
+    for body in bodies[:100]:
+        await handle(body)
+    started = time.process_time()
+    for i in range(number):
+        await handle(bodies[i % len(bodies)])
+    return (time.process_time() - started) / number * 1e6
+
+
+async def run(number: int, seed: int) -> Dict[str, Dict[str, float]]:
+    payloads = Payloads(seed, sessions=8, unique_ratio=1.0)
+    report = {}
+    for endpoint, (request_model, response) in CASES.items():
+        bodies = [json.dumps(payloads.next(endpoint)).encode() for _ in range(500)]
+        default, fast = default_path(request_model, response), fast_path(request_model, response)
+        if await default(bodies[0]) != await fast(bodies[0]):
+            raise SystemExit(f"{endpoint}: fast path renders different bytes")
+        default_us = await time_path(default, bodies, number)
+        fast_us = await time_path(fast, bodies, number)
+        report[endpoint] = {
+            "default_us": round(default_us, 2),
+            "fast_us": round(fast_us, 2),
+            "saved_us": round(default_us - fast_us, 2),
+            "speedup": round(default_us / fast_us, 2),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="requests timed per endpoint and path")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.number, args.seed)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Local stand-in for the Anthropic Messages API and the hume-analyze-text function.
+
+Used by run_load.py so the backend can be benchmarked without network access
+or API spend. Latency is drawn from a log-normal distribution (median + sigma)
+and a configurable fraction of calls fail with 500 or 429.
+
+    python benchmarks/standin.py --port 8790 --claude-median-ms 800 --claude-429-rate 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LABELS = ["chat hype builds", "recipe reveal lands", "energy dips", "viewers lean in", "story hooks chat"]
+MOVES = [
+    "Ask chat to vote next step. Read answers",
+    "Show the close-up now. Narrate fast",
+    "Shout out new viewers. Ask where from",
+    "Tease the giveaway. Set 2 min timer",
+    "Reply to top comment. Keep it quick",
+]
+EMOTIONS = ["Joy", "Excitement", "Interest", "Amusement", "Confusion", "Boredom"]
+
+
+class Profile:
+    """Latency and failure behaviour for one upstream."""
+
+    def __init__(self, median_ms: float, sigma: float, error_rate: float, throttle_rate: float):
+        self.median_s = median_ms / 1000
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+
+    async def delay(self) -> None:
+        if self.median_s > 0:
+            await asyncio.sleep(random.lognormvariate(0, self.sigma) * self.median_s if self.sigma else self.median_s)
+
+    def failure(self):
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+
+def build_app(claude: Profile, hume: Profile) -> FastAPI:
+    app = FastAPI()
+    stats = {"claude": 0, "hume": 0, "claude_429": 0, "claude_500": 0, "hume_429": 0, "hume_500": 0}
+
+    @app.get("/health")
+    async def health():
+        return stats
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        stats["claude"] += 1
+        await claude.delay()
+        status = claude.failure()
+        if status:
+            stats[f"claude_{status}"] += 1
+            kind = "rate_limit_error" if status == 429 else "api_error"
+            return JSONResponse(
+                {"type": "error", "error": {"type": kind, "message": f"stand-in {kind}"}},
+                status_code=status,
+                headers={"retry-after": "1"} if status == 429 else None,
+            )
+
+        prompt = json.dumps(body.get("messages", []))
+        pick = int(hashlib.blake2b(prompt.encode(), digest_size=4).hexdigest(), 16)
+        insight = {"emotionalLabel": LABELS[pick % len(LABELS)], "nextMove": MOVES[pick % len(MOVES)]}
+        text = json.dumps(insight)
+        # Forced tool use answers with a tool_use block, streamed as input_json_delta
+        tool = (body.get("tool_choice") or {}).get("name")
+        if tool:
+            content = {"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}", "name": tool, "input": insight}
+            empty_block = {**content, "input": {}}
+            delta_type, delta_field = "input_json_delta", "partial_json"
+        else:
+            content = {"type": "text", "text": text}
+            empty_block = {"type": "text", "text": ""}
+            delta_type, delta_field = "text_delta", "text"
+        usage = {"input_tokens": 120, "output_tokens": 30,
+                 "cache_read_input_tokens": 2100, "cache_creation_input_tokens": 0}
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:24]}", "type": "message", "role": "assistant",
+            "model": body.get("model"), "content": [content],
+            "stop_reason": "tool_use" if tool else "end_turn", "stop_sequence": None, "usage": usage,
+        }
+        if not body.get("stream"):
+            return message
+
+        async def events():
+            start = {**message, "content": [], "usage": {**usage, "output_tokens": 0}}
+            yield f"event: message_start\ndata: {json.dumps({'type': 'message_start', 'message': start})}\n\n"
+            block = {"type": "content_block_start", "index": 0, "content_block": empty_block}
+            yield f"event: content_block_start\ndata: {json.dumps(block)}\n\n"
+            for i in range(0, len(text), 8):
+                delta = {"type": "content_block_delta", "index": 0, "delta": {"type": delta_type, delta_field: text[i:i + 8]}}
+                yield f"event: content_block_delta\ndata: {json.dumps(delta)}\n\n"
+            yield f"event: content_block_stop\ndata: {json.dumps({'type': 'content_block_stop', 'index': 0})}\n\n"
+            stop = {"type": "message_delta", "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                    "usage": {"output_tokens": 30}}
+            yield f"event: message_delta\ndata: {json.dumps(stop)}\n\n"
+            yield f"event: message_stop\ndata: {json.dumps({'type': 'message_stop'})}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    def emotion(text: str):
+        pick = int(hashlib.blake2b(text.encode(), digest_size=4).hexdigest(), 16)
+        score = 0.4 + (pick % 50) / 100
+        return {"emotion": EMOTIONS[pick % len(EMOTIONS)], "score": score, "confidence": round(score * 100)}
+
+    @app.post("/hume-analyze-text")
+    async def hume_analyze(request: Request):
+        body = await request.json()
+        stats["hume"] += 1
+        await hume.delay()
+        status = hume.failure()
+        if status:
+            stats[f"hume_{status}"] += 1
+            return JSONResponse({"error": "stand-in failure"}, status_code=status)
+        if isinstance(body.get("texts"), list):
+            return {"results": [emotion(t) for t in body["texts"]]}
+        if not body.get("text"):
+            return JSONResponse({"error": "Text is required"}, status_code=400)
+        return emotion(body["text"])
+
+    return app
+
+
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    for name, median in (("claude", 800), ("hume", 300)):
+        parser.add_argument(f"--{name}-median-ms", type=float, default=median, help=f"{name} median latency")
+        parser.add_argument(f"--{name}-sigma", type=float, default=0.35, help=f"{name} log-normal sigma (0 = fixed)")
+        parser.add_argument(f"--{name}-error-rate", type=float, default=0.0, help=f"fraction of {name} calls that 500")
+        parser.add_argument(f"--{name}-429-rate", type=float, default=0.0, help=f"fraction of {name} calls that 429")
+
+
+def profiles(args: argparse.Namespace):
+    return tuple(
+        Profile(getattr(args, f"{name}_median_ms"), getattr(args, f"{name}_sigma"),
+                getattr(args, f"{name}_error_rate"), getattr(args, f"{name}_429_rate"))
+        for name in ("claude", "hume")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--seed", type=int, default=None)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    random.seed(args.seed if args.seed is not None else time.time_ns())
+
+    import uvicorn
+    uvicorn.run(build_app(*profiles(args)), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,55 @@ const corsHeaders = {
   'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type',
 };
 
+const NEUTRAL = { emotion: 'Neutral', score: 0.5, confidence: 50 };
+
+// Emotion scores of one Hume prediction. The language model nests them under
+// models.language.grouped_predictions[].predictions[] (one per span of the
+// text); spans are averaged per emotion. A bare `emotions` list is also accepted.
+function emotionScores(prediction: any): any[] {
+  if (Array.isArray(prediction?.emotions)) {
+    return prediction.emotions;
+  }
+  const spans = (prediction?.models?.language?.grouped_predictions ?? [])
+    .flatMap((group: any) => group.predictions ?? [])
+    .filter((span: any) => Array.isArray(span.emotions));
+  const totals = new Map<string, number>();
+  for (const span of spans) {
+    for (const e of span.emotions) {
+      totals.set(e.name, (totals.get(e.name) ?? 0) + e.score);
+    }
+  }
+  return [...totals].map(([name, total]) => ({ name, score: total / spans.length }));
+}
+
+// Top emotion for one Hume prediction, or Neutral when there is none
+function topEmotion(prediction: any) {
+  const emotions = emotionScores(prediction);
+  if (emotions.length === 0) {
+    return NEUTRAL;
+  }
+  const sortedEmotions = emotions.sort((a: any, b: any) => b.score - a.score);
+  const top = sortedEmotions[0];
+  return {
+    emotion: top.name.charAt(0).toUpperCase() + top.name.slice(1),
+    score: top.score,
+    confidence: Math.round(top.score * 100)
+  };
+}
+
 serve(async (req) => {
   if (req.method === 'OPTIONS') {
     return new Response(null, { headers: corsHeaders });
   }
 
   try {
-    const { text } = await req.json();
-    
-    if (!text) {
+    const { text, texts } = await req.json();
+
+    // `texts` is the batched form used by the backend micro-batcher: one Hume job for many texts
+    const isBatch = Array.isArray(texts);
+    const inputs: string[] = isBatch ? texts : (text ? [text] : []);
+
+    if (inputs.length === 0 || inputs.some((t) => typeof t !== 'string' || !t)) {
       return new Response(
         JSON.stringify({ error: 'Text is required' }),
         { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
@@ -21,7 +61,7 @@ serve(async (req) => {
     }
 
     const humeApiKey = Deno.env.get('HUME_AI_API_KEY');
-    
+
     if (!humeApiKey) {
       console.error('HUME_AI_API_KEY not configured');
       return new Response(
@@ -30,7 +70,7 @@ serve(async (req) => {
       );
     }
 
-    console.log('[Hume Text] Analyzing text:', text.substring(0, 50) + '...');
+    console.log('[Hume Text] Analyzing', inputs.length, 'text(s):', inputs[0].substring(0, 50) + '...');
 
     const response = await fetch('https://api.hume.ai/v0/batch/jobs', {
       method: 'POST',
@@ -42,7 +82,7 @@ serve(async (req) => {
         models: {
           language: {}
         },
-        text: [text]
+        text: inputs
       }),
     });
 
@@ -57,17 +97,19 @@ serve(async (req) => {
 
     const jobData = await response.json();
     const jobId = jobData.job_id;
-    
+
     console.log('[Hume Text] Job created:', jobId);
 
-    // Poll for results (max 10 seconds)
-    let predictions = null;
+    // Poll for results (max 10 seconds). Depending on the job, Hume returns one
+    // data[] entry per input text or one entry holding a prediction per text, so
+    // predictions are flattened across entries in order: prediction i is text i.
+    let predictionSets: any[] | null = null;
     const maxAttempts = 20;
     const pollInterval = 500;
 
     for (let i = 0; i < maxAttempts; i++) {
       await new Promise(resolve => setTimeout(resolve, pollInterval));
-      
+
       const statusResponse = await fetch(`https://api.hume.ai/v0/batch/jobs/${jobId}/predictions`, {
         headers: {
           'X-Hume-Api-Key': humeApiKey,
@@ -76,42 +118,42 @@ serve(async (req) => {
 
       if (statusResponse.ok) {
         const data = await statusResponse.json();
-        if (data && data.length > 0 && data[0].results?.predictions?.length > 0) {
-          predictions = data[0].results.predictions[0];
-          console.log('[Hume Text] Predictions received');
+        const flattened = Array.isArray(data)
+          ? data.flatMap((entry: any) => entry.results?.predictions ?? [])
+          : [];
+        if (flattened.length > 0) {
+          predictionSets = flattened;
+          console.log('[Hume Text] Predictions received:', data.length, 'entries,', flattened.length, 'predictions');
           break;
         }
       }
     }
 
-    if (!predictions || !predictions.emotions || predictions.emotions.length === 0) {
-      console.log('[Hume Text] No predictions found, returning neutral');
+    // A count mismatch means texts and predictions can't be paired; never guess
+    if (predictionSets && predictionSets.length !== inputs.length) {
+      console.error('[Hume Text] Prediction count mismatch:', predictionSets.length, 'for', inputs.length, 'texts');
       return new Response(
-        JSON.stringify({ 
-          emotion: 'Neutral',
-          score: 0.5,
-          confidence: 50
+        JSON.stringify({
+          error: 'Hume AI prediction count mismatch',
+          details: `${predictionSets.length} predictions for ${inputs.length} texts`,
         }),
-        { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+        { status: 502, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
       );
     }
 
-    // Get top emotion
-    const sortedEmotions = predictions.emotions.sort((a: any, b: any) => b.score - a.score);
-    const topEmotion = sortedEmotions[0];
-    
-    const emotionName = topEmotion.name.charAt(0).toUpperCase() + topEmotion.name.slice(1);
-    const score = topEmotion.score;
-    const confidence = Math.round(score * 100);
+    const results = inputs.map((_, i) => topEmotion(predictionSets?.[i]));
+
+    if (isBatch) {
+      return new Response(
+        JSON.stringify({ results }),
+        { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+      );
+    }
 
-    console.log('[Hume Text] Top emotion:', emotionName, confidence + '%');
+    console.log('[Hume Text] Top emotion:', results[0].emotion, results[0].confidence + '%');
 
     return new Response(
-      JSON.stringify({
-        emotion: emotionName,
-        score: score,
-        confidence: confidence
-      }),
+      JSON.stringify(results[0]),
       { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
     );
 
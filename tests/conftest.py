@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The backend is run as flat modules from backend/ (uvicorn server:app)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
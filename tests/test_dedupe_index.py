@@ -0,0 +1,65 @@
+from dedupe_index import SessionDedupeIndex
+
+
+def test_bleed_is_checked_against_the_whole_session_transcript():
+    index = SessionDedupeIndex()
+    index.add_transcript("today we are making garlic butter pasta from scratch")
+    index.add_transcript("okay chat so i want to share the recipe link")
+    assert index.bleeds("Making garlic butter pasta now", 3)
+    assert not index.bleeds("Show the pasta close up", 3)
+    # Short phrases are too common to count
+    assert not index.bleeds("I want to", 3)
+
+
+def test_repeats_found_beyond_the_last_three_insights():
+    # Only the last 3 are checked exactly; the match has to come from the LSH tail
+    index = SessionDedupeIndex(recent_exact=3)
+    index.add_insight("Ask chat their favorite pasta shape")
+    for i in range(10):
+        index.add_insight(f"Unrelated move number {i} about giveaways")
+    match = index.similar("Ask chat favorite pasta shape now")
+    assert match is not None
+    assert match[0] == "Ask chat their favorite pasta shape"
+    assert match[1] > 0.6
+    assert index.similar("Start a giveaway countdown timer") is None
+
+
+def test_insight_history_is_bounded():
+    index = SessionDedupeIndex(max_insights=3)
+    moves = ["Ask chat about pasta", "Start giveaway countdown", "Show recipe card",
+             "Read top comment aloud", "Thank new followers"]
+    for move in moves:
+        index.add_insight(move)
+    assert len(index) == 3
+    assert index.similar("Ask chat about pasta") is None
+    assert index.similar("Thank new followers") is not None
+
+
+def test_contained_repeats_are_always_caught_in_recent_insights():
+    long_insight = ("Read the top chat comment aloud then answer it and ask viewers which sauce "
+                    "they want next while you plate the pasta and show the garlic bread close up")
+    # A short move fully contained in a long one: Jaccard is tiny, containment is 100%
+    index = SessionDedupeIndex()
+    index.add_insight(long_insight)
+    assert index.similar("Plate pasta") == (long_insight, 1.0)
+    # Client-supplied recentInsights are checked exactly even if never indexed
+    assert SessionDedupeIndex().similar("garlic bread close up", recent=[long_insight])[1] == 1.0
+    # 4 of 12 words, all contained, across many random-looking phrasings
+    for i in range(50):
+        index = SessionDedupeIndex()
+        previous = f"move{i} alpha{i} beta{i} gamma{i} delta epsilon zeta eta theta iota kappa lambda"
+        index.add_insight(previous)
+        assert index.similar(f"alpha{i} beta{i} gamma{i} move{i}") is not None
+
+
+def test_seen_transcripts_evict_oldest_first():
+    index = SessionDedupeIndex(max_transcripts=2, max_shingles=12)
+    segments = ["we are making garlic butter pasta", "now plating the garlic bread",
+                "chat wants the recipe card link"]
+    for segment in segments:
+        index.add_transcript(segment)
+    # The first segment's shingles aged out and so did its seen-marker, so it is indexed again
+    assert index.bleeds("the recipe card link", 3)
+    assert not index.bleeds("making garlic butter pasta", 3)
+    index.add_transcript(segments[0])
+    assert index.bleeds("making garlic butter pasta", 3)
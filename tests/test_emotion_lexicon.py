@@ -0,0 +1,29 @@
+from emotion_lexicon import NEUTRAL, LexiconEmotionClassifier
+
+
+def test_batch_is_scored_in_one_pass_in_order():
+    classifier = LexiconEmotionClassifier()
+    results = classifier.classify(['lol that was so funny', 'I hate this trash game', 'thank you!'])
+    assert [r.emotion for r in results] == ['Amusement', 'Anger', 'Gratitude']
+    assert all(0 < r.score <= 1 and r.confidence == round(r.score * 100) for r in results)
+
+
+def test_no_cues_is_neutral():
+    result = LexiconEmotionClassifier().classify(['the stream starts at noon'])[0]
+    assert (result.emotion, result.score, result.confidence) == (NEUTRAL, 0.5, 50)
+
+
+def test_intensifiers_raise_confidence():
+    classifier = LexiconEmotionClassifier()
+    plain, boosted = classifier.classify(['lol funny', 'lol so funny!!'])
+    assert boosted.emotion == plain.emotion == 'Amusement'
+    assert boosted.confidence > plain.confidence
+
+
+def test_empty_batch():
+    assert LexiconEmotionClassifier().classify([]) == []
+
+
+def test_function_words_are_not_cues():
+    results = LexiconEmotionClassifier().classify(['what do you tell them', 'no way, go again', 'wait why'])
+    assert [r.emotion for r in results] == [NEUTRAL] * 3
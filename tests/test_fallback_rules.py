@@ -0,0 +1,43 @@
+from fallback_rules import RULES, TOPIC_WORDS, choose_fallback, history_pattern, lookup
+
+
+def test_history_patterns():
+    assert history_pattern([], 5) == 'fresh'
+    assert history_pattern([4, 6], 5) == 'streak'
+    assert history_pattern([-3, -8], -5) == 'streak'
+    assert history_pattern([-3], 5) == 'reversal'
+    assert history_pattern([2], 5) == 'mixed'
+    assert history_pattern([5, 0], 0) == 'mixed'
+
+
+def test_most_specific_rule_wins():
+    assert lookup('food', 'spike', 'fresh')[0][0] == 'cooking draws crowd'
+    assert lookup('fitness', 'dump', 'streak')[0] == ('stream bleeding out', 'Stop everything. Change topic now')
+    assert lookup('finance', 'drop', 'fresh')[0][0] == 'money talk heavy'
+    assert lookup('unknown-topic', 'flatline', 'fresh')[0] == ('energy steady', 'Ask quick question. Create buzz')
+
+
+def test_every_rendered_variant_is_short():
+    for (topic, category, pattern) in RULES:
+        for word_topic in TOPIC_WORDS:
+            for label, move in lookup(word_topic if topic == '*' else topic, category, pattern):
+                assert len(label.split()) <= 4 and len(move.split()) <= 8
+                assert '{' not in label + move
+
+
+def test_choice_is_stable_and_skips_recent_insights():
+    first = choose_fallback('general', 'drop', 'fresh', 'some transcript')
+    assert choose_fallback('general', 'drop', 'fresh', 'some transcript') == first
+    other = choose_fallback('general', 'drop', 'fresh', 'some transcript', avoid=[first[1]])
+    assert other != first and other in lookup('general', 'drop', 'fresh')
+
+
+def test_spike_wording_depends_on_size():
+    assert lookup('food', 'spike', 'fresh', 25)[0] == ('cooking wins big', 'Double down cooking. Stay hyped')
+    assert lookup('food', 'spike', 'fresh', 12)[0] == ('cooking works', 'Show more cooking. Keep energy')
+    # Small spikes keep the topic-specific rows
+    assert lookup('food', 'spike', 'fresh', 4)[0][0] == 'cooking draws crowd'
+    assert lookup('general', 'spike', 'fresh', 4)[0][0] == 'content gains'
+    # Size outranks topic and history pattern
+    assert lookup('gaming', 'spike', 'streak', 30)[0][0] == 'gaming wins big'
+    assert choose_fallback('gaming', 'spike', 'streak', 'gg', delta=30) in lookup('gaming', 'spike', 'streak', 30)
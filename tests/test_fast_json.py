@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+import fast_json
+from fast_json import FastJSONResponse
+
+
+class Row(BaseModel):
+    id: str
+    label: Optional[str] = None
+    score: float = 0.5
+    timestamp: datetime = datetime(2024, 5, 1, 12, 30, 15, 123456)
+
+
+class Page(BaseModel):
+    rows: List[Row]
+
+
+def test_model_renders_like_the_default_response():
+    page = Page(rows=[Row(id='a', label='café 🔥'), Row(id='b')])
+    assert FastJSONResponse(page).body == JSONResponse(page.model_dump(mode='json')).body
+
+
+def test_plain_content_renders_like_the_default_response():
+    content = [{"id": "a", "label": "naïve \"quoted\"", "n": [1, 2.5, None, True]}]
+    assert FastJSONResponse(content).body == JSONResponse(content).body
+    # Models nested in plain content go through the fallback hook
+    assert FastJSONResponse({"row": Row(id='c')}).body == JSONResponse({"row": Row(id='c').model_dump(mode='json')}).body
+
+
+def test_non_finite_floats_render_as_null():
+    # JSONResponse raises ValueError here; the fast path documents null instead
+    assert FastJSONResponse(Row(id='n', score=float('nan'))).body.count(b'"score":null') == 1
+    if fast_json.orjson is not None:
+        assert FastJSONResponse({"score": float('inf')}).body == b'{"score":null}'
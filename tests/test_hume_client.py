@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import httpx
+
+from hume_client import HumeBatcher, text_key
+
+
+def _result(text):
+    return {'emotion': 'Joy', 'score': 0.9, 'confidence': len(text)}
+
+
+def _run(handler, texts, **kwargs):
+    calls = []
+
+    def transport(request):
+        body = json.loads(request.content)
+        calls.append(body)
+        return handler(body)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(transport)) as client:
+            batcher = HumeBatcher('http://hume.test/analyze', lambda: client, **kwargs)
+            results = await asyncio.gather(*[batcher.analyze(t) for t in texts])
+            return results, batcher
+
+    results, batcher = asyncio.run(main())
+    return results, calls, batcher
+
+
+def test_text_key_ignores_case_and_whitespace():
+    assert text_key('Hello  World') == text_key(' hello world ')
+    assert text_key('hello') != text_key('world')
+
+
+def test_concurrent_texts_share_one_batch_call():
+    def handler(body):
+        return httpx.Response(200, json={'results': [_result(t) for t in body['texts']]})
+
+    results, calls, _ = _run(handler, ['a', 'bb', 'A', 'ccc'])
+    assert calls == [{'texts': ['a', 'bb', 'ccc']}]
+    assert [r['confidence'] for r in results] == [1, 2, 1, 3]
+
+
+def test_rejected_batch_falls_back_to_single_calls_for_that_batch_only():
+    def handler(body):
+        if 'texts' in body:
+            return httpx.Response(400, json={'error': 'Text is required'})
+        return httpx.Response(200, json=_result(body['text']))
+
+    results, calls, batcher = _run(handler, ['a', 'bb'])
+    assert [r['confidence'] for r in results] == [1, 2]
+    assert sum('text' in c for c in calls) == 2
+    assert batcher.batch_supported is True
+
+
+def test_batching_stops_only_after_consecutive_rejections():
+    def handler(body):
+        if 'texts' in body:
+            return httpx.Response(400, json={'error': 'Text is required'})
+        return httpx.Response(200, json=_result(body['text']))
+
+    calls = []
+
+    async def main():
+        def transport(request):
+            body = json.loads(request.content)
+            calls.append(body)
+            return handler(body)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(transport)) as client:
+            batcher = HumeBatcher('http://hume.test/analyze', lambda: client, max_rejections=2)
+            for round_ in range(3):
+                await asyncio.gather(*[batcher.analyze(f'{t} {round_}') for t in ('a', 'bb')])
+            return batcher
+
+    batcher = asyncio.run(main())
+    assert batcher.batch_supported is False
+    assert sum('texts' in c for c in calls) == 2  # the third round went straight to single calls
+
+
+def test_empty_text_is_refused_without_calling_upstream():
+    def handler(body):
+        return httpx.Response(200, json={'results': [_result(t) for t in body['texts']]})
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda r: handler(json.loads(r.content)))) as client:
+            batcher = HumeBatcher('http://hume.test/analyze', lambda: client)
+            return await asyncio.gather(batcher.analyze('  '), batcher.analyze('a'), batcher.analyze('b'),
+                                        return_exceptions=True)
+
+    empty, a, b = asyncio.run(main())
+    assert isinstance(empty, ValueError)
+    assert a['confidence'] == 1 and b['confidence'] == 1
@@ -0,0 +1,65 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+# server.py reads these at import; no test here touches the database
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:1')
+os.environ.setdefault('DB_NAME', 'test')
+
+import server  # noqa: E402
+
+
+def message(label, move):
+    return SimpleNamespace(
+        content=[SimpleNamespace(type='tool_use', name='record_insight',
+                                 input={'emotionalLabel': label, 'nextMove': move})],
+        usage=SimpleNamespace(input_tokens=10, output_tokens=5),
+        model='batch-model',
+    )
+
+
+class FakeBatches:
+    def __init__(self, entries):
+        self.entries = entries
+        self.downloads = 0
+
+    async def retrieve(self, batch_id):
+        return SimpleNamespace(processing_status='ended')
+
+    async def results(self, batch_id):
+        self.downloads += 1
+
+        async def entries():
+            for entry in self.entries:
+                yield entry
+
+        return entries()
+
+
+def test_polling_an_ended_batch_twice_returns_identical_items(monkeypatch):
+    requests = [
+        server.InsightRequest(transcript='we are cooking garlic pasta', viewerDelta=12, viewerCount=112,
+                              prevCount=100, sessionId='batch-session'),
+        server.InsightRequest(transcript='boss fight next chat', viewerDelta=-4, viewerCount=96,
+                              prevCount=100, sessionId='batch-session'),
+    ]
+    batches = FakeBatches([
+        SimpleNamespace(custom_id='item-0', result=SimpleNamespace(
+            type='succeeded', message=message('cooking draws crowd', 'Show the pasta close up'))),
+        SimpleNamespace(custom_id='item-1', result=SimpleNamespace(type='errored')),
+    ])
+    claude = SimpleNamespace(messages=SimpleNamespace(batches=batches))
+    monkeypatch.setenv('ANTHROPIC_API_KEY', 'test-key')
+    monkeypatch.setattr(server.upstream, 'anthropic', lambda api_key: claude)
+    server.submitted_batches.set('msgbatch_twice', requests)
+
+    async def main():
+        first = await server.get_insights_batch('msgbatch_twice')
+        second = await server.get_insights_batch('msgbatch_twice')
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first.model_dump() == second.model_dump()
+    assert first.results[0].insight.nextMove == 'Show the pasta close up'
+    assert first.results[1].status == 'fallback'
+    assert batches.downloads == 1
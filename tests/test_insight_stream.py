@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+from insight_stream import IncrementalInsightParser, extract_insight_fields
+
+
+def test_label_completes_before_next_move():
+    parser = IncrementalInsightParser()
+    chunks = ['{"emotio', 'nalLabel": "palette ', 'demo spikes", "nex', 'tMove": "Hold palette', ' to camera"}']
+    emitted = [parser.feed(chunk) for chunk in chunks]
+    assert emitted[2] == [('emotionalLabel', 'palette demo spikes')]
+    assert emitted[4] == [('nextMove', 'Hold palette to camera')]
+    assert parser.fields == {'emotionalLabel': 'palette demo spikes', 'nextMove': 'Hold palette to camera'}
+
+
+def test_escaped_quotes_and_wrapper_text():
+    parser = IncrementalInsightParser()
+    parser.feed('Here you go: {"emotionalLabel": "rank talk", "nextMove": "Ask \\"What\'s your rank?\\""}')
+    assert parser.fields['nextMove'] == 'Ask "What\'s your rank?"'
+    assert parser.fields['emotionalLabel'] == 'rank talk'
+
+
+def tool_block(name, data):
+    return SimpleNamespace(type='tool_use', name=name, input=data)
+
+
+def text_block(text):
+    return SimpleNamespace(type='text', text=text)
+
+
+def test_tool_input_is_the_fast_path():
+    content = [text_block('ignored'), tool_block('record_insight', {'emotionalLabel': ' chat fired up ', 'nextMove': 'Read top comment'})]
+    assert extract_insight_fields(content, 'record_insight') == (
+        'tool', {'emotionalLabel': 'chat fired up', 'nextMove': 'Read top comment'})
+    # Wrong types or blanks are dropped rather than passed through
+    content = [tool_block('record_insight', {'emotionalLabel': ['x'], 'nextMove': '  '})]
+    assert extract_insight_fields(content, 'record_insight') == ('tool', {})
+
+
+def test_text_answers_are_scraped():
+    content = [text_block('```json\n{"emotionalLabel": "rank talk", "nextMove": "Ask rank"}\n```')]
+    assert extract_insight_fields(content, 'record_insight') == (
+        'text', {'emotionalLabel': 'rank talk', 'nextMove': 'Ask rank'})
+    assert extract_insight_fields([text_block('{"nextMove": "Ask rank"')], 'record_insight') == ('text', {})
+    assert extract_insight_fields([text_block('{"nextMove": "Ask rank"}')], 'record_insight') == (
+        'text', {'nextMove': 'Ask rank'})
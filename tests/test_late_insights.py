@@ -0,0 +1,78 @@
+import asyncio
+import os
+from unittest.mock import ANY
+
+# server.py reads these at import; no test here touches the database
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:1')
+os.environ.setdefault('DB_NAME', 'test')
+
+from pymongo import InsertOne, UpdateOne  # noqa: E402
+
+import server  # noqa: E402
+from write_behind import WriteBehindQueue  # noqa: E402
+
+
+class FakeCollection:
+    def __init__(self):
+        self.operations = []
+
+    async def insert_many(self, documents, ordered=True):
+        self.operations.extend(InsertOne(document) for document in documents)
+
+    async def bulk_write(self, operations, ordered=True):
+        self.operations.extend(operations)
+
+
+class FakeRollups:
+    def __init__(self):
+        self.insights = []
+
+    def record_viewers(self, session_id, delta, ts=None):
+        pass
+
+    def record_insight(self, session_id, topic, ts=None):
+        self.insights.append(session_id)
+
+
+def test_late_upgrade_updates_the_fallback_record_instead_of_adding_one(monkeypatch):
+    insights, events = FakeCollection(), FakeCollection()
+    rollups = FakeRollups()
+    monkeypatch.setattr(server, 'insight_writes', WriteBehindQueue('test_late_insights', insights))
+    monkeypatch.setattr(server, 'timeline_events', WriteBehindQueue('test_late_events', events))
+    monkeypatch.setattr(server, 'timeline_rollups', rollups)
+    monkeypatch.setattr(server, 'INSIGHT_PERSIST', True)
+    monkeypatch.setenv('ANTHROPIC_API_KEY', 'test-key')
+
+    async def slow_claude(request, api_key, correlation_id, deadline_s):
+        await asyncio.sleep(0.05)
+        return server.InsightResponse(emotionalLabel='pasta hype', nextMove='Show the plate', source='claude',
+                                      correlationId=correlation_id)
+
+    monkeypatch.setattr(server, '_claude_insight', slow_claude)
+    request = server.InsightRequest(transcript='plating the garlic pasta now', viewerDelta=9, viewerCount=109,
+                                    prevCount=100, sessionId='late-session', bypassCache=True)
+
+    async def main():
+        first = await server.produce_insight(request, deadline_s=0.01)
+        late = await server.late_insights.get(first.correlationId)
+        await server.insight_writes.flush()
+        await server.timeline_events.flush()
+        return first, late
+
+    first, late = asyncio.run(main())
+    assert first.upgradePending and late.source == 'claude'
+    assert late.correlationId == first.correlationId
+    assert rollups.insights == ['late-session']
+
+    insert, upgrade = insights.operations
+    assert isinstance(insert, InsertOne)
+    assert upgrade == UpdateOne({'correlationId': first.correlationId}, {
+        '$set': {'source': 'claude', 'cached': False, 'late': True, 'late_latency_ms': ANY,
+                 'response': late.model_dump()},
+        '$setOnInsert': {'session_id': 'late-session', 'ts': ANY, 'request': ANY},
+    }, upsert=True)
+    assert events.operations[-1] == UpdateOne(
+        {'session_id': 'late-session', 'kind': 'insight', 'correlationId': first.correlationId},
+        {'$set': {'source': 'claude', 'late': True}},
+    )
+    assert [type(op) for op in events.operations].count(UpdateOne) == 1
@@ -0,0 +1,35 @@
+from metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('test_seconds', 'Test latency', ('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 3.0):
+        histogram.observe(value, stage='parse')
+    lines = registry.render().splitlines()
+    assert 'test_seconds_bucket{stage="parse",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{stage="parse",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="parse",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="parse"} 3' in lines
+    assert histogram.sum(stage='parse') == 3.15
+
+
+def test_histogram_timer():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('test_timer_seconds', 'Timer')
+    with histogram.time():
+        pass
+    assert histogram.count() == 1
+
+
+def test_histogram_quantile_is_the_bucket_upper_bound():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('test_quantile_seconds', 'Quantile', ('kind',), buckets=(0.5, 1.0, 2.5))
+    assert histogram.quantile(0.95, kind='single') != histogram.quantile(0.95, kind='single')  # nan when empty
+    for value in [0.6] * 95 + [2.0] * 5:
+        histogram.observe(value, kind='single')
+    assert histogram.quantile(0.5, kind='single') == 1.0
+    assert histogram.quantile(0.95, kind='single') == 1.0
+    assert histogram.quantile(0.99, kind='single') == 2.5
+    histogram.observe(9.0, kind='slow')
+    assert histogram.quantile(0.95, kind='slow') == float('inf')
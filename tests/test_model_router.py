@@ -0,0 +1,72 @@
+import pytest
+
+from model_router import DEFAULT_RULES, ModelRouter, ModelTier, parse_rules
+
+FAST = ModelTier('fast', 'small-model', 150)
+LARGE = ModelTier('large', 'big-model', 150)
+
+
+def make_router(**kwargs):
+    return ModelRouter([FAST, LARGE], parse_rules(DEFAULT_RULES), 'large', min_samples=3, **kwargs)
+
+
+def test_rules_pick_the_tier_per_category():
+    router = make_router()
+    assert router.route('flatline') == (FAST, 'rule')
+    assert router.route('drop') == (FAST, 'rule')
+    assert router.route('spike') == (LARGE, 'rule')
+    assert router.route('dump') == (LARGE, 'rule')
+    assert router.route('unknown') == (LARGE, 'rule')
+
+
+def test_slow_large_model_steps_down_only_once_it_has_enough_samples():
+    router = make_router(slo_s=2.0)
+    router.observe('big-model', 3.0)
+    router.observe('big-model', 3.5)
+    assert router.route('spike') == (LARGE, 'rule')
+    router.observe('big-model', 4.0)
+    assert router.latency('big-model') == 4.0
+    assert router.route('spike') == (FAST, 'slo')
+    # A request deadline looser than the observed latency keeps the large model
+    assert router.route('spike', budget_s=5.0) == (LARGE, 'rule')
+    # Batch-style lookups ignore latency
+    assert router.tier_for('spike') == LARGE
+
+
+def test_latency_window_forgets_old_samples():
+    router = make_router(slo_s=2.0, window=3)
+    for seconds in (4.0, 4.0, 4.0, 1.0, 1.0, 1.0):
+        router.observe('big-model', seconds)
+    assert router.route('dump') == (LARGE, 'rule')
+
+
+def test_bad_rules_are_rejected():
+    assert parse_rules(' spike = fast , ') == {'spike': 'fast'}
+    with pytest.raises(ValueError):
+        parse_rules('spike')
+    with pytest.raises(ValueError):
+        ModelRouter([FAST, LARGE], {'spike': 'medium'}, 'large')
+
+
+def test_step_down_recovers_once_slow_samples_expire():
+    now = [0.0]
+    router = make_router(slo_s=2.0, max_age_s=60.0, probe_every=0, clock=lambda: now[0])
+    for _ in range(3):
+        router.observe('big-model', 4.0)
+    assert router.route('spike') == (FAST, 'slo')
+    # The large model gets no traffic while stepped down; its old samples age out
+    now[0] = 61.0
+    assert router.latency('big-model') is None
+    assert router.route('spike') == (LARGE, 'rule')
+
+
+def test_probes_measure_a_recovered_large_tier():
+    router = make_router(slo_s=2.0, window=3, probe_every=4)
+    for _ in range(3):
+        router.observe('big-model', 4.0)
+    routes = [router.route('spike') for _ in range(4)]
+    assert routes == [(FAST, 'slo')] * 3 + [(LARGE, 'probe')]
+    # Probe calls come back fast; once they fill the window the rule's tier is used again
+    for _ in range(3):
+        router.observe('big-model', 1.0)
+    assert router.route('spike') == (LARGE, 'rule')
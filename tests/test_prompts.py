@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from prompts import MIN_TRANSCRIPT_TOKENS, build_insight_prompt, estimate_tokens
+
+
+def make_request(**overrides):
+    fields = dict(
+        transcript='hi chat welcome back', viewerDelta=3, viewerCount=10, prevCount=7,
+        prosody=None, burst=None, language=None, topic=None, quality=None, recentHistory=None,
+        keywordsSaid=None, recentInsights=None, winningTopics=None, transcriptQuality=None,
+        uniqueWordRatio=None, chatData=None,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def test_small_requests_are_untouched():
+    prompt = build_insight_prompt(make_request(), budget_tokens=600)
+    assert prompt.transcript_words_dropped == 0
+    assert prompt.dropped_sections == ()
+    assert 'WHAT THEY SAID (exact words): "hi chat welcome back"' in prompt.text
+    assert prompt.tokens == estimate_tokens(prompt.text) <= 600
+
+
+def test_long_transcript_keeps_the_most_recent_words_within_budget():
+    transcript = ' '.join(f'w{i}' for i in range(5000)) + ' the latest words'
+    prompt = build_insight_prompt(make_request(transcript=transcript), budget_tokens=400)
+    assert prompt.tokens <= 400
+    assert prompt.transcript_words_dropped > 4000
+    assert 'the latest words"' in prompt.text
+    assert '"…' in prompt.text and 'w0 ' not in prompt.text
+
+
+def test_history_is_deduped_and_comments_capped():
+    history = [SimpleNamespace(delta=3, emotion=None)] * 20 + [SimpleNamespace(delta=-2, emotion='Joy')]
+    chat = SimpleNamespace(commentCount=40, chatRate=90, topKeywords=None,
+                           recentComments=[f'comment {i} ' + 'x' * 400 for i in range(50)])
+    text = build_insight_prompt(make_request(recentHistory=history, chatData=chat), budget_tokens=2000).text
+    assert 'Recent pattern: +3 (unknown), -2 (Joy)\n' in text
+    assert text.count('  • comment') == 3
+    assert 'comment 49' in text and 'comment 46' not in text
+    assert 'x' * 200 not in text
+
+
+def test_optional_sections_dropped_by_priority_before_transcript_minimum():
+    chat = SimpleNamespace(commentCount=40, chatRate=90, topKeywords=['pan', 'spice'], recentComments=['so good'])
+    request = make_request(
+        transcript=' '.join(['sizzle'] * 400), chatData=chat, transcriptQuality='good', uniqueWordRatio=0.4,
+        winningTopics=['recipes'], keywordsSaid=['garlic'],
+    )
+    prompt = build_insight_prompt(request, budget_tokens=200)
+    assert prompt.dropped_sections == ('quality', 'winning_topics')
+    assert prompt.tokens <= 200
+    assert 'Transcript quality' not in prompt.text
+    assert 'VIEWER IMPACT: +3 viewers' in prompt.text
+    transcript_tokens = estimate_tokens(prompt.text.split('"')[1])
+    assert transcript_tokens >= MIN_TRANSCRIPT_TOKENS - 1
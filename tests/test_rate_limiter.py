@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from rate_limiter import PRIORITIES, AIMDConcurrency, BudgetExhausted, PriorityLimiter, TokenBucket
+
+
+def _limiter(concurrency=1, rate=1000.0, burst=1000.0, max_wait_s=0.5):
+    return PriorityLimiter(
+        TokenBucket(rate=rate, burst=burst),
+        AIMDConcurrency(initial=concurrency, minimum=1, maximum=8, target_latency_s=1.0),
+        max_wait_s=max_wait_s,
+    )
+
+
+def test_low_priority_rejected_when_budget_exhausted():
+    async def main():
+        limiter = _limiter()
+        await limiter.acquire(PRIORITIES['spike'])
+        with pytest.raises(BudgetExhausted):
+            await limiter.acquire(PRIORITIES['flatline'])
+
+    asyncio.run(main())
+
+
+def test_queue_serves_dump_before_spike():
+    order = []
+
+    async def main():
+        limiter = _limiter()
+        await limiter.acquire(PRIORITIES['drop'])
+
+        async def wait(name):
+            await limiter.acquire(PRIORITIES[name])
+            order.append(name)
+            limiter.release(latency_s=0.1)
+
+        spike = asyncio.create_task(wait('spike'))
+        await asyncio.sleep(0)
+        dump = asyncio.create_task(wait('dump'))
+        await asyncio.sleep(0)
+        limiter.release(latency_s=0.1)
+        await asyncio.gather(spike, dump)
+
+    asyncio.run(main())
+    assert order == ['dump', 'spike']
+
+
+def test_token_bucket_wakes_queued_call():
+    async def main():
+        limiter = _limiter(concurrency=4, rate=50.0, burst=1.0)
+        await limiter.acquire(PRIORITIES['dump'])
+        await limiter.acquire(PRIORITIES['dump'])  # waits ~20ms for a token
+        assert limiter.in_flight == 2
+
+    asyncio.run(main())
+
+
+def test_aimd_grows_on_fast_calls_and_halves_on_throttle():
+    aimd = AIMDConcurrency(initial=4, minimum=1, maximum=8, target_latency_s=1.0)
+    aimd.on_success(0.2)
+    assert aimd.limit == pytest.approx(4.25)
+    aimd.on_throttle()
+    assert aimd.limit == pytest.approx(2.125)
+    aimd.on_success(5.0)
+    assert aimd.limit < 2.125
+
+
+def test_timed_out_waiter_no_longer_blocks_admission():
+    async def main():
+        limiter = _limiter(max_wait_s=0.02)
+        await limiter.acquire(PRIORITIES['drop'])
+        with pytest.raises(BudgetExhausted):
+            await limiter.acquire(PRIORITIES['spike'])
+        assert len(limiter._waiters) == 0
+        # Capacity comes back without a dispatch; the fast path must see an empty queue
+        limiter.in_flight -= 1
+        await limiter.acquire(PRIORITIES['flatline'])
+        assert limiter.in_flight == 1
+
+    asyncio.run(main())
@@ -0,0 +1,39 @@
+from segmenter import RingBuffer, TranscriptSegmenter, clean_transcript
+
+
+def test_clean_transcript_destutters():
+    assert clean_transcript('I I I  think, think this   works') == 'I think this works'
+
+
+def test_sentence_end_and_gap_close_segments():
+    seg = TranscriptSegmenter()
+    assert seg.push(0.0, 'so today we are cooking') is None
+    closed = seg.push(0.5, 'a chicken recipe for you.')
+    assert closed.text == 'so today we are cooking a chicken recipe for you.'
+    seg.push(1.0, 'next up is the sauce we make')
+    closed = seg.push(5.0, 'totally different thing')
+    assert closed.text == 'next up is the sauce we make'
+    assert [s.end for s in seg.segments] == [0.5, 1.0]
+
+
+def test_max_words_caps_segment():
+    seg = TranscriptSegmenter(max_words=6)
+    assert seg.push(0.0, 'one two three') is None
+    assert seg.push(0.1, 'four five six').words == 6
+
+
+def test_segment_lookup_by_time_window():
+    seg = TranscriptSegmenter()
+    for i in range(10):
+        seg.push(i * 10.0, f'segment number {i} has enough words.')
+    assert seg.segment_before(45.0, 25.0).end == 40.0
+    assert seg.segment_before(45.0, 4.0) is None
+    assert seg.latest(95.0, 25.0).end == 90.0
+
+
+def test_ring_buffer_keeps_latest_items():
+    ring = RingBuffer(3)
+    for i in range(5):
+        ring.append(i)
+    assert list(ring) == [2, 3, 4]
+    assert ring[-1] == 4
@@ -0,0 +1,68 @@
+from session_engine import SessionCorrelator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _session():
+    clock = FakeClock()
+    session = SessionCorrelator('s1', clock=clock)
+    session.add_transcript('so I am playing valorant on my new pc right now')
+    return session, clock
+
+
+def test_delta_over_threshold_triggers_insight_request():
+    session, _ = _session()
+    assert session.add_viewer_count(40) is None
+    trigger = session.add_viewer_count(52)
+    assert trigger['viewerDelta'] == 12
+    assert trigger['prevCount'] == 40
+    assert trigger['sessionId'] == 's1'
+    assert 'valorant' in trigger['transcript']
+
+
+def test_small_delta_and_cooldown_are_ignored():
+    session, clock = _session()
+    session.add_viewer_count(40)
+    assert session.add_viewer_count(41) is None
+    assert session.add_viewer_count(50) is not None
+    clock.now += 5
+    assert session.add_viewer_count(30) is None
+
+
+def test_no_segment_outside_window():
+    session, clock = _session()
+    session.add_viewer_count(40)
+    clock.now += 60
+    assert session.add_viewer_count(60) is None
+
+
+def test_closed_segment_yields_speculative_spike_and_drop_requests():
+    clock = FakeClock()
+    session = SessionCorrelator('s1', clock=clock)
+    assert session.speculative_requests('anything', 5) == {}  # no viewer count yet
+    session.add_viewer_count(100)
+    segment = session.add_transcript('okay chat the pasta is finally ready to plate.')
+    assert segment == 'okay chat the pasta is finally ready to plate.'
+
+    requests = session.speculative_requests(segment, 5)
+    assert sorted(requests) == [-5, 5]
+    assert requests[5]['viewerCount'] == 105 and requests[5]['prevCount'] == 100
+    assert requests[-5]['transcript'] == segment
+    # Speculation does not touch trigger state
+    assert list(session.history) == [] and session.last_insight_at is None
+
+
+def test_no_speculation_while_cooldown_outlasts_the_window():
+    session, clock = _session()
+    session.configure(cooldownMs=60000, windowMs=25000)
+    session.add_viewer_count(40)
+    assert session.add_viewer_count(52) is not None
+    assert session.speculative_requests('next segment text here', 5) == {}
+    clock.now += 40
+    assert len(session.speculative_requests('next segment text here', 5)) == 2
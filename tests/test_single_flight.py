@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from single_flight import InsightCancelled, SingleFlight
+
+
+def test_same_key_requests_share_one_call():
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'insight'
+
+    async def main():
+        flights = SingleFlight()
+        return await asyncio.gather(*[flights.run('s1', 'k', upstream) for _ in range(3)])
+
+    assert asyncio.run(main()) == ['insight'] * 3
+    assert len(calls) == 1
+
+
+def test_new_key_supersedes_in_flight_call():
+    async def slow():
+        await asyncio.sleep(1)
+        return 'old'
+
+    async def fast():
+        return 'new'
+
+    async def main():
+        flights = SingleFlight()
+        first = asyncio.create_task(flights.run('s1', 'a', slow))
+        await asyncio.sleep(0)
+        second = await flights.run('s1', 'b', fast)
+        with pytest.raises(InsightCancelled) as exc:
+            await first
+        return second, exc.value.reason
+
+    assert asyncio.run(main()) == ('new', 'superseded')
+
+
+def test_disconnect_cancels_upstream_call():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def disconnected():
+        return True
+
+    async def main():
+        flights = SingleFlight(disconnect_poll_s=0.01)
+        with pytest.raises(InsightCancelled):
+            await flights.run('s1', 'k', slow, is_disconnected=disconnected)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [True]
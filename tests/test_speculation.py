@@ -0,0 +1,126 @@
+import asyncio
+
+from speculation import SpeculativeInsights
+
+
+class FakeGenerator:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.cancelled = 0
+
+    async def __call__(self, fields):
+        self.calls.append(fields)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"candidate {fields['delta']}"
+
+
+def test_matching_trigger_gets_its_candidate_and_the_other_is_wasted():
+    generate = FakeGenerator(delay=0.05)
+
+    async def main():
+        spec = SpeculativeInsights(generate)
+        assert spec.speculate('s1', 'segment', {'spike': (5, {'delta': 5}), 'drop': (-5, {'delta': -5})}) == 2
+        await asyncio.sleep(0)
+        result = await spec.take('s1', 'segment', 'spike', 5)  # joins the in-flight call
+        await asyncio.sleep(0)
+        return spec, result
+
+    spec, result = asyncio.run(main())
+    assert result == 'candidate 5'
+    assert generate.cancelled == 1
+    assert len(spec) == 0
+
+
+def test_new_segment_or_other_category_is_a_miss():
+    generate = FakeGenerator()
+
+    async def main():
+        spec = SpeculativeInsights(generate)
+        spec.speculate('s1', 'old segment', {'spike': (5, {'delta': 5})})
+        spec.speculate('s1', 'new segment', {'spike': (6, {'delta': 6})})
+        await asyncio.sleep(0.01)
+        stale = await spec.take('s1', 'old segment', 'spike', 6)
+        spec.speculate('s1', 'new segment', {'spike': (7, {'delta': 7})})
+        wrong_category = await spec.take('s1', 'new segment', 'dump', 7)
+        nothing = await spec.take('s1', 'new segment', 'spike', 7)
+        return stale, wrong_category, nothing
+
+    assert asyncio.run(main()) == (None, None, None)
+
+
+def test_in_flight_cap_skips_extra_candidates():
+    generate = FakeGenerator(delay=0.05)
+
+    async def main():
+        spec = SpeculativeInsights(generate, max_in_flight=3)
+        started = [
+            spec.speculate('s1', 'a', {'spike': (5, {'delta': 5}), 'drop': (-5, {'delta': -5})}),
+            spec.speculate('s2', 'b', {'spike': (5, {'delta': 5}), 'drop': (-5, {'delta': -5})}),
+        ]
+        spec.discard('s1')
+        spec.discard('s2')
+        await asyncio.sleep(0)
+        return started
+
+    assert asyncio.run(main()) == [2, 1]
+
+
+def test_failed_candidate_is_a_miss():
+    async def fail(fields):
+        raise RuntimeError("claude down")
+
+    async def main():
+        spec = SpeculativeInsights(fail)
+        spec.speculate('s1', 'segment', {'spike': (5, {})})
+        return await spec.take('s1', 'segment', 'spike', 5)
+
+    assert asyncio.run(main()) is None
+
+
+def test_candidate_is_only_served_for_a_delta_close_to_the_assumed_one():
+    generate = FakeGenerator()
+
+    async def main():
+        spec = SpeculativeInsights(generate, max_delta_error=3)
+        spec.speculate('s1', 'segment', {'spike': (5, {'delta': 5})})
+        close = await spec.take('s1', 'segment', 'spike', 8)
+        spec.speculate('s1', 'segment', {'spike': (5, {'delta': 5})})
+        far = await spec.take('s1', 'segment', 'spike', 40)
+        return close, far
+
+    assert asyncio.run(main()) == ('candidate 5', None)
+
+
+def test_cancelled_take_cancels_its_candidate():
+    generate = FakeGenerator(delay=1.0)
+
+    async def main():
+        spec = SpeculativeInsights(generate)
+        spec.speculate('s1', 'segment', {'spike': (5, {'delta': 5})})
+        await asyncio.sleep(0)
+        take = asyncio.create_task(spec.take('s1', 'segment', 'spike', 5))
+        await asyncio.sleep(0.01)
+        take.cancel()
+        await asyncio.gather(take, return_exceptions=True)
+        await asyncio.sleep(0)
+        return spec
+
+    spec = asyncio.run(main())
+    assert generate.cancelled == 1
+    assert spec._in_flight == 0
+
+
+def test_candidates_cancelled_before_starting_release_their_slot():
+    async def main():
+        spec = SpeculativeInsights(FakeGenerator(delay=1.0), max_in_flight=2)
+        spec.speculate('s1', 'a', {'spike': (5, {'delta': 5}), 'drop': (-5, {'delta': -5})})
+        spec.discard('s1')  # before either task got to run
+        await asyncio.sleep(0.01)
+        return spec.speculate('s1', 'b', {'spike': (5, {'delta': 5}), 'drop': (-5, {'delta': -5})})
+
+    assert asyncio.run(main()) == 2
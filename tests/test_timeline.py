@@ -0,0 +1,162 @@
+import asyncio
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from timeline import TimelineRollups
+
+
+class FakeRollups:
+    """Records bulk_write calls; find() serves whatever documents a test stored in `docs`."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.docs = []
+        self.error = error
+
+    async def bulk_write(self, operations, ordered=True):
+        self.calls.append((list(operations), ordered))
+        if self.error is not None:
+            raise self.error
+
+    def find(self, query, projection):
+        return _Cursor([d for d in self.docs
+                        if d['session_id'] == query['session_id'] and d['resolution'] == query['resolution']])
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs.sort(key=lambda d: d[field])
+        return self
+
+    def __aiter__(self):
+        async def gen():
+            for doc in self.docs:
+                yield doc
+        return gen()
+
+
+def _events(rollups):
+    rollups.record_viewers('s1', 5, ts=1000)
+    rollups.record_viewers('s1', -3, ts=1005)
+    rollups.record_insight('s1', 'gaming', ts=1006)
+    rollups.record_viewers('s1', 12, ts=1012)
+    rollups.record_insight('s1', 'gaming', ts=1013)
+    rollups.record_insight('s1', 'food', ts=1014)
+    rollups.record_viewers('s2', 100, ts=1000)
+
+
+def _upsert(session_id, resolution, start, update):
+    return UpdateOne(
+        {'session_id': session_id, 'resolution': resolution, 'bucket': datetime.utcfromtimestamp(start)},
+        update, upsert=True,
+    )
+
+
+def test_flush_upserts_one_delta_per_bucket():
+    collection = FakeRollups()
+
+    async def main():
+        rollups = TimelineRollups(collection)
+        _events(rollups)
+        assert await rollups.flush() == 7  # s1: two 10s buckets + one 1m + one 5m; s2: one of each
+        assert await rollups.flush() == 0
+
+    asyncio.run(main())
+    (operations, ordered), = collection.calls
+    assert not ordered and len(operations) == 7
+    assert _upsert('s1', '10s', 1000, {
+        '$inc': {'count': 2, 'sum_delta': 2, 'insights': 1, 'topics.gaming': 1},
+        '$min': {'min_delta': -3}, '$max': {'max_delta': 5},
+    }) in operations
+    assert _upsert('s1', '1m', 960, {
+        '$inc': {'count': 3, 'sum_delta': 14, 'insights': 3, 'topics.gaming': 2, 'topics.food': 1},
+        '$min': {'min_delta': -3}, '$max': {'max_delta': 12},
+    }) in operations
+
+
+def test_reads_merge_stored_buckets_with_pending_deltas():
+    collection = FakeRollups()
+    collection.docs = [
+        {'session_id': 's1', 'resolution': '10s', 'bucket': datetime.utcfromtimestamp(1010),
+         'count': 1, 'sum_delta': 12, 'min_delta': 12, 'max_delta': 12, 'insights': 2,
+         'topics': {'gaming': 1, 'food': 1}},
+        {'session_id': 's1', 'resolution': '10s', 'bucket': datetime.utcfromtimestamp(1000),
+         'count': 2, 'sum_delta': 2, 'min_delta': -3, 'max_delta': 5, 'insights': 1, 'topics': {'gaming': 1}},
+    ]
+
+    async def main():
+        rollups = TimelineRollups(collection)
+        rollups.record_viewers('s1', -8, ts=1015)
+        rollups.record_insight('s1', 'gaming', ts=1016)
+        return await rollups.read('s1', '10s')
+
+    ten_second = asyncio.run(main())
+    assert [start for start, _ in ten_second] == [1000, 1010]
+    first, second = ten_second[0][1], ten_second[1][1]
+    assert (first.count, first.min_delta, first.max_delta, first.sum_delta, first.insights) == (2, -3, 5, 2, 1)
+    assert (second.count, second.min_delta, second.max_delta, second.sum_delta) == (2, -8, 12, 4)
+    assert (second.insights, second.top_topic()) == (3, 'gaming')
+
+
+def test_failed_flush_keeps_deltas():
+    collection = FakeRollups(error=RuntimeError("mongo down"))
+
+    async def main():
+        rollups = TimelineRollups(collection)
+        _events(rollups)
+        assert await rollups.flush() == 0
+        collection.error = None
+        assert await rollups.flush() == 7
+
+    asyncio.run(main())
+    first, retry = collection.calls
+    assert retry[0] == first[0]
+
+
+def test_partial_bulk_write_error_retries_only_the_failed_buckets():
+    collection = FakeRollups(error=BulkWriteError({
+        'writeErrors': [{'index': 1, 'code': 11000, 'errmsg': 'duplicate key'}],
+        'writeConcernErrors': [], 'nInserted': 0, 'nUpserted': 6, 'nMatched': 0, 'nModified': 0,
+        'nRemoved': 0, 'upserted': [],
+    }))
+
+    async def main():
+        rollups = TimelineRollups(collection)
+        _events(rollups)
+        assert await rollups.flush() == 6
+        collection.error = None
+        assert await rollups.flush() == 1
+
+    asyncio.run(main())
+    (first, _), (retry, _) = collection.calls
+    # Applied buckets are not written twice; the failed one is retried unchanged
+    assert retry == [first[1]]
+
+
+def test_cancelled_flush_keeps_every_delta():
+    class Hanging(FakeRollups):
+        async def bulk_write(self, operations, ordered=True):
+            self.calls.append((list(operations), ordered))
+            await asyncio.Event().wait()
+
+    collection = Hanging()
+
+    async def main():
+        rollups = TimelineRollups(collection)
+        _events(rollups)
+        flush = asyncio.create_task(rollups.flush())
+        await asyncio.sleep(0)
+        flush.cancel()
+        try:
+            await flush
+        except asyncio.CancelledError:
+            pass
+        return await rollups.read('s2', '5m')
+
+    (_, bucket), = asyncio.run(main())
+    assert bucket.count == 1 and bucket.sum_delta == 100
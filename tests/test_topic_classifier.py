@@ -0,0 +1,36 @@
+from topic_classifier import GENERAL, TopicClassifier, compile_vocabularies
+
+classifier = TopicClassifier()
+
+
+def test_classifies_by_most_hits_in_one_pass():
+    match = classifier.classify("Today I'm COOKING garlic pasta, the recipe is from my mom. Chat, you ready?")
+    assert match.topic == 'food'
+    assert match.hits == {'food': 4, 'interaction': 1}
+    assert match.keywords[:2] == ['cooking', 'garlic']
+
+
+def test_ties_follow_client_precedence_and_words_need_boundaries():
+    assert classifier.classify('drop a comment about this game').topic == 'interaction'
+    # "rep" / "ig" / "run" inside other words don't count
+    assert classifier.classify('big report about the brunch').topic == GENERAL
+    assert classifier.classify('').topic == GENERAL
+
+
+def test_phrases_and_suffix_wildcards():
+    match = classifier.classify('let me   know if you like my new lipsticks')
+    assert match.hits == {'interaction': 2, 'makeup': 1}
+    assert 'let me know' in match.keywords
+    assert compile_vocabularies({'t': ('cook*',)}).fullmatch('cookbooks')
+
+
+def test_multi_topic_ties_follow_precedence():
+    # One hit each: client order is interaction, food, fitness, finance, personal
+    assert classifier.classify('we eat then hit the gym').hits == {'food': 1, 'fitness': 1}
+    assert classifier.classify('we eat then hit the gym').topic == 'food'
+    assert classifier.classify('i feel like buying stocks').topic == 'interaction'
+    assert classifier.classify('honestly the price went up').topic == 'finance'
+    # Server-only topics rank ahead of personal
+    assert classifier.classify('honestly this song').topic == 'music'
+    # More hits still beat precedence
+    assert classifier.classify('the gym workout then squats, then we eat').topic == 'fitness'
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI, Request
+
+from traffic_recorder import RecorderMiddleware, TrafficRecorder, sanitize
+
+
+def test_sanitize_scrubs_strings_and_pseudonymizes_session_ids():
+    body = {
+        'transcript': 'email me at jo@example.com or visit https://shop.example/x, thanks @bigfan',
+        'chatData': {'recentComments': ['call 555-123-4567 now']},
+        'sessionId': 'stream-42',
+        'viewerDelta': -3,
+    }
+    clean = sanitize(body, salt='s')
+    assert clean['transcript'] == 'email me at <email> or visit <url> thanks @user'
+    assert clean['chatData']['recentComments'] == ['call <number> now']
+    assert clean['viewerDelta'] == -3
+    assert clean['sessionId'] != 'stream-42'
+    assert clean['sessionId'] == sanitize(body, salt='s')['sessionId']
+    assert clean['sessionId'] != sanitize(body, salt='other')['sessionId']
+
+
+def test_middleware_records_selected_posts_without_touching_the_request(tmp_path):
+    path = tmp_path / 'traffic.jsonl'
+    recorder = TrafficRecorder(str(path), lambda raw: json.loads(raw) if raw.startswith(b'{') else None)
+    app = FastAPI()
+    app.add_middleware(RecorderMiddleware, recorder=recorder, paths=['/record'])
+
+    @app.post('/record')
+    async def record(request: Request):
+        return await request.json()
+
+    @app.post('/other')
+    async def other(request: Request):
+        return await request.json()
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            assert (await client.post('/record', json={'a': 1})).json() == {'a': 1}
+            await client.post('/record', content=b'[1]')
+            await client.post('/other', json={'b': 2})
+            await client.post('/record', json={'a': 2})
+        assert len(recorder) == 3
+        return await recorder.flush()
+
+    assert asyncio.run(main()) == 2
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line['body'] for line in lines] == [{'a': 1}, {'a': 2}]
+    assert all(line['path'] == '/record' for line in lines)
+    assert lines[0]['ts'] <= lines[1]['ts']
+
+
+def test_recorder_drops_oldest_when_full(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path / 'x.jsonl'), json.loads, max_queue=2)
+    for i in range(3):
+        recorder.record('/p', json.dumps({'i': i}).encode(), float(i))
+
+    assert asyncio.run(recorder.flush()) == 2
+    bodies = [json.loads(line)['body'] for line in (tmp_path / 'x.jsonl').read_text().splitlines()]
+    assert bodies == [{'i': 1}, {'i': 2}]
@@ -0,0 +1,80 @@
+import asyncio
+
+from write_behind import WriteBehindQueue
+
+
+class FakeCollection:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def insert_many(self, documents, ordered=True):
+        if self.fail:
+            raise RuntimeError("mongo down")
+        self.batches.append(list(documents))
+
+
+def test_flushes_by_size_without_waiting_for_the_interval():
+    collection = FakeCollection()
+
+    async def main():
+        queue = WriteBehindQueue('test_size', collection, max_batch=3, flush_interval_s=60)
+        queue.start()
+        for i in range(7):
+            queue.put({'i': i})
+        await asyncio.sleep(0.01)
+        assert [len(b) for b in collection.batches] == [3, 3]
+        await queue.aclose()
+
+    asyncio.run(main())
+    assert [len(b) for b in collection.batches] == [3, 3, 1]
+
+
+def test_flushes_by_time():
+    collection = FakeCollection()
+
+    async def main():
+        queue = WriteBehindQueue('test_time', collection, max_batch=100, flush_interval_s=0.01)
+        queue.start()
+        queue.put({'i': 1})
+        await asyncio.sleep(0.05)
+        assert collection.batches == [[{'i': 1}]]
+        await queue.aclose()
+
+    asyncio.run(main())
+
+
+def test_queue_is_bounded_and_errors_do_not_raise():
+    collection = FakeCollection(fail=True)
+
+    async def main():
+        queue = WriteBehindQueue('test_bounded', collection, max_batch=10, flush_interval_s=60, max_queue=5)
+        for i in range(8):
+            queue.put({'i': i})
+        assert len(queue) == 5
+        assert await queue.flush() == 0
+        assert len(queue) == 0
+
+    asyncio.run(main())
+
+
+class FakeBulkCollection(FakeCollection):
+    async def bulk_write(self, operations, ordered=True):
+        self.batches.append(('bulk', ordered, list(operations)))
+
+
+def test_updates_flush_in_order_after_their_inserts():
+    from pymongo import InsertOne, UpdateOne
+
+    collection = FakeBulkCollection()
+
+    async def main():
+        queue = WriteBehindQueue('test_update', collection, max_batch=10, flush_interval_s=60)
+        queue.put({'cid': 'a', 'source': 'fallback'})
+        queue.update({'cid': 'a'}, {'$set': {'source': 'claude'}})
+        assert await queue.flush() == 2
+
+    asyncio.run(main())
+    assert collection.batches == [('bulk', True, [
+        InsertOne({'cid': 'a', 'source': 'fallback'}), UpdateOne({'cid': 'a'}, {'$set': {'source': 'claude'}}),
+    ])]